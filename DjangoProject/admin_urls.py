@@ -0,0 +1,14 @@
+# DjangoProject/admin_urls.py
+"""
+URLs del panel de administración, importadas la primera vez que se pide una URL
+bajo /admin/ (o se invierte una URL 'admin:...'), no al arrancar el proceso.
+
+INSTALLED_APPS usa SimpleAdminConfig, que no hace autodiscover: los admin.py
+(y con ellos import_export y tablib, que solo usa el panel) se cargan aquí.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+app_name = 'admin'
+urlpatterns = admin.site.get_urls()
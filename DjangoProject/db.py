@@ -0,0 +1,20 @@
+# DjangoProject/db.py
+"""
+Ajustes por conexión de la base de datos.
+
+Cada conexión SQLite nueva recibe los PRAGMA de ``settings.SQLITE_PRAGMAS``
+(WAL, synchronous, busy_timeout, mmap_size, cache_size...). Se registra desde
+``CharactersConfig.ready`` para que esté activo antes de la primera conexión.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created, dispatch_uid='sqlite-pragmas')
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # Directamente sobre la conexión de sqlite3: fuera del log de consultas y de cualquier transacción
+    for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,269 @@
+# DjangoProject/instrumentation.py
+"""
+Instrumentación opcional de las peticiones (INSTRUMENTATION=1, ver settings.py).
+
+Por cada petición ``InstrumentationMiddleware`` mide:
+
+* consultas SQL y su tiempo, con un execute wrapper instalado en cada
+  conexión del hilo que atiende la petición (request_started, y
+  connection_created para las que se abren después), que suma a la petición
+  en curso (un ContextVar, que también llega al código de sync_to_async de
+  las vistas async);
+* tiempo de render de plantillas, con el backend ``DjangoTemplates`` de este
+  módulo, sin contar el SQL que lancen las plantillas (querysets perezosos);
+* latencia total hasta devolver la respuesta (en una respuesta en streaming
+  no incluye el envío del cuerpo).
+
+Las medidas se agregan en memoria por nombre de URL (``characters:character_list``)
+en histogramas de cubetas fijas, por proceso, y se consultan en /instrumentation/
+(solo staff; POST los vacía). Las peticiones que superan
+INSTRUMENTATION_SLOW_MS o INSTRUMENTATION_MAX_QUERIES se registran en el log
+``DjangoProject.instrumentation``. A diferencia de connection.queries con DEBUG,
+la memoria usada no crece con el número de peticiones.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+from django.template.backends.django import DjangoTemplates as BaseDjangoTemplates
+from django.views.decorators.http import require_http_methods
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores de las cubetas; la última cubeta recoge lo que los supera
+MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100, 200)
+
+_current = ContextVar('instrumentation_request', default=None)
+
+
+class Histogram:
+    """Histograma de cubetas fijas: memoria constante y percentiles aproximados."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction):
+        # Interpolando dentro de la cubeta donde cae el percentil
+        target = fraction * self.count
+        seen, lower = 0, 0
+        for bound, count in zip(self.bounds, self.counts):
+            if count and seen + count >= target:
+                estimate = lower + (bound - lower) * (target - seen) / count
+                return round(max(self.min, min(estimate, self.max)), 2)
+            seen, lower = seen + count, bound
+        return round(self.max, 2)
+
+    def as_dict(self):
+        labels = [f'<={bound}' for bound in self.bounds] + [f'>{self.bounds[-1]}']
+        return {
+            'mean': round(self.total / self.count, 2) if self.count else 0,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'max': round(self.max, 2),
+            'buckets': {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+class ViewStats:
+    def __init__(self):
+        self.latency_ms = Histogram(MS_BUCKETS)
+        self.sql_count = Histogram(QUERY_BUCKETS)
+        self.sql_ms = Histogram(MS_BUCKETS)
+        self.template_ms = Histogram(MS_BUCKETS)
+
+    def add(self, sample):
+        self.latency_ms.add(sample.latency * 1000)
+        self.sql_count.add(sample.sql_count)
+        self.sql_ms.add(sample.sql_time * 1000)
+        self.template_ms.add(sample.template_time * 1000)
+
+    def as_dict(self):
+        return {
+            'requests': self.latency_ms.count,
+            'latency_ms': self.latency_ms.as_dict(),
+            'sql_count': self.sql_count.as_dict(),
+            'sql_ms': self.sql_ms.as_dict(),
+            'template_ms': self.template_ms.as_dict(),
+        }
+
+
+_stats = {}  # Nombre de URL -> ViewStats
+_stats_lock = threading.Lock()
+
+
+def snapshot():
+    """Estadísticas por nombre de URL, de la que más tiempo acumula a la que menos."""
+    with _stats_lock:
+        stats = sorted(_stats.items(), key=lambda item: item[1].latency_ms.total, reverse=True)
+        return {name: view_stats.as_dict() for name, view_stats in stats}
+
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
+
+
+class RequestSample:
+    """Medidas de una petición; ``execute_wrapper`` le pasa sus consultas."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.latency = 0
+        self.sql_count = 0
+        self.sql_time = 0
+        self.template_time = 0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.sql_count += 1
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    sample = _current.get()
+    if sample is None:  # Fuera de una petición (trabajos en segundo plano, comandos...)
+        return execute(sql, params, many, context)
+    return sample(execute, sql, params, many, context)
+
+
+def install(connection, **kwargs):
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def install_on_thread(**kwargs):
+    # Las conexiones son por hilo: con ASGI, las del hilo donde corre el código síncrono
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+
+
+class TimedTemplate:
+    """Plantilla del backend que suma su tiempo de render a la petición en curso."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        sample = _current.get()
+        if sample is None or sample.rendering:
+            # Fuera de una petición, o plantilla dentro de otra: ya se cuenta la de fuera
+            return self.template.render(context, request)
+        sample.rendering = True
+        start, sql_before = time.perf_counter(), sample.sql_time
+        try:
+            return self.template.render(context, request)
+        finally:
+            sample.rendering = False
+            sample.template_time += time.perf_counter() - start - (sample.sql_time - sql_before)
+
+
+class DjangoTemplates(BaseDjangoTemplates):
+    """Backend de plantillas de Django que mide el render (settings.TEMPLATES con INSTRUMENTATION=1)."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class InstrumentationMiddleware:
+    """Mide cada petición; va el primero de MIDDLEWARE para contar también el resto."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.slow_ms = getattr(settings, 'INSTRUMENTATION_SLOW_MS', 500)
+        self.max_queries = getattr(settings, 'INSTRUMENTATION_MAX_QUERIES', 50)
+        request_started.connect(install_on_thread, dispatch_uid='instrumentation-install')
+        connection_created.connect(install, dispatch_uid='instrumentation-install')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        sample = RequestSample()
+        token = _current.set(sample)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, sample)
+        return response
+
+    async def __acall__(self, request):
+        sample = RequestSample()
+        token = _current.set(sample)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, sample)
+        return response
+
+    def finish(self, request, sample):
+        sample.latency = time.perf_counter() - sample.started
+        match = request.resolver_match
+        name = match.view_name if match else '(sin resolver)'
+        with _stats_lock:
+            if name not in _stats:
+                _stats[name] = ViewStats()
+            _stats[name].add(sample)
+
+        latency_ms = sample.latency * 1000
+        if latency_ms > self.slow_ms or sample.sql_count > self.max_queries:
+            logger.warning(
+                "%s %s (%s): %.0f ms, %d consultas SQL en %.0f ms, plantillas %.0f ms",
+                request.method, request.path, name, latency_ms,
+                sample.sql_count, sample.sql_time * 1000, sample.template_time * 1000,
+            )
+
+
+@login_required
+@require_http_methods(['GET', 'POST'])
+def stats_view(request):
+    """Histogramas por nombre de URL en JSON; un POST los vacía."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+    if request.method == 'POST':
+        reset()
+    return JsonResponse({
+        'enabled': getattr(settings, 'INSTRUMENTATION', False),
+        'slow_ms': getattr(settings, 'INSTRUMENTATION_SLOW_MS', 500),
+        'max_queries': getattr(settings, 'INSTRUMENTATION_MAX_QUERIES', 50),
+        'views': snapshot(),
+    })
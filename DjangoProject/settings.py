@@ -13,11 +13,11 @@ import os
 from pathlib import Path
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
-print("DEBUG: BASE_DIR is:", BASE_DIR)
 
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+# En producción: DJANGO_SETTINGS_MODULE=DjangoProject.settings_production
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-#^n&)8$+&u7az_f0r(-ac6f&5l84xlqh6n5s(^br%v)e$k!%9c'
@@ -31,7 +31,9 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Sin autodiscover al arrancar: el admin (e import_export) se carga con la
+    # primera URL bajo /admin/, ver DjangoProject/admin_urls.py
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -74,19 +76,61 @@ TEMPLATES = [
         },
     },
 ]
-print("DEBUG: Template DIRS is:", TEMPLATES[0]['DIRS'])
 WSGI_APPLICATION = 'DjangoProject.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Perfil de base de datos según el entorno: DB_ENGINE=sqlite (por defecto) o postgres.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    # DB_POOL=1 usa el pool de psycopg 3 (Django 5.1+); si no, conexiones persistentes
+    # durante DB_CONN_MAX_AGE segundos. Django no permite combinar ambas cosas.
+    DB_POOL = os.environ.get('DB_POOL') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'proyecto'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', ''),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                    'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                },
+            } if DB_POOL else {},
+        }
     }
-}
+else:
+    # SQLITE_TUNING=0 vuelve a los valores por defecto de SQLite (para comparar en benchmarks)
+    SQLITE_TUNING = os.environ.get('SQLITE_TUNING', '1') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            # BEGIN IMMEDIATE: una transacción de escritura espera el bloqueo (busy_timeout)
+            # en vez de fallar con "database is locked" al pasar de lectura a escritura.
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'} if SQLITE_TUNING else {},
+        }
+    }
+    SQLITE_TUNED_PRAGMAS = {
+        'journal_mode': 'WAL',  # Lectores y un escritor a la vez
+        'synchronous': 'NORMAL',  # Seguro con WAL; sin fsync en cada commit
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # ms esperando un bloqueo
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 64 * 1024)),  # Negativo: en KiB
+        'temp_store': 'MEMORY',
+    }
+    # Aplicadas a cada conexión nueva por DjangoProject/db.py. journal_mode queda guardado
+    # en el archivo, así que sin ajustes hay que volver a DELETE explícitamente.
+    SQLITE_PRAGMAS = SQLITE_TUNED_PRAGMAS if SQLITE_TUNING else {'journal_mode': 'DELETE'}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,6 +168,52 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Cachés. 'catalog' guarda los catálogos de Enemy/Item ya renderizados (characters/catalog.py).
+# Por defecto en memoria de cada proceso; con CATALOG_CACHE_DIR se usa un caché en disco compartido.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalog',
+    },
+}
+if os.environ.get('CATALOG_CACHE_DIR'):
+    CACHES['catalog'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['CATALOG_CACHE_DIR'],
+    }
+CATALOG_CACHE_TIMEOUT = 3600
+
+# Vistas async (characters/async_views.py, battle/async_views.py) para listas, exportaciones y
+# batalla. DjangoProject/asgi.py las activa por defecto; con WSGI se quedan las síncronas.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '0') == '1'
+
+# Instrumentación opcional (DjangoProject/instrumentation.py): consultas SQL, tiempo de SQL,
+# de plantillas y latencia por nombre de URL, en /instrumentation/ (solo staff). Las peticiones
+# que pasan de INSTRUMENTATION_SLOW_MS o de INSTRUMENTATION_MAX_QUERIES consultas van al log.
+INSTRUMENTATION = os.environ.get('INSTRUMENTATION', '0') == '1'
+INSTRUMENTATION_SLOW_MS = int(os.environ.get('INSTRUMENTATION_SLOW_MS', 500))
+INSTRUMENTATION_MAX_QUERIES = int(os.environ.get('INSTRUMENTATION_MAX_QUERIES', 50))
+if INSTRUMENTATION:
+    MIDDLEWARE.insert(0, 'DjangoProject.instrumentation.InstrumentationMiddleware')
+    TEMPLATES[0].update(BACKEND='DjangoProject.instrumentation.DjangoTemplates', NAME='django')
+
+# Importaciones/exportaciones en segundo plano (characters/jobs.py)
+JOBS_ROOT = BASE_DIR / 'jobs'
+JOBS_MAX_WORKERS = 2
+# Un trabajo pendiente o en curso sin señales de su proceso en JOBS_STALE_AFTER segundos se da
+# por fallido; los archivos de los terminados se borran tras JOBS_RESULT_TTL segundos
+# (manage.py cleanup_jobs).
+JOBS_STALE_AFTER = int(os.environ.get('JOBS_STALE_AFTER', 15 * 60))
+JOBS_RESULT_TTL = int(os.environ.get('JOBS_RESULT_TTL', 7 * 24 * 3600))
+
+# Días que se guardan los borrados para las exportaciones incrementales (?since=); un cursor
+# más antiguo que los borrados conservados recibe un 410 y debe hacer una exportación completa
+# (manage.py prune_tombstones).
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TOMBSTONE_RETENTION_DAYS', 30))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,80 @@
+"""
+Perfil de producción: DJANGO_SETTINGS_MODULE=DjangoProject.settings_production.
+
+Parte de DjangoProject/settings.py (base de datos, cachés, vistas async...) y
+cambia lo que no debe llegar a producción. Todo se lee del entorno:
+
+    DJANGO_SECRET_KEY            obligatoria
+    DJANGO_ALLOWED_HOSTS         obligatoria, separada por comas (p. ej. "juego.example.com")
+    DJANGO_CSRF_TRUSTED_ORIGINS  opcional, separada por comas (p. ej. "https://juego.example.com")
+    DJANGO_STATIC_ROOT           destino de collectstatic (por defecto BASE_DIR/staticfiles)
+    DJANGO_HTTPS                 1 (por defecto): cookies de sesión y CSRF solo por HTTPS
+    DJANGO_HSTS_SECONDS          cabecera Strict-Transport-Security (por defecto 0: sin ella)
+    DJANGO_LOG_LEVEL             nivel del log por consola (por defecto WARNING)
+
+Al desplegar hay que ejecutar "python manage.py collectstatic --noinput": con
+ManifestStaticFilesStorage una plantilla que pida un estático sin entrada en el
+manifiesto falla. El tiempo de arranque y la memoria de un worker se miden con
+"python manage.py benchmark_startup".
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, TEMPLATES
+
+
+def env_list(name):
+    return [value.strip() for value in os.environ.get(name, '').split(',') if value.strip()]
+
+
+# Con DEBUG cada consulta SQL queda guardada en connection.queries
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', '')
+if not SECRET_KEY:
+    raise ImproperlyConfigured("DJANGO_SECRET_KEY es obligatoria en producción.")
+
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS')
+if not ALLOWED_HOSTS:
+    raise ImproperlyConfigured("DJANGO_ALLOWED_HOSTS es obligatoria en producción (hosts separados por comas).")
+CSRF_TRUSTED_ORIGINS = env_list('DJANGO_CSRF_TRUSTED_ORIGINS')
+
+# Cada plantilla se compila una vez por proceso; sin el context processor de depuración
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,  # Los loaders se indican explícitamente
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'context_processors': [
+            processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+            if processor != 'django.template.context_processors.debug'
+        ],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+
+# Estáticos con hash en el nombre (caché larga en el navegador), servidos por el proxy
+STATIC_ROOT = os.environ.get('DJANGO_STATIC_ROOT', BASE_DIR / 'staticfiles')
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'},
+}
+
+HTTPS = os.environ.get('DJANGO_HTTPS', '1') == '1'
+SESSION_COOKIE_SECURE = HTTPS
+CSRF_COOKIE_SECURE = HTTPS
+SECURE_HSTS_SECONDS = int(os.environ.get('DJANGO_HSTS_SECONDS', 0))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler'}},
+    'root': {'handlers': ['console'], 'level': os.environ.get('DJANGO_LOG_LEVEL', 'WARNING')},
+}
@@ -1,13 +1,40 @@
 # DjangoProject/urls.py
 
-from django.contrib import admin
 from django.urls import path, include
+from django.urls.resolvers import RoutePattern, URLResolver
 from users.views import home_view # Importa la vista home_view de tu aplicación 'users'
 from django.contrib.auth import views as auth_views # Importar las vistas de autenticación de Django
+from . import instrumentation
+
+
+class LazyURLResolver(URLResolver):
+    """
+    URLResolver que no importa su URLconf hasta que se usa una URL de su namespace.
+
+    Sobrescribe URLResolver._populate, que es API privada de Django: los tests de
+    LazyAdminTests fijan el comportamiento (inversión y resolución de 'admin:...',
+    import_export sin cargar hasta entonces) y fallan si una versión nueva lo cambia.
+    """
+
+    def _populate(self):
+        # El resolver raíz llama a esto al invertir cualquier URL; 'admin:...' y las
+        # rutas bajo el prefijo pasan por url_patterns, que es lo que importa el módulo.
+        if 'urlconf_module' in self.__dict__:
+            super()._populate()
+
+
+def lazy_include(route, urlconf_name, namespace):
+    """
+    Como path(route, include(urlconf_name)), pero el módulo se importa al resolver
+    o invertir la primera URL de ese namespace, no al cargar esta URLconf.
+    """
+    return LazyURLResolver(RoutePattern(route, is_endpoint=False), urlconf_name,
+                           app_name=namespace, namespace=namespace)
+
 
 urlpatterns = [
-    # Panel de administración de Django
-    path('admin/', admin.site.urls),
+    # Panel de administración de Django (se carga al primer uso: DjangoProject/admin_urls.py)
+    lazy_include('admin/', 'DjangoProject.admin_urls', 'admin'),
 
     # URLs de autenticación de Django PERSONALIZADAS para usar tus plantillas
     # Login: usa la LoginView de Django y le indica que use 'registration/login.html'
@@ -26,6 +53,9 @@ urlpatterns = [
     path('', home_view, name='home'),
     path('home/', home_view, name='home'),
 
+    # Estadísticas de la instrumentación (solo staff; se activa con INSTRUMENTATION=1)
+    path('instrumentation/', instrumentation.stats_view, name='instrumentation'),
+
     # Incluye las URLs de tu aplicación 'characters'
     # ¡Asegúrate de que 'characters/urls.py' tenga 'app_name = "characters"'!
     path('characters/', include('characters.urls', namespace='characters')),
@@ -1,3 +1,14 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Battle, CharacterStats
+
+
+@admin.register(Battle)
+class BattleAdmin(admin.ModelAdmin):
+    list_display = ('character_name', 'enemy_name', 'winner', 'turns', 'created_at')
+    list_filter = ('winner', 'character_kind')
+
+
+@admin.register(CharacterStats)
+class CharacterStatsAdmin(admin.ModelAdmin):
+    list_display = ('name', 'character_kind', 'battles', 'wins', 'losses', 'draws', 'damage_dealt')
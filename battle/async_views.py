@@ -0,0 +1,63 @@
+# battle/async_views.py
+"""
+Versión async de battle_fight, enrutada en lugar de la síncrona cuando
+ASYNC_VIEWS está activo (DjangoProject/asgi.py lo activa).
+
+El personaje y los ítems se leen con el ORM async (aget, aiterator). El
+formulario se valida y la batalla se guarda en un hilo: ModelChoiceField
+valida con consultas síncronas y el ORM async no tiene transacciones.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.views.decorators.http import require_POST
+
+from . import engine, records
+from .forms import BattleForm
+from .views import BUILDERS, CHARACTER_FIELDS, ENEMY_FIELDS, ITEM_FIELDS
+
+
+def _validated_form(data, user):
+    form = BattleForm(data, user=user)
+    form.is_valid()
+    return form
+
+
+@login_required
+@require_POST
+async def battle_fight(request):
+    """Igual que battle.views.battle_fight, sin ocupar un hilo mientras espera a la base de datos."""
+    request.user = await request.auser()  # Las plantillas lo leen sin consultar
+    wants_json = request.GET.get('format') == 'json'
+    form = await sync_to_async(_validated_form)(request.POST, request.user)
+    if form.errors:
+        if wants_json:
+            return JsonResponse({'errors': form.errors}, status=400)
+        # El formulario consulta los enemigos e ítems al pintarse
+        return await sync_to_async(render)(request, 'battle/battle_home.html', {'form': form}, status=400)
+
+    kind, character_pk = form.cleaned_data['character']
+    model, fields = CHARACTER_FIELDS[kind]
+    character_values = await model.objects.values(*fields).aget(pk=character_pk)
+    enemy_values = {field: getattr(form.cleaned_data['enemy'], field) for field in ENEMY_FIELDS}
+    items = [item async for item in form.cleaned_data['items'].values(*ITEM_FIELDS).aiterator()]
+
+    character = BUILDERS[kind](character_values, items)
+    enemy = engine.build_enemy(enemy_values)
+    result = engine.simulate(character, enemy, seed=form.cleaned_data['seed'])
+    battle = await sync_to_async(records.record_battle)(
+        kind, character_pk, form.cleaned_data['enemy'].pk, character, enemy, result,
+        seed=form.cleaned_data['seed'], user=request.user,
+    )
+
+    if wants_json:
+        return JsonResponse({'battle_id': battle.pk, **result.as_dict()})
+    return render(request, 'battle/battle_arena.html', {
+        'battle': battle,
+        'character': character,
+        'enemy': enemy,
+        'result': result,
+        'log': [engine.describe_event(event) for event in result.events],
+        'stats': await records.acharacter_stats(kind, character_pk),
+    })
@@ -0,0 +1,187 @@
+# battle/batch.py
+"""
+Simulación masiva y vectorizada para equilibrar el juego (requiere NumPy).
+
+Carga las estadísticas de todos los Guerreros, Magos y Enemigos en arrays una
+sola vez y simula ``fights`` batallas por cada pareja personaje/enemigo,
+avanzando todas las batallas a la vez turno a turno. Aplica las mismas reglas
+que ``battle.engine.simulate`` sin ítems (estadísticas base), con otro
+generador aleatorio: los resultados coinciden en distribución, no batalla a
+batalla.
+"""
+import numpy as np
+
+from characters.models import Enemy, Mage, Warrior
+from .engine import MAX_TURNS, SPELL_COST, VARIANCE, Combatant
+
+# Batallas simuladas por bloque, para acotar la memoria (unos 100 MB por bloque)
+BLOCK_SIZE = 1_000_000
+
+
+class Roster:
+    """Estadísticas de los combatientes en arrays paralelos."""
+
+    def __init__(self, names, kinds, health, attack, defense, mana):
+        self.names = names
+        self.kinds = kinds
+        self.health = np.asarray(health, dtype=np.int32)
+        self.attack = np.asarray(attack, dtype=np.int32)
+        self.defense = np.asarray(defense, dtype=np.int32)
+        self.mana = np.asarray(mana, dtype=np.int32)
+        self.is_mage = np.array([kind == 'mage' for kind in kinds], dtype=bool)
+
+    def __len__(self):
+        return len(self.names)
+
+    def subset(self, indices):
+        indices = list(indices)
+        return Roster(
+            [self.names[i] for i in indices], [self.kinds[i] for i in indices],
+            self.health[indices], self.attack[indices], self.defense[indices], self.mana[indices],
+        )
+
+    def combatant(self, index):
+        """``battle.engine.Combatant`` equivalente, para el motor escalar."""
+        return Combatant(
+            self.names[index], self.kinds[index], int(self.health[index]), int(self.attack[index]),
+            int(self.defense[index]), int(self.mana[index]),
+        )
+
+
+def load_characters():
+    """Todos los Guerreros y Magos, leídos con values_list (una consulta por tabla)."""
+    rows = [
+        (name, 'warrior', health, damage, defense, 0)
+        for name, health, damage, defense in Warrior.objects.values_list('name', 'health', 'damage', 'defense')
+    ] + [
+        (name, 'mage', health, magic_damage, defense, mana)
+        for name, health, magic_damage, defense, mana
+        in Mage.objects.values_list('name', 'health', 'magic_damage', 'defense', 'mana')
+    ]
+    return Roster(*zip(*rows)) if rows else Roster([], [], [], [], [], [])
+
+
+def load_enemies():
+    rows = [
+        (name, 'enemy', health, attack, defense, 0)
+        for name, health, attack, defense in Enemy.objects.values_list('name', 'health', 'attack', 'defense')
+    ]
+    return Roster(*zip(*rows)) if rows else Roster([], [], [], [], [], [])
+
+
+def simulate_block(c_health, c_attack, c_defense, c_mana, is_mage, e_health, e_attack, e_defense,
+                   rng, max_turns=MAX_TURNS):
+    """
+    Simula en paralelo las batallas descritas por los arrays (uno por batalla).
+
+    Devuelve ``(winner, turns, dealt, taken)``: ``winner`` vale 1 si gana el
+    personaje, -1 si gana el enemigo y 0 en empate.
+
+    Las batallas terminadas se retiran de los arrays de trabajo en cada turno,
+    así las batallas largas no arrastran el coste de todo el bloque.
+    """
+    size = len(c_health)
+    winner = np.zeros(size, dtype=np.int8)
+    turns = np.full(size, max_turns, dtype=np.int16)
+    dealt = np.zeros(size, dtype=np.int32)
+    taken = np.zeros(size, dtype=np.int32)
+    low, spread = 1 - VARIANCE, 2 * VARIANCE
+
+    # Estado de las batallas activas; ``index`` apunta a su posición en el resultado
+    index = np.arange(size)
+    c_health, c_mana, e_health = c_health.astype(np.int32), c_mana.astype(np.int32), e_health.astype(np.int32)
+    state = [c_health, c_attack, c_defense, c_mana, is_mage, e_health, e_attack, e_defense,
+             np.zeros(size, dtype=np.int32), np.zeros(size, dtype=np.int32)]
+
+    for turn in range(1, max_turns + 1):
+        c_health, c_attack, c_defense, c_mana, is_mage, e_health, e_attack, e_defense, b_dealt, b_taken = state
+        n = len(index)
+
+        # Turno del personaje
+        base = (c_attack * (low + spread * rng.random(n))).astype(np.int32)
+        spell = is_mage & (c_mana >= SPELL_COST)
+        damage = np.where(spell, base - e_defense // 2,
+                          np.where(is_mage, base // 3 - e_defense, base - e_defense))
+        damage = np.minimum(np.maximum(damage, 1), e_health)
+        c_mana -= SPELL_COST * spell
+        e_health -= damage
+        b_dealt += damage
+        won = e_health <= 0
+
+        # Turno del enemigo (solo quien sigue vivo)
+        base = (e_attack * (low + spread * rng.random(n))).astype(np.int32)
+        damage = np.minimum(np.maximum(base - c_defense, 1), c_health) * ~won
+        c_health -= damage
+        b_taken += damage
+        lost = c_health <= 0
+
+        finished = won | lost
+        if finished.any():
+            done = index[finished]
+            winner[done] = np.where(won[finished], 1, -1)
+            turns[done] = turn
+            dealt[done] = b_dealt[finished]
+            taken[done] = b_taken[finished]
+            keep = ~finished
+            index = index[keep]
+            state = [array[keep] for array in state]
+            if not len(index):
+                break
+
+    # Empates: las que siguen activas tras max_turns
+    if len(index):
+        dealt[index] = state[8]
+        taken[index] = state[9]
+    return winner, turns, dealt, taken
+
+
+def sweep(characters, enemies, fights=1000, seed=None, block_size=BLOCK_SIZE):
+    """
+    Simula ``fights`` batallas por cada pareja (personaje, enemigo).
+
+    Devuelve una lista de dicts por pareja con tasa de victorias, empates,
+    turnos medios y la distribución del daño causado y recibido.
+    """
+    rng = np.random.default_rng(seed)
+    pairs = len(characters) * len(enemies)
+    pairs_per_block = max(1, block_size // fights)
+    results = []
+
+    for start in range(0, pairs, pairs_per_block):
+        pair_index = np.arange(start, min(start + pairs_per_block, pairs))
+        ci = np.repeat(pair_index // len(enemies), fights)
+        ei = np.repeat(pair_index % len(enemies), fights)
+        winner, turns, dealt, taken = simulate_block(
+            characters.health[ci], characters.attack[ci], characters.defense[ci],
+            characters.mana[ci], characters.is_mage[ci],
+            enemies.health[ei], enemies.attack[ei], enemies.defense[ei], rng,
+        )
+        shape = (len(pair_index), fights)
+        winner, turns = winner.reshape(shape), turns.reshape(shape)
+        dealt, taken = dealt.reshape(shape), taken.reshape(shape)
+        win_rate = (winner == 1).mean(axis=1)
+        draw_rate = (winner == 0).mean(axis=1)
+        mean_turns = turns.mean(axis=1)
+        dealt_pct = np.percentile(dealt, [10, 50, 90], axis=1)
+        taken_pct = np.percentile(taken, [10, 50, 90], axis=1)
+
+        for row, pair in enumerate(pair_index):
+            c, e = divmod(int(pair), len(enemies))
+            results.append({
+                'character': characters.names[c],
+                'character_kind': characters.kinds[c],
+                'enemy': enemies.names[e],
+                'fights': fights,
+                'win_rate': float(win_rate[row]),
+                'draw_rate': float(draw_rate[row]),
+                'mean_turns': float(mean_turns[row]),
+                'damage_dealt': {
+                    'mean': float(dealt[row].mean()), 'std': float(dealt[row].std()),
+                    'p10': float(dealt_pct[0, row]), 'p50': float(dealt_pct[1, row]), 'p90': float(dealt_pct[2, row]),
+                },
+                'damage_taken': {
+                    'mean': float(taken[row].mean()), 'std': float(taken[row].std()),
+                    'p10': float(taken_pct[0, row]), 'p50': float(taken_pct[1, row]), 'p90': float(taken_pct[2, row]),
+                },
+            })
+    return results
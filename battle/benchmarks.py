@@ -0,0 +1,48 @@
+# battle/benchmarks.py
+"""
+Escenario ``battle`` de las pruebas de rendimiento (characters.benchmarks):
+la portada con su formulario, la vista de combate, el ranking y el motor de
+combate solo.
+"""
+from django.urls import reverse
+
+from characters.benchmarks import REQUESTS, scenario
+from characters.models import Enemy, Item, Warrior
+from . import engine
+from .views import ENEMY_FIELDS, ITEM_FIELDS
+
+SIMULATIONS = 1000  # Batallas por ejecución del motor
+
+
+@scenario('battle')
+def battle(suite):
+    data = suite.data
+    client = suite.client(data.player)
+    warrior = Warrior.objects.filter(owner=data.player).values_list('pk', flat=True).first()
+    url = reverse('battle:battle_fight') + '?format=json'
+
+    def fight():
+        for seed in range(REQUESTS):
+            response = client.post(url, {
+                'character': f'warrior:{warrior}',
+                'enemy': data.enemies[seed % len(data.enemies)],
+                'items': data.items[:3],
+                'seed': seed,
+            })
+            if response.status_code != 200:
+                raise AssertionError(f"POST {url}: {response.status_code} {response.content[:200]!r}")
+    suite.measure('battle.fight', fight, REQUESTS, unit='requests', queries_per_unit=True)
+    suite.get_pages('battle.home', data.player, reverse('battle:battle_home'))
+    suite.get_pages('battle.leaderboard', data.player, reverse('battle:battle_leaderboard'))
+
+    # El motor sin base de datos: mismas estadísticas que lee la vista
+    character = engine.build_warrior(
+        Warrior.objects.values('name', 'health', 'defense', 'damage').get(pk=warrior),
+        Item.objects.filter(pk__in=data.items[:3]).values(*ITEM_FIELDS),
+    )
+    enemies = [engine.build_enemy(values) for values in Enemy.objects.filter(pk__in=data.enemies).values(*ENEMY_FIELDS)]
+
+    def simulate():
+        for seed in range(SIMULATIONS):
+            engine.simulate(character, enemies[seed % len(enemies)], seed=seed, record=False)
+    suite.measure('battle.simulate', simulate, SIMULATIONS, unit='battles')
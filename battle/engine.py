@@ -0,0 +1,200 @@
+# battle/engine.py
+"""
+Motor de combate por turnos.
+
+El estado de cada combatiente vive en objetos ``Combatant`` con ``__slots__``
+construidos a partir de diccionarios de ``.values()`` (sin instancias del ORM),
+así un proceso puede resolver miles de batallas por segundo. Las batallas son
+deterministas para una misma semilla.
+
+Reglas:
+  * El personaje (Guerrero o Mago) actúa primero; luego se alternan los turnos
+    hasta que uno llega a 0 de vida o se alcanza ``MAX_TURNS`` (empate).
+  * Daño = ataque * variación (±15 %) - defensa del objetivo, mínimo 1.
+  * Guerrero: ataca con ``damage`` + ``damage_buff`` de su espada.
+  * Mago: lanza hechizos con ``magic_damage`` + ``damage_buff`` de su bastón;
+    cada hechizo cuesta ``SPELL_COST`` de maná e ignora la mitad de la defensa.
+    Sin maná golpea con el bastón (un tercio del daño mágico).
+  * Pociones de vida: se beben (gastando el turno) al bajar de
+    ``HEAL_THRESHOLD`` de la vida máxima. Pociones de maná: cuando el maná no
+    alcanza para un hechizo.
+"""
+import random
+
+MAX_TURNS = 200
+SPELL_COST = 10
+HEAL_THRESHOLD = 0.3
+VARIANCE = 0.15
+
+CHARACTER = 'character'
+ENEMY = 'enemy'
+
+# Acciones registradas en el log
+ATTACK = 'attack'
+SPELL = 'spell'
+HEAL = 'heal'
+MANA = 'mana'
+
+WEAPON_FOR_KIND = {'warrior': 'SWORD', 'mage': 'STAFF'}
+
+
+class Combatant:
+    """Estado compacto de un combatiente."""
+    __slots__ = (
+        'name', 'kind', 'health', 'max_health', 'attack', 'defense',
+        'mana', 'health_potions', 'mana_potions',
+    )
+
+    def __init__(self, name, kind, health, attack, defense, mana=0,
+                 health_potions=(), mana_potions=()):
+        self.name = name
+        self.kind = kind
+        self.health = health
+        self.max_health = health
+        self.attack = attack
+        self.defense = defense
+        self.mana = mana
+        # Tuplas con la cantidad que restaura cada poción, en orden de uso
+        self.health_potions = tuple(health_potions)
+        self.mana_potions = tuple(mana_potions)
+
+    def __repr__(self):
+        return f"<Combatant {self.kind} {self.name!r} hp={self.health}>"
+
+
+def build_warrior(values, items=()):
+    """``values`` es un dict de ``Warrior.objects.values()``; ``items`` dicts de ``Item``."""
+    return _build_character('warrior', values['name'], values['health'], values['damage'],
+                            values['defense'], 0, items)
+
+
+def build_mage(values, items=()):
+    return _build_character('mage', values['name'], values['health'], values['magic_damage'],
+                            values['defense'], values['mana'], items)
+
+
+def build_enemy(values):
+    return Combatant(values['name'], 'enemy', values['health'], values['attack'], values['defense'])
+
+
+def _build_character(kind, name, health, attack, defense, mana, items):
+    weapon_type = WEAPON_FOR_KIND[kind]
+    health_potions = []
+    mana_potions = []
+    for item in items:
+        if item['item_type'] == weapon_type:
+            attack += item.get('damage_buff') or 0
+        elif item['item_type'] == 'HEALTH_POTION' and item.get('health_restore'):
+            health_potions.append(item['health_restore'])
+        elif item['item_type'] == 'MANA_POTION' and item.get('mana_restore') and kind == 'mage':
+            mana_potions.append(item['mana_restore'])
+    return Combatant(name, kind, health, attack, defense, mana, health_potions, mana_potions)
+
+
+class BattleResult:
+    """Resultado de una batalla. ``events`` es None si no se pidió el log."""
+    __slots__ = ('winner', 'turns', 'damage_dealt', 'damage_taken', 'character_health', 'enemy_health', 'events')
+
+    def __init__(self, winner, turns, damage_dealt, damage_taken, character_health, enemy_health, events):
+        self.winner = winner
+        self.turns = turns
+        self.damage_dealt = damage_dealt
+        self.damage_taken = damage_taken
+        self.character_health = character_health
+        self.enemy_health = enemy_health
+        self.events = events
+
+    def as_dict(self):
+        return {
+            'winner': self.winner,
+            'turns': self.turns,
+            'damage_dealt': self.damage_dealt,
+            'damage_taken': self.damage_taken,
+            'character_health': self.character_health,
+            'enemy_health': self.enemy_health,
+            'events': [
+                {'turn': turn, 'actor': actor, 'action': action, 'amount': amount, 'target_health': target_health}
+                for turn, actor, action, amount, target_health in self.events or ()
+            ],
+        }
+
+
+def simulate(character, enemy, seed=None, max_turns=MAX_TURNS, record=True):
+    """
+    Simula una batalla entre ``character`` y ``enemy`` (``Combatant``).
+
+    No modifica los combatientes recibidos, de modo que pueden reutilizarse
+    en muchas batallas. Con ``record=False`` no se construye el log de eventos.
+    """
+    rng = random.Random(seed)
+    roll = rng.random
+    events = [] if record else None
+
+    # Estado local en variables: es el bucle caliente de las simulaciones masivas
+    c_health, c_max, c_attack, c_defense = character.health, character.max_health, character.attack, character.defense
+    c_mana = character.mana
+    is_mage = character.kind == 'mage'
+    health_potions = list(character.health_potions)
+    mana_potions = list(character.mana_potions)
+    e_health, e_attack, e_defense = enemy.health, enemy.attack, enemy.defense
+    heal_below = c_max * HEAL_THRESHOLD
+    dealt = taken = 0
+    winner = None
+    turn = 0
+
+    while turn < max_turns:
+        turn += 1
+        # Turno del personaje
+        if c_health <= heal_below and health_potions:
+            restored = min(health_potions.pop(0), c_max - c_health)
+            c_health += restored
+            if record:
+                events.append((turn, character.name, HEAL, restored, c_health))
+        elif is_mage and c_mana < SPELL_COST and mana_potions:
+            c_mana += mana_potions.pop(0)
+            if record:
+                events.append((turn, character.name, MANA, c_mana, c_health))
+        else:
+            variance = 1 - VARIANCE + 2 * VARIANCE * roll()
+            if is_mage and c_mana >= SPELL_COST:
+                c_mana -= SPELL_COST
+                damage = max(1, int(c_attack * variance) - e_defense // 2)
+                action = SPELL
+            elif is_mage:
+                damage = max(1, int(c_attack * variance) // 3 - e_defense)
+                action = ATTACK
+            else:
+                damage = max(1, int(c_attack * variance) - e_defense)
+                action = ATTACK
+            damage = min(damage, e_health)
+            e_health -= damage
+            dealt += damage
+            if record:
+                events.append((turn, character.name, action, damage, e_health))
+            if e_health <= 0:
+                winner = CHARACTER
+                break
+
+        # Turno del enemigo
+        variance = 1 - VARIANCE + 2 * VARIANCE * roll()
+        damage = min(max(1, int(e_attack * variance) - c_defense), c_health)
+        c_health -= damage
+        taken += damage
+        if record:
+            events.append((turn, enemy.name, ATTACK, damage, c_health))
+        if c_health <= 0:
+            winner = ENEMY
+            break
+
+    return BattleResult(winner, turn, dealt, taken, c_health, e_health, events)
+
+
+def describe_event(event):
+    """Texto legible de un evento ``(turno, actor, acción, cantidad, vida del objetivo)``."""
+    turn, actor, action, amount, target_health = event
+    if action == HEAL:
+        return f"Turno {turn}: {actor} bebe una poción de vida y recupera {amount} (vida: {target_health})."
+    if action == MANA:
+        return f"Turno {turn}: {actor} bebe una poción de maná (maná: {amount})."
+    verb = 'lanza un hechizo' if action == SPELL else 'ataca'
+    return f"Turno {turn}: {actor} {verb} y causa {amount} de daño (vida restante del rival: {target_health})."
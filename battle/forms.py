@@ -0,0 +1,79 @@
+# battle/forms.py
+from django import forms
+
+from characters.models import Enemy, Item, Mage, Warrior
+
+PICKER_LIMIT = 50  # Opciones por desplegable; el resto se elige por su id (por ejemplo con ?format=json)
+CHARACTER_MODELS = {'warrior': Warrior, 'mage': Mage}
+
+
+def is_pk(value):
+    # Solo cifras ASCII: isdigit() también acepta '²', que int() y el ORM rechazan
+    return value.isascii() and value.isdigit()
+
+
+class BattleForm(forms.Form):
+    """
+    Elige personaje, enemigo e ítems para una batalla.
+
+    Validar cuesta lo mismo con cualquier cantidad de filas: el personaje se
+    comprueba con una sola consulta filtrada por dueño y el enemigo y los ítems
+    con la de su ModelChoiceField. Los desplegables solo listan las primeras
+    ``PICKER_LIMIT`` filas por nombre, más las ya elegidas.
+    """
+    character = forms.CharField(label="Personaje", widget=forms.Select)
+    enemy = forms.ModelChoiceField(queryset=Enemy.objects.all(), label="Enemigo")
+    items = forms.ModelMultipleChoiceField(queryset=Item.objects.all(), required=False, label="Ítems")
+    seed = forms.IntegerField(required=False, label="Semilla (opcional)",
+                              help_text="La misma semilla repite exactamente la misma batalla.")
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        # Con un callable, Django calcula las opciones al pintar el desplegable y no al crear el formulario
+        self.fields['character'].widget.choices = self.character_choices
+        self.fields['enemy'].widget.choices = (
+            lambda: [('', self.fields['enemy'].empty_label)] + self.model_choices(Enemy, 'enemy')
+        )
+        self.fields['items'].widget.choices = lambda: self.model_choices(Item, 'items')
+
+    def character_queryset(self, model):
+        # Los usuarios normales solo luchan con sus personajes; los admins con cualquiera
+        queryset = model.objects.all()
+        if self.user is not None and not self.user.is_staff:
+            queryset = queryset.filter(owner=self.user)
+        return queryset
+
+    def selected(self, name):
+        if not self.is_bound:
+            return []
+        return self.data.getlist(name) if hasattr(self.data, 'getlist') else [self.data.get(name)]
+
+    def model_choices(self, model, name):
+        pks = [value for value in self.selected(name) if is_pk(str(value))]
+        return self.first_rows(model.objects.all(), pks, lambda pk, label: (pk, label))
+
+    def character_choices(self):
+        choices = []
+        selected = [str(value).partition(':') for value in self.selected('character')]
+        for kind, label in (('warrior', 'Guerrero'), ('mage', 'Mago')):
+            pks = [pk for value_kind, _, pk in selected if value_kind == kind and is_pk(pk)]
+            choices += self.first_rows(self.character_queryset(CHARACTER_MODELS[kind]), pks,
+                                       lambda pk, name: (f'{kind}:{pk}', f'{label}: {name}'))
+        return choices
+
+    def first_rows(self, queryset, selected_pks, choice):
+        rows = list(queryset.order_by('name', 'pk').values_list('pk', 'name')[:PICKER_LIMIT])
+        listed = {pk for pk, _ in rows}
+        missing = [pk for pk in map(int, selected_pks) if pk not in listed]
+        if missing:
+            rows += queryset.filter(pk__in=missing).values_list('pk', 'name')
+        return [choice(pk, name) for pk, name in rows]
+
+    def clean_character(self):
+        kind, _, pk = self.cleaned_data['character'].partition(':')
+        if kind not in CHARACTER_MODELS or not is_pk(pk):
+            raise forms.ValidationError("Elige un personaje válido.", code='invalid_choice')
+        if not self.character_queryset(CHARACTER_MODELS[kind]).filter(pk=pk).exists():
+            raise forms.ValidationError("Ese personaje no existe o no es tuyo.", code='invalid_choice')
+        return kind, int(pk)
@@ -0,0 +1,90 @@
+# battle/management/commands/balance_sweep.py
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from battle import engine
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula N batallas por cada pareja Guerrero/Mago contra Enemigo con el "
+        "simulador vectorizado (NumPy) e informa tasa de victorias, turnos medios "
+        "y distribución del daño."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fights', type=int, default=1000, help="Batallas por pareja.")
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', help="Guarda los resultados por pareja en este archivo JSON.")
+        parser.add_argument('--benchmark', type=int, default=0, metavar='PAIRS',
+                            help="Compara parejas/s con el motor escalar (battle.engine) sobre PAIRS parejas.")
+
+    def handle(self, *args, **options):
+        try:
+            from battle import batch
+        except ImportError:
+            raise CommandError("balance_sweep necesita NumPy: pip install numpy")
+
+        characters = batch.load_characters()
+        enemies = batch.load_enemies()
+        pairs = len(characters) * len(enemies)
+        if not pairs:
+            raise CommandError("Hacen falta personajes y enemigos en la base de datos.")
+        fights = options['fights']
+
+        start = time.perf_counter()
+        results = batch.sweep(characters, enemies, fights=fights, seed=options['seed'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{pairs} parejas x {fights} batallas en {elapsed:.2f}s "
+            f"({pairs / elapsed:,.1f} parejas/s, {pairs * fights / elapsed:,.0f} batallas/s)"
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, indent=4, ensure_ascii=False)
+            self.stdout.write(f"Resultados guardados en {options['output']}")
+        else:
+            for row in sorted(results, key=lambda row: row['win_rate'])[:10]:
+                self.stdout.write(
+                    f"  {row['character']} vs {row['enemy']}: gana {row['win_rate']:.1%}, "
+                    f"{row['mean_turns']:.1f} turnos, daño p50 {row['damage_dealt']['p50']:.0f}"
+                )
+
+        if options['benchmark']:
+            self.benchmark(batch, characters, enemies, options['benchmark'], fights, options['seed'])
+
+    def benchmark(self, batch, characters, enemies, pair_count, fights, seed):
+        # Mismas parejas para los dos motores: los primeros personajes contra todos los enemigos
+        count = min(len(characters), -(-pair_count // len(enemies)))
+        characters = characters.subset(range(count))
+        pairs = count * len(enemies)
+        base_seed = seed or 0
+
+        start = time.perf_counter()
+        scalar_wins = []
+        for c in range(count):
+            character = characters.combatant(c)
+            for e in range(len(enemies)):
+                enemy = enemies.combatant(e)
+                wins = sum(
+                    engine.simulate(character, enemy, seed=base_seed + i, record=False).winner == engine.CHARACTER
+                    for i in range(fights)
+                )
+                scalar_wins.append(wins / fights)
+        scalar_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = batch.sweep(characters, enemies, fights=fights, seed=seed)
+        vector_elapsed = time.perf_counter() - start
+
+        gap = max(abs(wins - row['win_rate']) for wins, row in zip(scalar_wins, results))
+        self.stdout.write(
+            f"Benchmark ({pairs} parejas x {fights} batallas): "
+            f"escalar {pairs / scalar_elapsed:,.2f} parejas/s, "
+            f"vectorizado {pairs / vector_elapsed:,.2f} parejas/s "
+            f"(x{scalar_elapsed / vector_elapsed:,.1f}); "
+            f"máxima diferencia en tasa de victorias {gap:.3f}"
+        )
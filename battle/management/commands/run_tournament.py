@@ -0,0 +1,73 @@
+# battle/management/commands/run_tournament.py
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from battle import tournament
+
+
+class Command(BaseCommand):
+    help = (
+        "Juega un torneo (todos contra todos o eliminación directa) entre todos los "
+        "personajes y enemigos, repartiendo las batallas entre varios procesos. "
+        "Con la misma semilla la clasificación es idéntica con cualquier --workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['round-robin', 'bracket'], default='round-robin')
+        parser.add_argument('--fights', type=int, default=10,
+                            help="Batallas por enfrentamiento personaje/enemigo.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Procesos; 1 juega el torneo en este proceso.")
+        parser.add_argument('--gauntlet', type=int, default=3,
+                            help="Enemigos por cruce en eliminación directa.")
+        parser.add_argument('--output', help="Guarda la clasificación en este archivo JSON.")
+
+    def handle(self, *args, **options):
+        characters, enemies = tournament.load_participants()
+        if not characters or not enemies:
+            raise CommandError("Hacen falta personajes y enemigos en la base de datos.")
+        if options['workers'] < 1 or options['fights'] < 1:
+            raise CommandError("--workers y --fights deben ser al menos 1.")
+
+        start = time.perf_counter()
+        if options['mode'] == 'round-robin':
+            character_standings, enemy_standings = tournament.round_robin(
+                characters, enemies, fights=options['fights'], seed=options['seed'], workers=options['workers'],
+            )
+            battles = len(characters) * len(enemies) * options['fights']
+            result = {
+                'characters': [standing.as_dict() for standing in character_standings],
+                'enemies': [standing.as_dict() for standing in enemy_standings],
+            }
+        else:
+            rounds, champion = tournament.bracket(
+                characters, enemies, fights=options['fights'], seed=options['seed'],
+                workers=options['workers'], gauntlet_size=options['gauntlet'],
+            )
+            battles = sum(
+                2 * len(match['enemies']) * options['fights']
+                for matches in rounds for match in matches if match['b'] is not None
+            )
+            result = {'rounds': rounds, 'champion': champion.name}
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{battles} batallas con {options['workers']} procesos en {elapsed:.2f}s "
+            f"({battles / elapsed:,.0f} batallas/s)"
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(result, output, indent=4, ensure_ascii=False)
+            self.stdout.write(f"Resultados guardados en {options['output']}")
+        elif options['mode'] == 'round-robin':
+            for position, row in enumerate(result['characters'][:10], 1):
+                self.stdout.write(
+                    f"  {position}. {row['name']} ({row['kind']}): {row['points']} pts, "
+                    f"{row['wins']}V {row['draws']}E {row['losses']}D"
+                )
+        else:
+            self.stdout.write(f"Campeón: {result['champion']} ({len(rounds)} rondas)")
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('characters', '0003_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Battle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('character_kind', models.CharField(choices=[('warrior', 'Guerrero'), ('mage', 'Mago')], max_length=10)),
+                ('character_name', models.CharField(max_length=100)),
+                ('enemy_name', models.CharField(max_length=100)),
+                ('seed', models.BigIntegerField(blank=True, null=True)),
+                ('winner', models.CharField(choices=[('character', 'Personaje'), ('enemy', 'Enemigo'), ('draw', 'Empate')], max_length=10)),
+                ('turns', models.PositiveIntegerField()),
+                ('damage_dealt', models.PositiveIntegerField()),
+                ('damage_taken', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('enemy', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='battles', to='characters.enemy')),
+                ('fought_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='battles', to=settings.AUTH_USER_MODEL)),
+                ('mage', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='battles', to='characters.mage')),
+                ('warrior', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='battles', to='characters.warrior')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BattleEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('turn', models.PositiveIntegerField()),
+                ('actor', models.CharField(max_length=100)),
+                ('action', models.CharField(max_length=10)),
+                ('amount', models.IntegerField()),
+                ('target_health', models.IntegerField()),
+                ('battle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='battle.battle')),
+            ],
+            options={
+                'ordering': ['battle', 'pk'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CharacterStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('character_kind', models.CharField(choices=[('warrior', 'Guerrero'), ('mage', 'Mago')], max_length=10)),
+                ('name', models.CharField(max_length=100)),
+                ('battles', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+                ('damage_dealt', models.PositiveBigIntegerField(default=0)),
+                ('damage_taken', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('mage', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='characters.mage')),
+                ('warrior', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='characters.warrior')),
+            ],
+            options={
+                'ordering': ['-wins', 'name'],
+                'indexes': [models.Index(fields=['-wins', 'name'], name='battle_stats_leaderboard')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('mage__isnull', True), ('warrior__isnull', False)), models.Q(('mage__isnull', False), ('warrior__isnull', True)), _connector='OR'), name='battle_stats_one_character')],
+            },
+        ),
+    ]
@@ -1,3 +1,93 @@
+# battle/models.py
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class Battle(models.Model):
+    """Resultado de una batalla. Los nombres se copian para conservar el historial si se borra un combatiente."""
+    WINNERS = (
+        ('character', 'Personaje'),
+        ('enemy', 'Enemigo'),
+        ('draw', 'Empate'),
+    )
+    CHARACTER_KINDS = (
+        ('warrior', 'Guerrero'),
+        ('mage', 'Mago'),
+    )
+    character_kind = models.CharField(max_length=10, choices=CHARACTER_KINDS)
+    warrior = models.ForeignKey('characters.Warrior', on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='battles')
+    mage = models.ForeignKey('characters.Mage', on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='battles')
+    enemy = models.ForeignKey('characters.Enemy', on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='battles')
+    character_name = models.CharField(max_length=100)
+    enemy_name = models.CharField(max_length=100)
+    fought_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='battles')
+    seed = models.BigIntegerField(null=True, blank=True)
+    winner = models.CharField(max_length=10, choices=WINNERS)
+    turns = models.PositiveIntegerField()
+    damage_dealt = models.PositiveIntegerField()
+    damage_taken = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Batalla: {self.character_name} contra {self.enemy_name}"
+
+
+class BattleEvent(models.Model):
+    """Un turno del log de una batalla. Se insertan todos a la vez con bulk_create."""
+    battle = models.ForeignKey(Battle, on_delete=models.CASCADE, related_name='events')
+    turn = models.PositiveIntegerField()
+    actor = models.CharField(max_length=100)
+    action = models.CharField(max_length=10)
+    amount = models.IntegerField()
+    target_health = models.IntegerField()
+
+    class Meta:
+        # El pk sigue el orden de inserción, que es el orden de la batalla
+        ordering = ['battle', 'pk']
+
+
+class CharacterStats(models.Model):
+    """
+    Totales por personaje, actualizados en la misma transacción que cada
+    Battle: el ranking lee estas filas en vez de recorrer el historial.
+    """
+    character_kind = models.CharField(max_length=10, choices=Battle.CHARACTER_KINDS)
+    warrior = models.OneToOneField('characters.Warrior', on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name='stats')
+    mage = models.OneToOneField('characters.Mage', on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='stats')
+    name = models.CharField(max_length=100)
+    battles = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+    damage_dealt = models.PositiveBigIntegerField(default=0)
+    damage_taken = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-wins', 'name']
+        indexes = [
+            models.Index(fields=['-wins', 'name'], name='battle_stats_leaderboard'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(warrior__isnull=False, mage__isnull=True)
+                | models.Q(warrior__isnull=True, mage__isnull=False),
+                name='battle_stats_one_character',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Estadísticas: {self.name}"
+
+    @property
+    def win_rate(self):
+        return self.wins / self.battles if self.battles else 0.0
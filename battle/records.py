@@ -0,0 +1,79 @@
+# battle/records.py
+"""
+Persistencia de las batallas.
+
+Cada batalla se guarda en una transacción: la fila Battle, su log con un solo
+bulk_create y el incremento de los totales del personaje (CharacterStats) con
+expresiones F, así dos batallas simultáneas del mismo personaje no se pisan.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import engine
+from .models import Battle, BattleEvent, CharacterStats
+
+EVENT_BATCH_SIZE = 500
+
+
+def record_battle(kind, character_pk, enemy_pk, character, enemy, result, seed=None, user=None):
+    """
+    Guarda ``result`` (``engine.BattleResult``) de ``character`` (Guerrero o Mago
+    según ``kind``) contra ``enemy`` y actualiza sus totales. Devuelve la Battle.
+    """
+    winner = result.winner or 'draw'
+    with transaction.atomic():
+        battle = Battle.objects.create(
+            character_kind=kind,
+            warrior_id=character_pk if kind == 'warrior' else None,
+            mage_id=character_pk if kind == 'mage' else None,
+            enemy_id=enemy_pk,
+            character_name=character.name,
+            enemy_name=enemy.name,
+            fought_by=user,
+            seed=seed,
+            winner=winner,
+            turns=result.turns,
+            damage_dealt=result.damage_dealt,
+            damage_taken=result.damage_taken,
+        )
+        if result.events:
+            BattleEvent.objects.bulk_create(
+                [
+                    BattleEvent(battle=battle, turn=turn, actor=actor, action=action,
+                                amount=amount, target_health=target_health)
+                    for turn, actor, action, amount, target_health in result.events
+                ],
+                batch_size=EVENT_BATCH_SIZE,
+            )
+
+        stats, _ = CharacterStats.objects.get_or_create(
+            **{f'{kind}_id': character_pk},
+            defaults={'character_kind': kind, 'name': character.name},
+        )
+        CharacterStats.objects.filter(pk=stats.pk).update(
+            name=character.name,
+            battles=F('battles') + 1,
+            wins=F('wins') + (winner == engine.CHARACTER),
+            losses=F('losses') + (winner == engine.ENEMY),
+            draws=F('draws') + (winner == 'draw'),
+            damage_dealt=F('damage_dealt') + result.damage_dealt,
+            damage_taken=F('damage_taken') + result.damage_taken,
+            updated_at=timezone.now(),
+        )
+    return battle
+
+
+def leaderboard(limit=20):
+    """Los ``limit`` personajes con más victorias (recorre el índice, no el historial)."""
+    return CharacterStats.objects.order_by('-wins', 'name')[:limit]
+
+
+def character_stats(kind, character_pk):
+    """Totales de un personaje, o None si aún no ha luchado."""
+    return CharacterStats.objects.filter(**{f'{kind}_id': character_pk}).first()
+
+
+async def acharacter_stats(kind, character_pk):
+    """``character_stats`` para las vistas async."""
+    return await CharacterStats.objects.filter(**{f'{kind}_id': character_pk}).afirst()
@@ -1,3 +1,342 @@
-from django.test import TestCase
+import multiprocessing
+import random
+from importlib.util import find_spec
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from characters import benchmarks
+from characters.models import Enemy, Item, Mage, Warrior
+from . import benchmarks as battle_benchmarks  # noqa: F401 (registers the 'battle' scenario)
+from . import engine, records, tournament
+from .forms import PICKER_LIMIT
+from .models import Battle, CharacterStats
+
+
+class EngineTests(TestCase):
+    """The combat engine, without the database."""
+
+    def setUp(self):
+        self.warrior = engine.build_warrior({'name': 'Conan', 'health': 100, 'damage': 20, 'defense': 5})
+        self.enemy = engine.build_enemy({'name': 'Orco', 'health': 80, 'attack': 15, 'defense': 3})
+
+    def test_same_seed_same_battle(self):
+        first = engine.simulate(self.warrior, self.enemy, seed=7)
+        self.assertEqual(first.as_dict(), engine.simulate(self.warrior, self.enemy, seed=7).as_dict())
+        # Without the log, the same result
+        quiet = engine.simulate(self.warrior, self.enemy, seed=7, record=False)
+        self.assertIsNone(quiet.events)
+        self.assertEqual((quiet.winner, quiet.turns, quiet.damage_dealt), (first.winner, first.turns, first.damage_dealt))
+
+    def test_combatants_are_not_modified(self):
+        engine.simulate(self.warrior, self.enemy, seed=1)
+        self.assertEqual((self.warrior.health, self.enemy.health), (100, 80))
+
+    def test_damage_totals_match_health(self):
+        for seed in range(20):
+            result = engine.simulate(self.warrior, self.enemy, seed=seed)
+            self.assertEqual(result.damage_dealt, 80 - result.enemy_health)
+            self.assertEqual(result.damage_taken, 100 - result.character_health)
+            self.assertEqual(result.winner, engine.CHARACTER if result.enemy_health == 0 else engine.ENEMY)
+
+    def test_items(self):
+        mage = engine.build_mage({'name': 'Merlín', 'health': 60, 'magic_damage': 30, 'mana': 10, 'defense': 2}, [
+            {'item_type': 'STAFF', 'damage_buff': 5},
+            {'item_type': 'SWORD', 'damage_buff': 50},  # Warriors only
+            {'item_type': 'HEALTH_POTION', 'health_restore': 25},
+            {'item_type': 'MANA_POTION', 'mana_restore': 20},
+        ])
+        self.assertEqual((mage.attack, mage.health_potions, mage.mana_potions), (35, (25,), (20,)))
+        warrior = engine.build_warrior({'name': 'Conan', 'health': 100, 'damage': 20, 'defense': 5},
+                                       [{'item_type': 'SWORD', 'damage_buff': 4},
+                                        {'item_type': 'MANA_POTION', 'mana_restore': 20}])
+        self.assertEqual((warrior.attack, warrior.mana_potions), (24, ()))
+
+    def test_draw_after_max_turns(self):
+        # Every hit does the minimum (1) and nobody falls before the limit
+        wall = engine.build_enemy({'name': 'Muro', 'health': 1000, 'attack': 1, 'defense': 100})
+        result = engine.simulate(self.warrior, wall, seed=3, max_turns=10)
+        self.assertIsNone(result.winner)
+        self.assertEqual((result.turns, result.damage_dealt, result.damage_taken), (10, 10, 10))
+
+
+class ScalarRolls:
+    """Generator for battle.batch giving the same rolls as random.Random(seed) in the scalar engine."""
+
+    def __init__(self, seed):
+        self.roll = random.Random(seed).random
+
+    def random(self, size):
+        import numpy as np
+        return np.array([self.roll() for _ in range(size)])
+
+
+@skipUnless(find_spec('numpy'), "NumPy is not installed")
+class BatchSweepTests(SimpleTestCase):
+    """The vectorized simulation (battle.batch) applies the same rules as engine.simulate."""
+
+    def setUp(self):
+        from . import batch
+        self.batch = batch
+        self.characters = batch.Roster(['Conan', 'Merlín'], ['warrior', 'mage'], [100, 70], [20, 30], [5, 2], [0, 40])
+        # Even pairs: no win rate is 0 or 1
+        self.enemies = batch.Roster(['Orco', 'Troll'], ['enemy', 'enemy'], [100, 110], [25, 18], [3, 5], [0, 0])
+
+    def test_same_rolls_same_battle(self):
+        winners = {1: engine.CHARACTER, -1: engine.ENEMY, 0: None}
+        for c in range(len(self.characters)):
+            for e in range(len(self.enemies)):
+                for seed in range(25):
+                    with self.subTest(character=c, enemy=e, seed=seed):
+                        expected = engine.simulate(self.characters.combatant(c), self.enemies.combatant(e),
+                                                   seed=seed, record=False)
+                        ch, en = self.characters.subset([c]), self.enemies.subset([e])
+                        winner, turns, dealt, taken = self.batch.simulate_block(
+                            ch.health, ch.attack, ch.defense, ch.mana, ch.is_mage,
+                            en.health, en.attack, en.defense, ScalarRolls(seed),
+                        )
+                        self.assertEqual(
+                            (winners[int(winner[0])], int(turns[0]), int(dealt[0]), int(taken[0])),
+                            (expected.winner, expected.turns, expected.damage_dealt, expected.damage_taken),
+                        )
+
+    def test_win_rate_matches_scalar_engine(self):
+        fights = 2000
+        results = self.batch.sweep(self.characters, self.enemies, fights=fights, seed=42)
+        self.assertEqual(self.batch.sweep(self.characters, self.enemies, fights=fights, seed=42), results)
+        for row in results:
+            c = self.characters.names.index(row['character'])
+            e = self.enemies.names.index(row['enemy'])
+            character, enemy = self.characters.combatant(c), self.enemies.combatant(e)
+            wins = sum(engine.simulate(character, enemy, seed=seed, record=False).winner == engine.CHARACTER
+                       for seed in range(fights))
+            with self.subTest(character=row['character'], enemy=row['enemy']):
+                self.assertTrue(0 < wins < fights)
+                # Another random generator: they agree in distribution (about 3 standard deviations)
+                self.assertAlmostEqual(row['win_rate'], wins / fights, delta=0.05)
+
+
+class TournamentTests(SimpleTestCase):
+    """battle.tournament standings do not depend on the number of processes."""
+
+    def setUp(self):
+        self.characters = [
+            engine.build_warrior({'name': name, 'health': 90 + 7 * n, 'damage': 15 + 3 * n, 'defense': n})
+            for n, name in enumerate(['Conan', 'Xena', 'Sonja'])
+        ] + [
+            engine.build_mage({'name': name, 'health': 60 + 5 * n, 'magic_damage': 25 + 4 * n, 'mana': 30, 'defense': n})
+            for n, name in enumerate(['Merlín', 'Morgana'])
+        ]
+        self.enemies = [
+            engine.build_enemy({'name': name, 'health': 80 + 15 * n, 'attack': 14 + 2 * n, 'defense': 2 + n})
+            for n, name in enumerate(['Orco', 'Troll', 'Dragón', 'Goblin'])
+        ]
+
+    def as_dicts(self, standings):
+        return [[row.as_dict() for row in table] for table in standings]
+
+    def test_round_robin_same_with_any_workers(self):
+        single = tournament.round_robin(self.characters, self.enemies, fights=6, seed=5, workers=1)
+        parallel = tournament.round_robin(self.characters, self.enemies, fights=6, seed=5, workers=2)
+        self.assertEqual(self.as_dicts(parallel), self.as_dicts(single))
+        characters, enemies = single
+        self.assertEqual(sum(row.wins + row.losses + row.draws for row in characters), 5 * 4 * 6)
+        self.assertEqual(sum(row.wins for row in characters), sum(row.losses for row in enemies))
+        # Another seed, other battles
+        other = tournament.round_robin(self.characters, self.enemies, fights=6, seed=6, workers=1)
+        self.assertNotEqual(self.as_dicts(other), self.as_dicts(single))
+
+    def test_spawned_workers(self):
+        # A spawned worker is a fresh interpreter: it imports battle.tournament and sets Django up itself
+        single = tournament.round_robin(self.characters, self.enemies, fights=2, seed=5, workers=1)
+        spawned = tournament.round_robin(self.characters, self.enemies, fights=2, seed=5, workers=2,
+                                         mp_context=multiprocessing.get_context('spawn'))
+        self.assertEqual(self.as_dicts(spawned), self.as_dicts(single))
+
+    def test_bracket_same_with_any_workers(self):
+        rounds, champion = tournament.bracket(self.characters, self.enemies, fights=4, seed=5, workers=1)
+        parallel_rounds, parallel_champion = tournament.bracket(self.characters, self.enemies, fights=4, seed=5,
+                                                                workers=2)
+        self.assertEqual(parallel_rounds, rounds)
+        self.assertEqual(parallel_champion.name, champion.name)
+        # Five characters: 5 -> 3 -> 2 -> 1, with a bye in the odd rounds
+        self.assertEqual([len(matches) for matches in rounds], [3, 2, 1])
+        self.assertEqual(rounds[-1][0]['winner'], champion.name)
+
+
+class FightViewTests(TestCase):
+    """battle_fight validates the character with one query and saves the battle."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.player = User.objects.create_user(username='jugador')
+        cls.other = User.objects.create_user(username='otro')
+        cls.staff = User.objects.create_user(username='admin', is_staff=True)
+        cls.warrior = Warrior.objects.create(name='Conan', owner=cls.player, health=120, damage=25, defense=5)
+        cls.foreign = Mage.objects.create(name='Merlin', owner=cls.other)
+        cls.enemy = Enemy.objects.create(name='Orco', health=60, attack=10, defense=2)
+        cls.sword = Item.objects.create(name='Espada', item_type='SWORD', damage_buff=5)
+
+    def fight(self, user, character, **data):
+        self.client.force_login(user)
+        return self.client.post(reverse('battle:battle_fight') + '?format=json', {
+            'character': character, 'enemy': self.enemy.pk, 'seed': 1, **data,
+        })
+
+    def test_fight(self):
+        response = self.fight(self.player, f'warrior:{self.warrior.pk}', items=[self.sword.pk])
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        battle = Battle.objects.get(pk=payload['battle_id'])
+        self.assertEqual((battle.warrior_id, battle.enemy_id, battle.seed), (self.warrior.pk, self.enemy.pk, 1))
+        self.assertEqual(len(payload['events']), battle.events.count())
+        stats = CharacterStats.objects.get(warrior=self.warrior)
+        self.assertEqual((stats.battles, stats.damage_dealt), (1, payload['damage_dealt']))
+        # Same seed, same battle
+        self.assertEqual(self.fight(self.player, f'warrior:{self.warrior.pk}', items=[self.sword.pk]).json()['events'],
+                         payload['events'])
+
+    def test_someone_elses_character(self):
+        response = self.fight(self.player, f'mage:{self.foreign.pk}')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('character', response.json()['errors'])
+        # Admins fight with anyone's
+        self.assertEqual(self.fight(self.staff, f'mage:{self.foreign.pk}').status_code, 200)
+
+    def test_invalid_character(self):
+        for value in ('dragon:1', 'warrior:x', 'warrior', 'warrior:²', 'mage:١', f'mage:{self.foreign.pk + 1000}'):
+            with self.subTest(value=value):
+                self.assertIn('character', self.fight(self.staff, value).json()['errors'])
+        # The HTML form is shown again with the rejected values selected
+        response = self.client.post(reverse('battle:battle_fight'),
+                                    {'character': 'warrior:²', 'enemy': '²', 'items': ['١'], 'seed': 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Battle.objects.exists())
+
+    def test_queries_do_not_grow_with_characters(self):
+        self.fight(self.player, f'warrior:{self.warrior.pk}')
+        with CaptureQueriesContext(connection) as few:
+            self.fight(self.player, f'warrior:{self.warrior.pk}')
+        Warrior.objects.bulk_create(Warrior(name=f'Guerrero {n}', owner=self.player) for n in range(200))
+        with CaptureQueriesContext(connection) as many:
+            self.fight(self.player, f'warrior:{self.warrior.pk}')
+        self.assertEqual(len(many), len(few))
+        # Neither the form nor the view reads the character list
+        self.assertFalse([q['sql'] for q in many if 'ORDER BY' in q['sql']])
+
+    def test_home_lists_a_bounded_page(self):
+        Warrior.objects.bulk_create(Warrior(name=f'Guerrero {n:03}', owner=self.player) for n in range(200))
+        Enemy.objects.bulk_create(Enemy(name=f'Enemigo {n:03}') for n in range(200))
+        self.client.force_login(self.player)
+        response = self.client.get(reverse('battle:battle_home'))
+        form = response.context['form']
+        self.assertEqual(len(list(form['character'].field.widget.choices)), PICKER_LIMIT)
+        self.assertEqual(len(list(form['enemy'].field.widget.choices)), PICKER_LIMIT + 1)  # Plus the empty choice
+        self.assertNotContains(response, 'Merlin')
+
+        # A character chosen outside the first page is kept when the form is shown again
+        last = Warrior.objects.get(name='Guerrero 199')
+        response = self.client.post(reverse('battle:battle_fight'), {'character': f'warrior:{last.pk}'})
+        self.assertContains(response, f'value="warrior:{last.pk}" selected', status_code=400)
+
+
+class CharacterStatsTests(TestCase):
+    """CharacterStats totals and the leaderboard match the saved Battles."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.player = get_user_model().objects.create_user(username='jugador')
+        cls.warriors = [
+            Warrior.objects.create(name=name, owner=cls.player, health=90 + 10 * n, damage=18 + 3 * n, defense=n)
+            for n, name in enumerate(['Conan', 'Xena', 'Sonja'])
+        ]
+        cls.mage = Mage.objects.create(name='Merlin', owner=cls.player, health=70, magic_damage=30, mana=40)
+        cls.enemies = [
+            Enemy.objects.create(name='Orco', health=100, attack=22, defense=3),
+            Enemy.objects.create(name='Troll', health=130, attack=16, defense=6),
+        ]
+
+    def fight_all(self):
+        characters = [('warrior', warrior, engine.build_warrior({
+            'name': warrior.name, 'health': warrior.health, 'damage': warrior.damage, 'defense': warrior.defense,
+        })) for warrior in self.warriors]
+        characters.append(('mage', self.mage, engine.build_mage({
+            'name': self.mage.name, 'health': self.mage.health, 'magic_damage': self.mage.magic_damage,
+            'mana': self.mage.mana, 'defense': self.mage.defense,
+        })))
+        for kind, model, character in characters:
+            for enemy_row in self.enemies:
+                enemy = engine.build_enemy({'name': enemy_row.name, 'health': enemy_row.health,
+                                            'attack': enemy_row.attack, 'defense': enemy_row.defense})
+                for seed in range(6):
+                    result = engine.simulate(character, enemy, seed=seed)
+                    records.record_battle(kind, model.pk, enemy_row.pk, character, enemy, result, seed=seed)
+
+    def totals_from_battles(self):
+        """Per-character totals computed from the history: {(kind, pk): totals}."""
+        rows = Battle.objects.values('character_kind', 'warrior', 'mage', 'character_name').annotate(
+            battles=Count('pk'),
+            wins=Count('pk', filter=Q(winner='character')),
+            losses=Count('pk', filter=Q(winner='enemy')),
+            draws=Count('pk', filter=Q(winner='draw')),
+            damage_dealt=Sum('damage_dealt'),
+            damage_taken=Sum('damage_taken'),
+        )
+        totals = {}
+        for row in rows:
+            kind, warrior, mage = row.pop('character_kind'), row.pop('warrior'), row.pop('mage')
+            totals[kind, warrior or mage] = {'name': row.pop('character_name'), 'kind': kind, **row}
+        return totals
+
+    def test_totals_match_battles(self):
+        self.fight_all()
+        expected = self.totals_from_battles()
+        self.assertEqual(len(expected), 4)
+        stats = {
+            (row.character_kind, row.warrior_id or row.mage_id): {
+                'name': row.name, 'kind': row.character_kind, 'battles': row.battles, 'wins': row.wins,
+                'losses': row.losses, 'draws': row.draws,
+                'damage_dealt': row.damage_dealt, 'damage_taken': row.damage_taken,
+            }
+            for row in CharacterStats.objects.all()
+        }
+        self.assertEqual(stats, expected)
+
+    def test_leaderboard_matches_battles(self):
+        self.fight_all()
+        expected = sorted(self.totals_from_battles().values(), key=lambda row: (-row['wins'], row['name']))
+        # Not all the same wins: the leaderboard has something to order
+        self.assertGreater(len({row['wins'] for row in expected}), 1)
+        self.client.force_login(self.player)
+        leaderboard = self.client.get(reverse('battle:battle_leaderboard'), {'format': 'json'}).json()['leaderboard']
+        for row in leaderboard:
+            self.assertAlmostEqual(row.pop('win_rate'), row['wins'] / row['battles'])
+        self.assertEqual(leaderboard, expected)
+
+
+class BattleBenchmarkTests(TestCase):
+    """Queries of the fight and leaderboard views on the 1k dataset, against the baseline."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = benchmarks.seed_dataset(benchmarks.SIZES['1k'])
+
+    def test_query_counts_match_baseline(self):
+        metrics = benchmarks.BenchmarkSuite(self.data, repeat=1).run(['battle'])
+        baseline = benchmarks.load_results(benchmarks.baseline_path('1k'))
+        self.assertEqual(benchmarks.compare(metrics, baseline, queries_only=True), [])
+        # The engine does not touch the database
+        self.assertEqual(metrics['battle.simulate.queries'], 0)
+        self.assertGreater(metrics['battle.simulate.battles_per_s'], 0)
+
+    def test_runs_leave_no_battles(self):
+        # Every run is rolled back: the battles of one don't change the data of the next
+        benchmarks.BenchmarkSuite(self.data, repeat=1).run(['battle'])
+        self.assertFalse(Battle.objects.exists())
+        self.assertFalse(CharacterStats.objects.exists())
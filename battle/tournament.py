@@ -0,0 +1,242 @@
+# battle/tournament.py
+"""
+Torneos entre todos los personajes y enemigos de la base de datos.
+
+Las tablas Warrior, Mage y Enemy se leen una sola vez; los enfrentamientos se
+reparten en lotes entre procesos (``ProcessPoolExecutor``) que reciben los
+combatientes una única vez al arrancar. Cada batalla usa una semilla derivada
+de la semilla del torneo y de la identidad del enfrentamiento, y los
+resultados se combinan en el orden de los enfrentamientos, así que la
+clasificación es idéntica con cualquier número de procesos.
+
+Formatos:
+  * ``round_robin``: cada personaje contra cada enemigo, ``fights`` veces.
+  * ``bracket``: eliminación directa entre personajes. En cada cruce los dos
+    se enfrentan a los mismos ``gauntlet_size`` enemigos (elegidos por la
+    semilla del cruce); pasa quien gane más batallas (desempate: daño
+    causado, después el nombre).
+
+Los procesos llaman a ``django.setup()`` al arrancar con "spawn" o
+"forkserver" (Windows, macOS y Linux desde Python 3.14), y este módulo solo
+importa los modelos dentro de las funciones: importarlo no necesita Django
+configurado.
+"""
+import hashlib
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+
+from . import engine
+
+WIN_POINTS = 3
+DRAW_POINTS = 1
+
+_characters = ()
+_enemies = ()
+
+
+def match_seed(seed, *key):
+    """Semilla estable (independiente de PYTHONHASHSEED y del proceso) para un enfrentamiento."""
+    digest = hashlib.sha256(repr((seed,) + key).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def load_participants():
+    """Personajes (Guerreros y Magos) y enemigos como ``Combatant``, ordenados por nombre."""
+    from characters.models import Enemy, Mage, Warrior
+    characters = [
+        engine.build_warrior(values)
+        for values in Warrior.objects.values('name', 'health', 'defense', 'damage')
+    ] + [
+        engine.build_mage(values)
+        for values in Mage.objects.values('name', 'health', 'defense', 'magic_damage', 'mana')
+    ]
+    characters.sort(key=lambda combatant: (combatant.name, combatant.kind))
+    enemies = [engine.build_enemy(values) for values in Enemy.objects.values('name', 'health', 'attack', 'defense')]
+    return characters, enemies
+
+
+def _init_worker(characters, enemies):
+    if not apps.ready:  # Arrancado con "spawn" o "forkserver": un intérprete nuevo
+        django.setup()
+    global _characters, _enemies
+    _characters, _enemies = characters, enemies
+
+
+def _play(tasks):
+    """
+    Resuelve un lote de tareas ``(personaje, enemigo, batallas, clave)`` y
+    devuelve por tarea ``(victorias, derrotas, empates, daño causado, daño recibido)``.
+    """
+    results = []
+    for c_index, e_index, fights, key in tasks:
+        character, enemy = _characters[c_index], _enemies[e_index]
+        base_seed = match_seed(*key)
+        wins = losses = draws = dealt = taken = 0
+        for fight in range(fights):
+            result = engine.simulate(character, enemy, seed=base_seed + fight, record=False)
+            if result.winner == engine.CHARACTER:
+                wins += 1
+            elif result.winner == engine.ENEMY:
+                losses += 1
+            else:
+                draws += 1
+            dealt += result.damage_dealt
+            taken += result.damage_taken
+        results.append((wins, losses, draws, dealt, taken))
+    return results
+
+
+class TournamentRunner:
+    """
+    Reparte las tareas entre ``workers`` procesos (1 = en este proceso).
+    ``mp_context`` elige cómo se arrancan (por defecto, el método de la plataforma).
+    """
+
+    def __init__(self, characters, enemies, workers=1, shards_per_worker=4, mp_context=None):
+        self.characters = characters
+        self.enemies = enemies
+        self.workers = workers
+        self.shards_per_worker = shards_per_worker
+        self.mp_context = mp_context
+        self.executor = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=self.mp_context,
+                initializer=_init_worker, initargs=(self.characters, self.enemies),
+            )
+        else:
+            _init_worker(self.characters, self.enemies)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def run(self, tasks):
+        """Resultados en el mismo orden que ``tasks``."""
+        if self.executor is None:
+            return _play(tasks)
+        shard_count = self.workers * self.shards_per_worker
+        size = max(1, -(-len(tasks) // shard_count))
+        shards = [tasks[start:start + size] for start in range(0, len(tasks), size)]
+        return [result for shard in self.executor.map(_play, shards) for result in shard]
+
+
+class Standing:
+    __slots__ = ('name', 'kind', 'wins', 'losses', 'draws', 'damage_dealt', 'damage_taken')
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.wins = self.losses = self.draws = self.damage_dealt = self.damage_taken = 0
+
+    @property
+    def points(self):
+        return self.wins * WIN_POINTS + self.draws * DRAW_POINTS
+
+    def as_dict(self):
+        return {
+            'name': self.name, 'kind': self.kind, 'points': self.points, 'wins': self.wins,
+            'losses': self.losses, 'draws': self.draws,
+            'damage_dealt': self.damage_dealt, 'damage_taken': self.damage_taken,
+        }
+
+
+def _sorted_standings(standings):
+    return sorted(standings, key=lambda s: (-s.points, -s.wins, -s.damage_dealt, s.name, s.kind))
+
+
+def round_robin(characters, enemies, fights=10, seed=0, workers=1, mp_context=None):
+    """Todos contra todos. Devuelve ``(clasificación de personajes, de enemigos)``."""
+    tasks = [
+        (c, e, fights, (seed, 'rr', c, e))
+        for c in range(len(characters)) for e in range(len(enemies))
+    ]
+    with TournamentRunner(characters, enemies, workers, mp_context=mp_context) as runner:
+        results = runner.run(tasks)
+
+    character_table = [Standing(c.name, c.kind) for c in characters]
+    enemy_table = [Standing(e.name, e.kind) for e in enemies]
+    for (c, e, _, _), (wins, losses, draws, dealt, taken) in zip(tasks, results):
+        _add(character_table[c], wins, losses, draws, dealt, taken)
+        _add(enemy_table[e], losses, wins, draws, taken, dealt)
+    return _sorted_standings(character_table), _sorted_standings(enemy_table)
+
+
+def _add(standing, wins, losses, draws, dealt, taken):
+    standing.wins += wins
+    standing.losses += losses
+    standing.draws += draws
+    standing.damage_dealt += dealt
+    standing.damage_taken += taken
+
+
+def bracket(characters, enemies, fights=10, seed=0, workers=1, gauntlet_size=3, mp_context=None):
+    """
+    Eliminación directa entre personajes. Devuelve ``(rondas, campeón)``;
+    cada ronda es una lista de dicts por cruce.
+    """
+    if not characters:
+        return [], None
+    if not enemies:
+        raise ValueError("A bracket needs at least one enemy.")
+
+    alive = list(range(len(characters)))
+    gauntlet_size = min(gauntlet_size, len(enemies))
+    rounds = []
+    with TournamentRunner(characters, enemies, workers, mp_context=mp_context) as runner:
+        round_number = 0
+        while len(alive) > 1:
+            round_number += 1
+            # Con un número impar de personajes, el primero del cuadro pasa sin luchar
+            bye = alive[0] if len(alive) % 2 else None
+            contenders = alive[1:] if bye is not None else alive
+            pairings = [(contenders[i], contenders[i + 1]) for i in range(0, len(contenders), 2)]
+
+            tasks = []
+            gauntlets = []
+            for a, b in pairings:
+                match_key = (seed, 'bracket', round_number, a, b)
+                gauntlet = random.Random(match_seed(*match_key)).sample(range(len(enemies)), gauntlet_size)
+                gauntlets.append(gauntlet)
+                for c in (a, b):
+                    tasks.extend((c, e, fights, match_key + (e,)) for e in gauntlet)
+            results = runner.run(tasks)
+
+            matches = []
+            next_alive = [bye] if bye is not None else []
+            per_side = len(gauntlets[0]) if gauntlets else 0
+            for index, (a, b) in enumerate(pairings):
+                offset = index * 2 * per_side
+                score_a = _score(results[offset:offset + per_side])
+                score_b = _score(results[offset + per_side:offset + 2 * per_side])
+                if score_a != score_b:
+                    winner = a if score_a > score_b else b
+                else:
+                    # Desempate final por nombre: el primero en orden alfabético
+                    winner = min(a, b, key=lambda c: (characters[c].name, characters[c].kind))
+                next_alive.append(winner)
+                matches.append({
+                    'round': round_number,
+                    'a': characters[a].name, 'b': characters[b].name,
+                    'enemies': [enemies[e].name for e in gauntlets[index]],
+                    'a_wins': score_a[0], 'b_wins': score_b[0],
+                    'a_damage': score_a[1], 'b_damage': score_b[1],
+                    'winner': characters[winner].name,
+                })
+            if bye is not None:
+                matches.append({'round': round_number, 'a': characters[bye].name, 'b': None,
+                                'winner': characters[bye].name})
+            rounds.append(matches)
+            alive = next_alive
+    return rounds, characters[alive[0]]
+
+
+def _score(results):
+    """``(victorias, daño causado)`` de un lado del cruce."""
+    return sum(r[0] for r in results), sum(r[3] for r in results)
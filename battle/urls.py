@@ -1,9 +1,12 @@
 # battle/urls.py
 
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 app_name = 'battle'
 urlpatterns = [
-    # Ejemplo de ruta de prueba
     path('', views.battle_home, name='battle_home'),
+    # Con ASGI (settings.ASYNC_VIEWS) la batalla se sirve con la vista async
+    path('fight/', async_views.battle_fight if settings.ASYNC_VIEWS else views.battle_fight, name='battle_fight'),
+    path('leaderboard/', views.battle_leaderboard, name='battle_leaderboard'),
 ]
@@ -2,12 +2,80 @@
 
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required # Para asegurar que solo usuarios logueados accedan
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from characters.models import Mage, Warrior
+from . import engine, records
+from .forms import BattleForm
+
+# Campos que necesita el motor de combate, leídos con .values() (sin instancias del ORM)
+CHARACTER_FIELDS = {
+    'warrior': (Warrior, ('name', 'health', 'defense', 'damage')),
+    'mage': (Mage, ('name', 'health', 'defense', 'magic_damage', 'mana')),
+}
+ENEMY_FIELDS = ('name', 'health', 'attack', 'defense')
+ITEM_FIELDS = ('item_type', 'damage_buff', 'health_restore', 'mana_restore')
+BUILDERS = {'warrior': engine.build_warrior, 'mage': engine.build_mage}
 
 @login_required # Esto asegura que el usuario debe estar logueado para acceder a esta página
 def battle_home(request):
     """
     Vista para la página principal de la aplicación de batalla.
     """
-    return render(request, 'battle/battle_home.html')
+    return render(request, 'battle/battle_home.html', {'form': BattleForm(user=request.user)})
+
+@login_required
+@require_POST
+def battle_fight(request):
+    """
+    Ejecuta una batalla y devuelve el log: como JSON si se pide ?format=json,
+    si no renderiza la arena.
+    """
+    wants_json = request.GET.get('format') == 'json'
+    form = BattleForm(request.POST, user=request.user)
+    if not form.is_valid():
+        if wants_json:
+            return JsonResponse({'errors': form.errors}, status=400)
+        return render(request, 'battle/battle_home.html', {'form': form}, status=400)
 
-# Puedes añadir más vistas para tu lógica de batalla aquí
\ No newline at end of file
+    kind, character_pk = form.cleaned_data['character']
+    model, fields = CHARACTER_FIELDS[kind]
+    character_values = model.objects.values(*fields).get(pk=character_pk)
+    enemy_values = {field: getattr(form.cleaned_data['enemy'], field) for field in ENEMY_FIELDS}
+    items = form.cleaned_data['items'].values(*ITEM_FIELDS)
+
+    character = BUILDERS[kind](character_values, items)
+    enemy = engine.build_enemy(enemy_values)
+    result = engine.simulate(character, enemy, seed=form.cleaned_data['seed'])
+    battle = records.record_battle(kind, character_pk, form.cleaned_data['enemy'].pk, character, enemy, result,
+                                   seed=form.cleaned_data['seed'], user=request.user)
+
+    if wants_json:
+        return JsonResponse({'battle_id': battle.pk, **result.as_dict()})
+    return render(request, 'battle/battle_arena.html', {
+        'battle': battle,
+        'character': character,
+        'enemy': enemy,
+        'result': result,
+        'log': [engine.describe_event(event) for event in result.events],
+        'stats': records.character_stats(kind, character_pk),
+    })
+
+@login_required
+def battle_leaderboard(request):
+    """
+    Ranking de personajes por victorias, leído de las filas de totales
+    (CharacterStats); ?format=json devuelve la misma lista en JSON.
+    """
+    stats = records.leaderboard()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'leaderboard': [
+            {
+                'name': row.name, 'kind': row.character_kind, 'battles': row.battles, 'wins': row.wins,
+                'losses': row.losses, 'draws': row.draws, 'win_rate': row.win_rate,
+                'damage_dealt': row.damage_dealt, 'damage_taken': row.damage_taken,
+            }
+            for row in stats
+        ]})
+    return render(request, 'battle/battle_leaderboard.html', {'stats': stats})
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CharactersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'characters'
+
+    def ready(self):
+        from . import signals  # noqa: F401 (registra los receivers)
+        from DjangoProject import db  # noqa: F401 (PRAGMA de SQLite en cada conexión)
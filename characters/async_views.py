@@ -0,0 +1,154 @@
+# characters/async_views.py
+"""
+Async-native versions of the list and export views, routed instead of the
+sync ones when ASYNC_VIEWS is on (DjangoProject/asgi.py turns it on).
+
+Each view subclasses its sync counterpart and keeps all of its configuration;
+only the request path changes. The user comes from request.auser(), the
+table versions and the rows come from the async ORM, and an export streams
+from aiterator(). A slow client therefore holds a coroutine while it reads,
+not a worker thread (under ASGI a sync streaming response would even be read
+into memory before the first byte is sent).
+
+Writes (background jobs, imports, forms) stay sync: the async ORM has no
+transactions, so those views are not duplicated here.
+"""
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+from django.views.generic import View
+
+from . import catalog, jobs, versions, views
+from .exporters import aiter_rows, to_bytes
+
+
+class AsyncViewMixin:
+    """
+    One async dispatch doing what the sync dispatch of LoginRequiredMixin,
+    UserPassesTestMixin and ConditionalGetMixin does, in the same order.
+    test_func must not query the database (the staff checks don't).
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        # Loaded once and asynchronously; templates and test_func then read it without a query
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        if isinstance(self, UserPassesTestMixin) and not self.get_test_func()():
+            return self.handle_no_permission()
+
+        # View.dispatch only picks the handler: the sync checks of the mixins are not run again
+        if request.method not in ('GET', 'HEAD') or not self.use_conditional_get():
+            return await View.dispatch(self, request, *args, **kwargs)
+        etag, last_modified = await self.aget_validators()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await View.dispatch(self, request, *args, **kwargs)
+        return self.add_validators(response, etag, last_modified)
+
+    def render_now(self, context):
+        # A TemplateResponse would be rendered later, in a sync thread
+        return render(self.request, self.get_template_names(), context)
+
+
+# --- Lists ---
+
+class CharacterListView(AsyncViewMixin, views.CharacterListView):
+    async def get(self, request, *args, **kwargs):
+        self.object_list = await self.aget_queryset()
+        return self.render_now(self.get_context_data())
+
+
+class AsyncCatalogCacheMixin:
+    """CatalogCacheMixin with the version lookup, cache and page read done asynchronously."""
+    async def get(self, request, *args, **kwargs):
+        self.object_list = []  # Only loaded on a cache miss, by arender_fragment
+        fragment = await catalog.aget_or_build(self.model, self.get_fragment_key(), self.arender_fragment)
+        return self.render_now({'view': self, 'catalog_fragment': fragment})
+
+    async def arender_fragment(self):
+        self.object_list = await self.aget_queryset()
+        return render_to_string(self.fragment_template_name, self.get_context_data())
+
+
+class EnemyListView(AsyncViewMixin, AsyncCatalogCacheMixin, views.EnemyListView):
+    pass
+
+
+class ItemListView(AsyncViewMixin, AsyncCatalogCacheMixin, views.ItemListView):
+    pass
+
+
+# --- Exports ---
+
+class AsyncExportMixin:
+    """
+    JSONExportMixin.get with the rows read through aiterator() and streamed
+    by the writers' astream. Background exports still run in the job threads
+    (characters.jobs), which use the sync iter_export of the same class.
+    """
+    async def get(self, request, *args, **kwargs):
+        format_name, export_format = self.get_export_format()
+        if export_format is None:
+            return self.unknown_format_response()
+        error = self.since_error_response()
+        if error:
+            return error
+
+        if request.GET.get('background'):
+            job = await sync_to_async(jobs.submit_export)(self, request.user, format_name)
+            return JsonResponse(jobs.status_payload(job), status=202)
+
+        if self.since is not None and await versions.asince_expired(self.model, self.since):
+            return self.since_expired_response()
+
+        self.cursor = await versions.aget_version(self.model)
+        if self.cache_export and self.since is None:
+            body = await catalog.aget_or_build(
+                self.model, f'export:{format_name}', partial(self.abuild_export, export_format),
+            )
+            response = HttpResponse(body, content_type=export_format.content_type)
+        else:
+            response = StreamingHttpResponse(
+                self.aiter_export(export_format),
+                content_type=export_format.content_type,
+            )
+        return self.as_attachment(response, export_format)
+
+    def aiter_export(self, export_format):
+        if self.since is not None:
+            rows = self.aiter_changes()
+        else:
+            rows = aiter_rows(self.get_export_queryset(), self.fields_to_export, self.export_chunk_size)
+        return export_format.writer.astream(rows, self.export_chunk_size, self.get_export_columns())
+
+    async def aiter_changes(self):
+        queryset = versions.changed_since(self.get_export_queryset(), self.since, self.cursor)
+        async for row in aiter_rows(queryset, self.fields_to_export, self.export_chunk_size):
+            yield row
+        deleted = versions.deleted_since(self.model, self.since, self.cursor)
+        async for pk in deleted.aiterator(chunk_size=self.export_chunk_size):
+            yield {'id': pk, '_deleted': True}
+
+    async def abuild_export(self, export_format):
+        return b''.join([to_bytes(chunk) async for chunk in self.aiter_export(export_format)])
+
+
+class WarriorExportView(AsyncViewMixin, AsyncExportMixin, views.WarriorExportView):
+    pass
+
+
+class MageExportView(AsyncViewMixin, AsyncExportMixin, views.MageExportView):
+    pass
+
+
+class EnemyExportView(AsyncViewMixin, AsyncExportMixin, views.EnemyExportView):
+    pass
+
+
+class ItemExportView(AsyncViewMixin, AsyncExportMixin, views.ItemExportView):
+    pass
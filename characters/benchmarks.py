@@ -0,0 +1,317 @@
+# characters/benchmarks.py
+"""
+Performance regression benchmarks, run by ``manage.py benchmark_suite`` and
+by the benchmark tests of the characters, battle and users apps.
+
+``seed_dataset`` fills the database with a synthetic dataset of ``rows``
+warriors, mages, enemies and items (``SIZES``: 1k, 100k, 1m), owned by one
+user per 100 characters. A ``BenchmarkSuite`` then runs the registered
+scenarios against it. Each scenario measures one or more operations with
+``BenchmarkSuite.measure``, which records two metrics per operation:
+
+* ``<name>.<unit>_per_s``: throughput, the best of ``repeat`` runs (higher is better);
+* ``<name>.queries``: SQL statements per run, or per request for the views
+  (lower is better).
+
+Every run happens in a savepoint that is rolled back, so the writes of one
+run (imports, battles) do not change the data the next one sees.
+
+Scenarios are registered with ``@scenario(name)`` in the ``benchmarks``
+module of each app: lists, exports and imports here, battle in
+``battle.benchmarks``, pages in ``users.benchmarks``. ``load_scenarios``
+imports them all.
+
+The results are saved as JSON (``BenchmarkSuite.as_dict``). ``compare``
+checks them against a baseline saved the same way; the checked-in ones live
+in ``characters/benchmark_baselines/<size>.json``. Query counts do not
+depend on the machine and are compared exactly by default; throughput only
+means something against a baseline taken on the same machine.
+"""
+import json
+import platform
+import time
+from pathlib import Path
+
+import django
+import tablib
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils.module_loading import autodiscover_modules
+
+from .importers import BulkImporter
+from .models import Enemy, Item, Mage, Warrior
+from .pagination import encode_cursor
+from .resources import WarriorResource
+from .synthetic import alpha_name
+from .views import EnemyImportView
+
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+BASELINE_DIR = Path(__file__).resolve().parent / 'benchmark_baselines'
+
+PREFIX = 'Bench'
+CHARACTERS_PER_OWNER = 100
+SEED_BATCH_SIZE = 5000
+REQUESTS = 20  # Requests per run in the view scenarios
+
+
+class QueryCounter:
+    """execute_wrapper counting the statements sent to the database."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+# Dataset
+
+class BenchmarkData:
+    """What the scenarios need to know about a seeded dataset."""
+
+    def __init__(self, rows, staff, player, middle_warrior, enemies, items):
+        self.rows = rows
+        self.staff = staff
+        self.player = player  # Owner of CHARACTERS_PER_OWNER warriors and as many mages
+        self.middle_warrior = middle_warrior  # (pk, name) halfway through the warriors by name
+        self.enemies = enemies  # A few enemy pks
+        self.items = items  # A few item pks
+
+
+def build_item(number):
+    item_type = Item.ITEM_TYPES[number % len(Item.ITEM_TYPES)][0]
+    return Item(
+        name=alpha_name(f'{PREFIX} Item', number), item_type=item_type, value=number % 500,
+        description=f"Objeto de prueba número {number}" if number % 3 else None,
+        damage_buff=number % 7, health_restore=number % 40, mana_restore=number % 25,
+        extra_attributes={'nivel': number % 10, 'rareza': ('común', 'rara', 'épica')[number % 3]},
+    )
+
+
+def seed_rows(model, objs):
+    objs = list(objs)
+    for start in range(0, len(objs), SEED_BATCH_SIZE):
+        model.objects.bulk_create(objs[start:start + SEED_BATCH_SIZE])
+
+
+def seed_dataset(rows):
+    """Creates ``rows`` warriors, mages, enemies and items, their owners and a staff user."""
+    User = get_user_model()
+    password = make_password(None)
+    User.objects.bulk_create(
+        [User(username=f'bench-owner-{i}', password=password) for i in range(max(1, rows // CHARACTERS_PER_OWNER))],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    owners = list(User.objects.filter(username__startswith='bench-owner-').order_by('pk').values_list('pk', flat=True))
+    staff = User.objects.create_user(username='bench-staff', password=None, is_staff=True)
+
+    # The owners take turns, so each one ends up with CHARACTERS_PER_OWNER of each kind
+    seed_rows(Warrior, (
+        Warrior(name=alpha_name(f'{PREFIX} Warrior', i), owner_id=owners[i % len(owners)],
+                health=80 + i % 60, damage=10 + i % 30, defense=i % 15)
+        for i in range(rows)
+    ))
+    seed_rows(Mage, (
+        Mage(name=alpha_name(f'{PREFIX} Mage', i), owner_id=owners[i % len(owners)],
+             health=60 + i % 50, magic_damage=15 + i % 35, mana=30 + i % 70, defense=i % 10)
+        for i in range(rows)
+    ))
+    seed_rows(Enemy, (
+        Enemy(name=alpha_name(f'{PREFIX} Enemy', i), health=50 + i % 150, attack=8 + i % 25, defense=i % 12)
+        for i in range(rows)
+    ))
+    seed_rows(Item, (build_item(i) for i in range(rows)))
+
+    middle = Warrior.objects.values_list('pk', 'name').get(name=alpha_name(f'{PREFIX} Warrior', rows // 2))
+    return BenchmarkData(
+        rows,
+        staff=staff,
+        player=User.objects.get(pk=owners[0]),
+        middle_warrior=middle,
+        enemies=list(Enemy.objects.order_by('pk').values_list('pk', flat=True)[:10]),
+        items=list(Item.objects.order_by('pk').values_list('pk', flat=True)[:10]),
+    )
+
+
+# Suite
+
+SCENARIOS = {}  # Name -> function(suite)
+
+
+def scenario(name):
+    """Registers the decorated function as the scenario ``name``."""
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def load_scenarios():
+    """Imports the ``benchmarks`` module of every installed app, which registers its scenarios."""
+    autodiscover_modules('benchmarks')
+    return SCENARIOS
+
+
+class BenchmarkSuite:
+    """Runs scenarios against a seeded dataset and collects their metrics."""
+
+    def __init__(self, data, repeat=3):
+        self.data = data
+        self.repeat = repeat
+        self.metrics = {}
+        self.clients = {}
+
+    def client(self, user):
+        """A test client logged in as ``user`` (one per user, reused across requests)."""
+        if user.pk not in self.clients:
+            client = Client()
+            client.force_login(user)
+            self.clients[user.pk] = client
+        return self.clients[user.pk]
+
+    def run(self, names):
+        for name in names:
+            SCENARIOS[name](self)
+        return self.metrics
+
+    def timed_run(self, func):
+        counter = QueryCounter()
+        with transaction.atomic():
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                func()
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return elapsed, counter.count
+
+    def measure(self, name, func, units, unit='rows', warmup=True, queries_per_unit=False):
+        """
+        Runs ``func``, which processes ``units`` units of work, ``repeat``
+        times (after an unrecorded warm-up run that fills caches, unless
+        ``warmup`` is False) and records its metrics.
+        """
+        if warmup:
+            self.timed_run(func)
+        best, queries = None, 0
+        for _ in range(self.repeat):
+            elapsed, count = self.timed_run(func)
+            best = elapsed if best is None else min(best, elapsed)
+            queries = max(queries, count)
+        self.metrics[f'{name}.{unit}_per_s'] = round(units / best, 1)
+        self.metrics[f'{name}.queries'] = round(queries / units, 2) if queries_per_unit else queries
+
+    def get_pages(self, name, user, url, requests=REQUESTS):
+        """Measures ``requests`` GETs of ``url`` as ``user``."""
+        client = self.client(user)
+
+        def get():
+            for _ in range(requests):
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise AssertionError(f"GET {url}: {response.status_code}")
+        self.measure(name, get, requests, unit='requests', queries_per_unit=True)
+
+    def as_dict(self, size=None):
+        return {
+            'size': size,
+            'rows': self.data.rows,
+            'repeat': self.repeat,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'metrics': dict(sorted(self.metrics.items())),
+        }
+
+
+# Baselines
+
+def baseline_path(size):
+    return BASELINE_DIR / f'{size}.json'
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_results(results, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+
+
+def compare(metrics, baseline, tolerance=0.5, query_tolerance=0.0, queries_only=False):
+    """
+    Returns one message per metric of ``baseline`` (results as saved by
+    ``save_results``) that ``metrics`` makes worse past its tolerance: query
+    counts may grow by ``query_tolerance``, throughput may drop by
+    ``tolerance`` (both fractions). Metrics missing from ``metrics`` (scenarios
+    not run) are ignored.
+    """
+    regressions = []
+    for name, expected in baseline['metrics'].items():
+        value = metrics.get(name)
+        if value is None:
+            continue
+        if name.endswith('.queries'):
+            limit = expected * (1 + query_tolerance)
+            if value > limit:
+                regressions.append(f"{name}: {value} queries, baseline {expected} (limit {limit:g})")
+        elif not queries_only:
+            limit = expected * (1 - tolerance)
+            if value < limit:
+                regressions.append(f"{name}: {value:,.1f}/s, baseline {expected:,.1f}/s (limit {limit:,.1f}/s)")
+    return regressions
+
+
+# Scenarios
+
+@scenario('lists')
+def list_views(suite):
+    data = suite.data
+    characters = reverse('characters:character_list')
+    cursor = encode_cursor([data.middle_warrior[1], 'warrior', data.middle_warrior[0]])
+    suite.get_pages('list.characters_all', data.staff, f'{characters}?scope=all')
+    suite.get_pages('list.characters_deep', data.staff, f'{characters}?scope=all&after={cursor}')
+    suite.get_pages('list.characters_mine', data.player, characters)
+    suite.get_pages('list.enemies', data.player, reverse('characters:enemy_list'))
+    suite.get_pages('list.items', data.player, reverse('characters:item_list'))
+
+
+@scenario('exports')
+def exports(suite):
+    # Streamed exports; the enemy and item ones are served from the catalog cache
+    client = suite.client(suite.data.staff)
+    for name, url in [
+        ('export.warriors_ndjson', reverse('characters:warrior_export') + '?format=ndjson'),
+        ('export.mages_json', reverse('characters:mage_export') + '?format=json'),
+    ]:
+        suite.measure(name, lambda url=url: b''.join(client.get(url).streaming_content),
+                      suite.data.rows, warmup=False)
+
+
+@scenario('imports')
+def imports(suite):
+    # A tenth of the dataset, half updating existing rows and half new
+    rows = max(suite.data.rows // 10, 2)
+    existing = Enemy.objects.order_by('pk').values_list('pk', 'name')[:rows // 2]
+    enemies = [{'id': pk, 'name': name, 'health': 99, 'attack': 11, 'defense': 4} for pk, name in existing]
+    enemies += [
+        {'name': alpha_name(f'{PREFIX} Imported', i), 'health': 40, 'attack': 12, 'defense': 3}
+        for i in range(rows - len(enemies))
+    ]
+    importer = BulkImporter(Enemy, EnemyImportView.fields_mapping)
+    suite.measure('import.enemies_json', lambda: importer.run(enemies), rows, warmup=False)
+
+    dataset = tablib.Dataset(headers=list(WarriorResource._meta.fields))
+    existing = Warrior.objects.order_by('pk').values_list('pk', 'owner_id', 'name', 'defense')[:rows // 2]
+    for pk, owner_id, name, defense in existing:
+        dataset.append([pk, owner_id, name, 120, 25, defense])
+    for i in range(rows - len(dataset)):
+        dataset.append(['', suite.data.player.pk, alpha_name(f'{PREFIX} Imported', i), 90, 15, 8])
+    suite.measure('import.warriors_admin', lambda: WarriorResource().import_data(dataset, use_transactions=True),
+                  rows, warmup=False)
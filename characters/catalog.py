@@ -0,0 +1,56 @@
+# characters/catalog.py
+"""
+Read-through cache for the global catalogs (Enemy, Item).
+
+Every cache key carries the catalog's table version (``characters.versions``),
+bumped by ``characters.signals`` in the same transaction as any write to the
+catalog (save, delete or import). A write therefore never needs to find and delete
+cached entries: readers simply stop asking for the old version, and old
+entries age out of the cache.
+
+The version is read from the database on every access (a primary key
+lookup), not from the cache. That keeps reads correct with a per-process
+backend such as locmem: another process bumping the version is seen at once,
+so a stale catalog is never served after a staff edit.
+
+Settings:
+    CATALOG_CACHE_ALIAS    cache alias to use (default 'catalog', falling back to 'default')
+    CATALOG_CACHE_TIMEOUT  seconds an entry is kept (default 3600)
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from . import versions
+
+
+def get_cache():
+    alias = getattr(settings, 'CATALOG_CACHE_ALIAS', 'catalog')
+    return caches[alias if alias in settings.CACHES else 'default']
+
+
+def get_or_build(model, key, build):
+    """
+    Returns the value cached under ``key`` for the current version of the
+    ``model`` catalog, calling ``build()`` and caching its result on a miss.
+    """
+    cache = get_cache()
+    version = versions.get_version(model)
+    cache_key = f'catalog:{versions.table_name(model)}:{key}'
+    value = cache.get(cache_key, version=version)
+    if value is None:
+        value = build()
+        cache.set(cache_key, value, timeout=getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600), version=version)
+    return value
+
+
+async def aget_or_build(model, key, build):
+    """``get_or_build`` for async views: ``build`` is a coroutine function."""
+    cache = get_cache()
+    version = await versions.aget_version(model)
+    cache_key = f'catalog:{versions.table_name(model)}:{key}'
+    value = await cache.aget(cache_key, version=version)
+    if value is None:
+        value = await build()
+        await cache.aset(cache_key, value, timeout=getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600),
+                         version=version)
+    return value
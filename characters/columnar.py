@@ -0,0 +1,96 @@
+# characters/columnar.py
+"""
+Arrow IPC and Parquet encoding for the columnar export formats.
+
+Needs pyarrow (``pip install pyarrow``), an optional dependency:
+``characters.exporters`` only offers these formats when it is installed and
+imports this module with the first columnar export, so workers that never
+serve one don't pay for loading pyarrow.
+
+Column types come from the model fields, not from the rows: a batch whose
+nullable column happens to be all NULL still matches the schema written in
+the file header.
+"""
+import io
+import json
+
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
+
+INTEGER_FIELDS = {
+    'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+    'PositiveIntegerField', 'PositiveBigIntegerField', 'PositiveSmallIntegerField',
+}
+
+
+def arrow_type(field):
+    if field.is_relation:
+        field = field.target_field
+    internal_type = field.get_internal_type()
+    if internal_type in INTEGER_FIELDS:
+        return pyarrow.int64()
+    if internal_type == 'BooleanField':
+        return pyarrow.bool_()
+    if internal_type == 'FloatField':
+        return pyarrow.float64()
+    if internal_type == 'DateTimeField':
+        return pyarrow.timestamp('us', tz='UTC')
+    if internal_type == 'DateField':
+        return pyarrow.date32()
+    # CharField, TextField, DecimalField, JSONField (as its JSON text)...
+    return pyarrow.string()
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that keeps what was written until ``drain`` hands it out."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class ColumnarEncoder:
+    """
+    Encodes one export: ``encode`` turns a batch of rows into the bytes
+    written so far (a record batch, or a row group for Parquet) and
+    ``close`` returns the end of the stream or the Parquet footer.
+    """
+
+    def __init__(self, kind, columns):
+        self.schema = pyarrow.schema([(name, arrow_type(field)) for name, field in columns])
+        self.json_columns = [name for name, field in columns if field.get_internal_type() == 'JSONField']
+        self.sink = ChunkSink()
+        if kind == 'parquet':
+            self.writer = pyarrow.parquet.ParquetWriter(self.sink, self.schema, compression='snappy')
+        else:
+            self.writer = pyarrow.ipc.new_stream(self.sink, self.schema)
+
+    def encode(self, batch):
+        if self.json_columns:
+            batch = [{**row, **{
+                name: json.dumps(row[name], ensure_ascii=False)
+                for name in self.json_columns if row.get(name) is not None
+            }} for row in batch]
+        self.writer.write_table(pyarrow.Table.from_pylist(batch, schema=self.schema))
+        return self.sink.drain()
+
+    def close(self):
+        self.writer.close()
+        return self.sink.drain()
@@ -0,0 +1,226 @@
+# characters/exporters.py
+"""
+Streaming serializers used by ``JSONExportMixin``.
+
+Rows are read with ``values_list().iterator(chunk_size=...)`` (no model
+instances) and written out one chunk at a time, so export memory does not grow
+with the table and the first bytes leave before the last row is read.
+Async views read the same rows with ``aiterator()`` (``aiter_rows``) and
+stream them through the same writers (``BatchWriter.astream``).
+
+Text formats yield ``str`` chunks and binary ones (gzip, Arrow, Parquet)
+``bytes``; ``to_bytes`` turns either into what goes to a file or a cache.
+"""
+import json
+import zlib
+from importlib.util import find_spec
+
+from django.db import models
+
+
+class ExportFormat:
+    """How an export is serialized: content type, file extension and writer."""
+
+    def __init__(self, content_type, extension, writer):
+        self.content_type = content_type
+        self.extension = extension
+        self.writer = writer
+
+    def filename(self, base_filename):
+        stem = base_filename.rsplit('.', 1)[0]
+        return f'{stem}.{self.extension}'
+
+
+def to_bytes(chunk):
+    return chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+
+
+def export_columns(model, fields, deleted=False):
+    """
+    ``(name, model field)`` for each exported value, for the typed formats.
+    With ``deleted`` the tombstones' ``_deleted`` flag gets a column too.
+    """
+    columns = [(name, model._meta.get_field(name)) for name in fields]
+    if deleted:
+        columns.append(('_deleted', models.BooleanField(null=True)))
+    return columns
+
+
+def iter_rows(queryset, fields, chunk_size=2000):
+    """Yields one dict per row, keyed by ``fields``, without building model instances."""
+    for values in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        yield dict(zip(fields, values))
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def aiter_rows(queryset, fields, chunk_size=2000):
+    """``iter_rows`` for async views: the rows come from ``aiterator()``."""
+    # values(), not values_list(): in Django 5.2 values_list().aiterator() runs
+    # its query on the event loop and raises SynchronousOnlyOperation.
+    async for row in queryset.values(*fields).aiterator(chunk_size=chunk_size):
+        yield row
+
+
+async def _abatched(rows, size):
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BatchWriter:
+    """
+    Serializes rows one batch at a time. Calling the writer with an iterable
+    of rows gives a generator of text chunks; ``astream`` does the same for
+    an async iterable (async views). Subclasses implement ``encode``.
+    ``columns`` (``export_columns``) is only used by the typed formats.
+    """
+
+    def encode(self, batch, first):
+        raise NotImplementedError
+
+    def close(self, empty):
+        # Text written after the last batch ('' for none)
+        return ''
+
+    def __call__(self, rows, batch_size, columns=None):
+        first = True
+        for batch in _batched(rows, batch_size):
+            yield self.encode(batch, first)
+            first = False
+        tail = self.close(first)
+        if tail:
+            yield tail
+
+    async def astream(self, rows, batch_size, columns=None):
+        first = True
+        async for batch in _abatched(rows, batch_size):
+            yield self.encode(batch, first)
+            first = False
+        tail = self.close(first)
+        if tail:
+            yield tail
+
+
+class JSONArrayWriter(BatchWriter):
+    """
+    Writes the same text as ``json.dumps(list(rows), indent=indent,
+    ensure_ascii=False)``, one batch of rows at a time.
+    """
+
+    def __init__(self, indent=None):
+        self.indent = indent
+        if indent is None:
+            self.opening, self.separator, self.closing = '[', ', ', ']'
+        else:
+            self.opening, self.separator, self.closing = '[\n', ',\n', '\n]'
+
+    def dump(self, row):
+        text = json.dumps(row, indent=self.indent, ensure_ascii=False)
+        if self.indent is None:
+            return text
+        # json.dumps nests by whole lines, so indenting each line of an
+        # element reproduces the layout of the element inside the list.
+        pad = ' ' * self.indent
+        return '\n'.join(pad + line for line in text.split('\n'))
+
+    def encode(self, batch, first):
+        text = self.separator.join(self.dump(row) for row in batch)
+        return (self.opening if first else self.separator) + text
+
+    def close(self, empty):
+        return '[]' if empty else self.closing
+
+
+class NDJSONWriter(BatchWriter):
+    """One compact JSON object per line (newline-delimited JSON)."""
+
+    def encode(self, batch, first):
+        return ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in batch)
+
+
+class GzipWriter(BatchWriter):
+    """Gzip-compresses the output of another writer as it is produced."""
+
+    def __init__(self, writer, level=6):
+        self.writer = writer
+        self.level = level
+
+    def compressor(self):
+        return zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip header
+
+    def __call__(self, rows, batch_size, columns=None):
+        compressor = self.compressor()
+        for text in self.writer(rows, batch_size, columns):
+            data = compressor.compress(to_bytes(text))
+            if data:
+                yield data
+        yield compressor.flush()
+
+    async def astream(self, rows, batch_size, columns=None):
+        compressor = self.compressor()
+        async for text in self.writer.astream(rows, batch_size, columns):
+            data = compressor.compress(to_bytes(text))
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class ColumnarWriter(BatchWriter):
+    """
+    Arrow IPC stream ('arrow') or Parquet ('parquet'), one record batch or
+    row group per batch of rows. Needs pyarrow (characters.columnar).
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def encoder(self, columns):
+        from .columnar import ColumnarEncoder  # pyarrow is only loaded by the first columnar export
+        if columns is None:
+            raise ValueError("Columnar exports need the export columns (export_columns).")
+        return ColumnarEncoder(self.kind, columns)
+
+    def __call__(self, rows, batch_size, columns=None):
+        encoder = self.encoder(columns)
+        for batch in _batched(rows, batch_size):
+            data = encoder.encode(batch)
+            if data:
+                yield data
+        yield encoder.close()
+
+    async def astream(self, rows, batch_size, columns=None):
+        encoder = self.encoder(columns)
+        async for batch in _abatched(rows, batch_size):
+            data = encoder.encode(batch)
+            if data:
+                yield data
+        yield encoder.close()
+
+
+EXPORT_FORMATS = {
+    'json': ExportFormat('application/json', 'json', JSONArrayWriter(indent=4)),
+    'compact': ExportFormat('application/json', 'json', JSONArrayWriter()),
+    'ndjson': ExportFormat('application/x-ndjson', 'ndjson', NDJSONWriter()),
+    'ndjson.gz': ExportFormat('application/gzip', 'ndjson.gz', GzipWriter(NDJSONWriter())),
+}
+
+if find_spec('pyarrow') is not None:  # Optional: pip install pyarrow
+    EXPORT_FORMATS.update({
+        'arrow': ExportFormat('application/vnd.apache.arrow.stream', 'arrows', ColumnarWriter('arrow')),
+        'parquet': ExportFormat('application/vnd.apache.parquet', 'parquet', ColumnarWriter('parquet')),
+    })
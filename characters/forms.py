@@ -1,25 +1,58 @@
 # characters/forms.py
 from django import forms
+from django.core.exceptions import ValidationError
 from .models import Warrior, Mage, Enemy, Item
+from .validation import BatchValidator
 
-class WarriorForm(forms.ModelForm):
+
+class BatchValidatedModelForm(forms.ModelForm):
+    """
+    ModelForm que comprueba los campos únicos con el mismo BatchValidator que las
+    importaciones (characters/validation.py): una consulta para todos ellos y los
+    mismos mensajes de error que el import JSON y el admin. Las demás restricciones
+    de unicidad (unique_together, UniqueConstraint, unique_for_date...) las sigue
+    comprobando Django.
+    """
+
+    def validate_unique(self):
+        validator = BatchValidator(self._meta.model)
+        # Como ModelForm: no se comprueban los campos que no están en el formulario ni los que ya fallaron
+        data = {
+            attname: getattr(self.instance, attname) for attname in validator.unique_fields
+            if validator.fields[attname].name in self.fields and validator.fields[attname].name not in self.errors
+        }
+        errors = validator.check_unique(self.instance.pk, data)
+        if errors:
+            self._update_errors(ValidationError(errors))
+        if self.has_other_unique_checks():
+            # Django salta los campos que ya tienen error, así que no repite los mensajes de arriba
+            super().validate_unique()
+
+    def has_other_unique_checks(self):
+        opts = self._meta.model._meta
+        return bool(
+            opts.unique_together or opts.total_unique_constraints
+            or any(field.unique_for_date or field.unique_for_month or field.unique_for_year for field in opts.fields)
+        )
+
+class WarriorForm(BatchValidatedModelForm):
     class Meta:
         model = Warrior
         fields = ['name', 'health', 'defense', 'damage']
         # El 'owner' se asignará automáticamente en la vista
 
-class MageForm(forms.ModelForm):
+class MageForm(BatchValidatedModelForm):
     class Meta:
         model = Mage
         fields = ['name', 'health', 'defense', 'magic_damage', 'mana']
         # El 'owner' se asignará automáticamente en la vista
 
-class EnemyForm(forms.ModelForm):
+class EnemyForm(BatchValidatedModelForm):
     class Meta:
         model = Enemy
         fields = ['name', 'health', 'attack', 'defense']
 
-class ItemForm(forms.ModelForm):
+class ItemForm(BatchValidatedModelForm):
     class Meta:
         model = Item
         fields = ['name', 'item_type', 'damage_buff', 'health_restore', 'mana_restore']
\ No newline at end of file
@@ -0,0 +1,513 @@
+# characters/importers.py
+"""
+Import engines used by the JSON import views.
+
+``RowImporter`` keeps the original behaviour: one ``update_or_create`` or
+``create`` per JSON object. ``BulkImporter`` returns the same created/updated
+counts and per-row errors, but works in batches: existing rows are prefetched
+with one query per batch and writes go through ``bulk_create`` and a single
+``executemany`` UPDATE inside one transaction.
+
+``iter_json_array`` feeds both engines straight from the uploaded file, one
+top-level element at a time, so the raw bytes, the decoded text and the parsed
+list never have to sit in memory together.
+
+``run`` imports a whole file in one transaction (all or nothing).
+``run_resumable`` commits it in chunks instead, each together with an
+``ImportCheckpoint`` keyed by the file's hash (``file_digest``), so an import
+that dies halfway is resumed after its last committed chunk when the same
+file is submitted again.
+"""
+import codecs
+import hashlib
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connections, router, transaction
+
+from . import versions
+from .models import ImportCheckpoint
+from .validation import BatchValidator
+
+class NotAJSONArray(ValueError):
+    """The uploaded document is valid so far but is not a top-level list."""
+
+
+class CheckpointConflict(RuntimeError):
+    """Another import of the same file moved its checkpoint."""
+
+
+_NUMBER_CHARS = '0123456789+-.eE'
+
+
+def iter_json_array(chunks, encoding='utf-8'):
+    """
+    Yields the elements of a top-level JSON array read from an iterable of
+    byte chunks (e.g. ``UploadedFile.chunks()``).
+
+    Only the element being parsed and the unread tail of the current chunk are
+    kept in memory. Raises ``json.JSONDecodeError`` on malformed input and
+    ``NotAJSONArray`` if the document does not start with ``[``.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    chunks = iter(chunks)
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buffer = buffer[pos:] + text_decoder.decode(b'', final=True)
+        else:
+            buffer = buffer[pos:] + text_decoder.decode(chunk)
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\n\r':
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == '\ufeff':  # UTF-8 BOM
+        pos += 1
+        skip_whitespace()
+    if pos >= len(buffer):
+        raise json.JSONDecodeError('Expecting value', buffer, pos)
+    if buffer[pos] != '[':
+        raise NotAJSONArray('The JSON file must contain a list of objects.')
+    pos += 1
+
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == ']':
+        pos += 1
+    else:
+        while True:
+            skip_whitespace()
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A number may continue in the next chunk ("12" of "12.5"):
+                # it is complete once something else follows it.
+                truncated = (
+                    isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and not buffer[end:].lstrip(_NUMBER_CHARS)
+                )
+                complete = eof or not truncated
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                fill()
+                continue
+            pos = end
+            yield value
+
+            skip_whitespace()
+            if pos >= len(buffer):
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            if buffer[pos] == ']':
+                pos += 1
+                break
+            if buffer[pos] != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+
+    skip_whitespace()
+    if pos < len(buffer):
+        raise json.JSONDecodeError('Extra data', buffer, pos)
+
+
+def file_digest(chunks):
+    """SHA-256 of a file read as an iterable of byte chunks; identifies it for ``run_resumable``."""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def describe_import_error(exc):
+    """Message shown on the import page when a file cannot be imported at all."""
+    if isinstance(exc, NotAJSONArray):
+        return 'The JSON file must contain a list of objects.'
+    if isinstance(exc, CheckpointConflict):
+        return 'Another import of this file is in progress.'
+    if isinstance(exc, json.JSONDecodeError):
+        return f'Error reading JSON file: {exc}'
+    return f'Unexpected error processing file: {exc}'
+
+
+class ImportResult:
+    """Counters and per-row error messages of an import run."""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+        self.resumed_from = 0  # Objects skipped because an earlier run committed them
+
+    @property
+    def message(self):
+        message = f'Import completed. Created: {self.created}, Updated: {self.updated}.'
+        if self.resumed_from:
+            message += f' Resumed after object {self.resumed_from}.'
+        return message
+
+
+class RelatedCache:
+    """
+    ``pk -> instance`` cache for the target of one ForeignKey column.
+
+    Lives for a single import, so every referenced id is looked up at most
+    once, with one ``in_bulk`` query for all the ids of a batch.
+    """
+
+    def __init__(self, field):
+        self.field = field
+        self.cache = {}
+
+    def to_python(self, value):
+        return self.field.target_field.to_python(value)
+
+    def prefetch(self, values):
+        missing = set()
+        for value in values:
+            try:
+                pk = self.to_python(value)
+            except ValidationError:
+                continue  # Reported by get() for the row that holds it
+            if pk is not None and pk not in self.cache:
+                missing.add(pk)
+        if missing:
+            found = self.field.related_model._default_manager.in_bulk(missing)
+            for pk in missing:
+                self.cache[pk] = found.get(pk)
+
+    def get(self, value):
+        pk = self.to_python(value)
+        if pk is None:
+            return None
+        if pk not in self.cache:
+            self.prefetch([pk])
+        return self.cache[pk]
+
+
+class RowImporter:
+    """Imports JSON objects one at a time (one or two queries per row)."""
+
+    def __init__(self, model, fields_mapping, owner=None, owner_field=None):
+        self.model = model
+        self.fields_mapping = fields_mapping
+        # Owned models (Warrior, Mage): rows without a valid owner_id are
+        # assigned to ``owner``, the user running the import.
+        self.owner = owner
+        self.owner_field = owner_field
+        self.related = {
+            field.attname: RelatedCache(field)
+            for field in model._meta.concrete_fields
+            if field.is_relation and field.attname in fields_mapping.values()
+        }
+
+    def build_instance_data(self, row_num, item_data_json, errors):
+        """Maps a JSON object to model field values using ``fields_mapping``."""
+        if not isinstance(item_data_json, dict):
+            raise ValueError('Each element must be a JSON object.')
+
+        instance_data = {}
+        for json_key, model_field in self.fields_mapping.items():
+            if json_key in item_data_json:
+                # Foreign keys are only taken when the JSON key matches the
+                # '<field>_id' attribute name (e.g. 'owner_id').
+                if model_field.endswith('_id') and json_key == model_field:
+                    instance_data[model_field] = item_data_json[json_key]
+                elif not model_field.endswith('_id'):
+                    instance_data[model_field] = item_data_json[json_key]
+
+        # Special handling for JSONField (like 'extra_attributes')
+        if 'extra_attributes' in self.fields_mapping.values() and 'extra_attributes' in item_data_json:
+            attr_value = item_data_json['extra_attributes']
+            if isinstance(attr_value, str):
+                # If it comes as a string, try parsing it (might be stringified JSON)
+                try:
+                    instance_data['extra_attributes'] = json.loads(attr_value)
+                except json.JSONDecodeError:
+                    instance_data['extra_attributes'] = {}  # Default to empty dict on parse error
+                    errors.append(f"Object {row_num + 1}: Invalid JSON in 'extra_attributes'.")
+            else:  # If it's already a JSON object (dict/list)
+                instance_data['extra_attributes'] = attr_value
+        return instance_data
+
+    def resolve_related(self, row_num, instance_data, errors):
+        """Checks the ForeignKey ids of a row against the per-import cache."""
+        for attname, cache in self.related.items():
+            if attname not in instance_data:
+                continue
+            value = instance_data[attname]
+            if cache.get(value) is not None or (value is None and cache.field.null):
+                continue
+            if cache.field.name == self.owner_field and self.owner is not None:
+                errors.append(f"Object {row_num + 1}: Owner with ID {value} not found. Assigning to current admin.")
+                del instance_data[attname]
+            else:
+                opts = cache.field.related_model._meta
+                raise ValidationError(f'{opts.verbose_name.capitalize()} with ID {value} not found.')
+
+        if self.owner_field and self.owner is not None:
+            owner_attname = self.model._meta.get_field(self.owner_field).attname
+            instance_data.setdefault(owner_attname, self.owner.pk)
+        return instance_data
+
+    def row_error(self, row_num, item_data_json, exc):
+        if isinstance(exc, ValidationError):
+            exc = ' '.join(exc.messages)
+        return f"Object {row_num + 1}: Error processing '{item_data_json}': {exc}"
+
+    def clean_instance_data(self, instance_data):
+        """Hook for validating a row; the original importer leaves it to the database."""
+        return instance_data
+
+    def import_row(self, row_num, item_data_json, result):
+        instance_data = self.build_instance_data(row_num, item_data_json, result.errors)
+        instance_data = self.clean_instance_data(self.resolve_related(row_num, instance_data, result.errors))
+
+        # Use 'id' for update_or_create
+        obj_id = instance_data.pop('id', None)
+        if obj_id is not None:  # If ID is provided, try to update
+            obj, created = self.model.objects.update_or_create(pk=obj_id, defaults=instance_data)
+            if created:
+                result.created += 1
+            else:
+                result.updated += 1
+        else:  # If no ID, create a new object
+            self.model.objects.create(**instance_data)
+            result.created += 1
+
+    def import_rows(self, rows, result):
+        for row_num, item_data_json in rows:
+            try:
+                # Savepoint per row: a failing row must not break an
+                # enclosing transaction (benchmarks, bulk fallback).
+                with transaction.atomic():
+                    self.import_row(row_num, item_data_json, result)
+            except Exception as e:
+                result.errors.append(self.row_error(row_num, item_data_json, e))
+
+    def import_chunk(self, rows, result):
+        self.import_rows(rows, result)
+
+    def run(self, rows, result=None):
+        result = result or ImportResult()
+        # ``rows`` may be a lazy parser: if it fails halfway nothing is kept,
+        # as when the whole file used to be parsed before importing.
+        with transaction.atomic():
+            self.import_chunk(enumerate(rows), result)
+        return result
+
+    def run_resumable(self, rows, file_hash, chunk_size=5000):
+        """
+        Imports ``rows`` in chunks of ``chunk_size`` objects, each committed
+        with the file's checkpoint. The objects an earlier run of the same
+        file committed are parsed but not imported again, and the counts and
+        errors of that run are carried over. If ``rows`` fails halfway (e.g.
+        malformed JSON) the committed chunks are kept.
+        """
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            model=self.model._meta.label_lower, file_hash=file_hash,
+        )
+        result = ImportResult()
+        result.resumed_from = checkpoint.rows_done
+        result.created, result.updated = checkpoint.created_count, checkpoint.updated_count
+        result.errors = list(checkpoint.errors)
+
+        rows = enumerate(rows)
+        for _ in islice(rows, checkpoint.rows_done):
+            pass
+        while chunk := list(islice(rows, chunk_size)):
+            with transaction.atomic():
+                chunk_result = ImportResult()
+                self.import_chunk(chunk, chunk_result)
+                result.created += chunk_result.created
+                result.updated += chunk_result.updated
+                result.errors += chunk_result.errors
+                # Compare-and-set: a concurrent run of the same file rolls this chunk back
+                moved = ImportCheckpoint.objects.filter(
+                    pk=checkpoint.pk, rows_done=checkpoint.rows_done,
+                ).update(
+                    rows_done=chunk[-1][0] + 1, created_count=result.created,
+                    updated_count=result.updated, errors=result.errors,
+                )
+                if not moved:
+                    raise CheckpointConflict(file_hash)
+                checkpoint.rows_done = chunk[-1][0] + 1
+        checkpoint.delete()
+        return result
+
+def bulk_update(model, objs, field_names):
+    """
+    ``UPDATE ... WHERE pk = %s`` sent once through ``executemany``.
+
+    ``QuerySet.bulk_update`` builds a ``CASE WHEN`` per field and row,
+    which costs more than the per-row loop it replaces on large batches.
+    """
+    opts = model._meta
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    fields = [opts.get_field(name) for name in field_names]
+    sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+        quote(opts.db_table),
+        ', '.join(f'{quote(field.column)} = %s' for field in fields),
+        quote(opts.pk.column),
+    )
+    params = [
+        [field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields]
+        + [opts.pk.get_db_prep_save(obj.pk, connection)]
+        for obj in objs
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+class BulkImporter(RowImporter):
+    """
+    Set-based importer.
+
+    Rows are read in batches of ``batch_size``. Each batch is validated as a
+    whole by ``characters.validation.BatchValidator`` (field validators once
+    per distinct value, unique fields in one query), existing rows are
+    fetched with a single ``in_bulk`` call and the result is written with one
+    ``bulk_create`` and one batched UPDATE. If the database still rejects a
+    batch, that batch is replayed row by row so the error report points at
+    the offending objects.
+    """
+
+    def __init__(self, model, fields_mapping, batch_size=500, **kwargs):
+        super().__init__(model, fields_mapping, **kwargs)
+        self.batch_size = batch_size
+        self.validator = BatchValidator(model)
+        self.tracked = versions.is_tracked(model)
+
+    def import_chunk(self, rows, result):
+        rows = iter(rows)
+        while batch := list(islice(rows, self.batch_size)):
+            self.import_batch(batch, result)
+
+    def clean_instance_data(self, instance_data):
+        """Converts and validates the values of a row like ``full_clean()`` would."""
+        cleaned, errors = self.validator.clean(instance_data)
+        if errors:
+            raise ValidationError(errors)
+        return cleaned
+
+    def prepare_batch(self, batch, errors):
+        """Returns ``(row_num, item_data_json, pk, instance_data)`` for valid rows."""
+        pk_field = self.model._meta.pk
+        mapped = []
+        for row_num, item_data_json in batch:
+            try:
+                mapped.append((row_num, item_data_json, self.build_instance_data(row_num, item_data_json, errors)))
+            except Exception as e:
+                errors.append(self.row_error(row_num, item_data_json, e))
+
+        # One in_bulk per ForeignKey column for the ids not seen in earlier batches
+        for attname, cache in self.related.items():
+            cache.prefetch(data[attname] for _, _, data in mapped if attname in data)
+
+        prepared = []
+        for row_num, item_data_json, instance_data in mapped:
+            try:
+                instance_data = self.clean_instance_data(
+                    self.resolve_related(row_num, instance_data, errors)
+                )
+                pk = instance_data.pop(pk_field.attname, None)
+                instance_data.pop('pk', None)
+            except Exception as e:
+                errors.append(self.row_error(row_num, item_data_json, e))
+                continue
+            prepared.append((row_num, item_data_json, pk, instance_data))
+        return prepared
+
+    def import_batch(self, batch, result):
+        batch_errors = []
+        prepared = self.prepare_batch(batch, batch_errors)
+        existing = self.model.objects.in_bulk([pk for _, _, pk, _ in prepared if pk is not None])
+
+        # Current holder of every unique value touched by this batch, so that
+        # collisions are detected in file order without a query per row.
+        self.validator.reset()
+        self.validator.remember(existing.values())
+        self.validator.prefetch(data for _, _, _, data in prepared)
+
+        pending = {}        # pk -> instance already planned in this batch
+        to_create = []
+        to_update = {}
+        update_fields = set()
+        created = updated = 0
+
+        for row_num, item_data_json, pk, instance_data in prepared:
+            if pk is not None and pk in pending:
+                obj, is_new = pending[pk], False
+            elif pk is not None and pk in existing:
+                obj, is_new = existing[pk], False
+            else:
+                obj, is_new = self.model(pk=pk, **instance_data), True
+
+            key = pk if pk is not None else object()
+            unique_errors = self.validator.check_unique(
+                key, {name: getattr(obj, name) for name in self.validator.unique_fields} if is_new else instance_data
+            )
+            if unique_errors:
+                batch_errors.append(self.row_error(row_num, item_data_json, ValidationError(unique_errors)))
+                continue
+
+            if is_new:
+                to_create.append(obj)
+                created += 1
+            else:
+                for name, value in instance_data.items():
+                    setattr(obj, name, value)
+                if pk not in pending:
+                    to_update[pk] = obj
+                update_fields.update(instance_data)
+                updated += 1
+            if pk is not None:
+                pending[pk] = obj
+
+        if self.tracked and (to_create or (to_update and update_fields)):
+            # bulk writes skip save(): stamp the batch with one new table version
+            versions.stamp(self.model, [*to_create, *to_update.values()])
+            update_fields.add('change_version')
+        try:
+            with transaction.atomic():
+                # Updates first: a rename may free a name that a new row takes.
+                if to_update and update_fields:
+                    self.bulk_update(to_update.values(), sorted(update_fields))
+                if to_create:
+                    self.model.objects.bulk_create(to_create, batch_size=self.batch_size)
+        except DatabaseError:
+            # Something the batch validation did not anticipate: replay the
+            # batch row by row so every failing object gets its own message.
+            self.import_rows(batch, result)
+            return
+
+        result.created += created
+        result.updated += updated
+        result.errors.extend(sorted(batch_errors, key=_error_row_number))
+
+    def bulk_update(self, objs, field_names):
+        bulk_update(self.model, objs, field_names)
+
+
+def _error_row_number(message):
+    # "Object <n>: ..." -> n, keeps the report in file order.
+    try:
+        return int(message.split(':', 1)[0].rsplit(' ', 1)[1])
+    except (IndexError, ValueError):
+        return 0
@@ -0,0 +1,306 @@
+# characters/jobs.py
+"""
+In-process background jobs for the JSON import/export views.
+
+A ``Job`` row records what to run; the work itself happens in a
+``ThreadPoolExecutor`` owned by this process, so no broker is needed. Uploads
+are copied to ``JOBS_ROOT`` before the request ends and exports are written
+there too, to be downloaded once the job is done.
+
+The progress of a running job lives in the ``Job`` row, so a status poll
+answered by any process sees it. It is not written by the job itself: imports
+run inside transactions (one per chunk, or a single one), which would hide the
+update until they commit. Instead a heartbeat thread, one per process, saves
+the progress of the jobs running there every ``HEARTBEAT_INTERVAL`` seconds
+from its own connection, and stamps ``heartbeat_at`` on them and on the jobs
+queued behind them. A pending or running job whose heartbeat is older than
+``JOBS_STALE_AFTER`` lost its process (a restart, a crash) and is marked as
+failed by ``fail_stale_jobs``, which ``manage.py cleanup_jobs`` runs over all
+jobs and the status endpoint over the polled job once ``is_stale`` finds it
+abandoned (a poll of a live job writes nothing). Chunked imports also record their committed objects in an
+``ImportCheckpoint``, so such a job can be resumed by submitting the same file
+again.
+
+``clean_up_files`` (also run by ``cleanup_jobs``) deletes the files in
+``JOBS_ROOT`` of jobs finished more than ``JOBS_RESULT_TTL`` ago and those
+left behind by jobs that no longer exist or died.
+
+Settings:
+    JOBS_ROOT         directory for uploaded and exported files
+    JOBS_MAX_WORKERS  worker threads; 0 runs jobs inline (useful in tests)
+    JOBS_STALE_AFTER  seconds without a heartbeat before a job counts as dead
+    JOBS_RESULT_TTL   seconds a finished job keeps its export file
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .exporters import EXPORT_FORMATS, iter_rows, to_bytes
+from .importers import describe_import_error, file_digest
+from .models import Job
+
+READ_CHUNK_SIZE = 64 * 1024
+PROGRESS_EVERY = 1000  # Export rows between progress updates
+HEARTBEAT_INTERVAL = 2  # Seconds between progress/heartbeat writes
+STALE_MESSAGE = 'The job stopped: the process running it exited before it finished.'
+JOB_FILE_RE = re.compile(r'^job-(\d+)-')
+
+_executor = None
+_executor_lock = threading.Lock()
+_active = {}  # job id -> percent (None while queued), for the jobs of this process's executor
+
+
+def get_jobs_root():
+    root = getattr(settings, 'JOBS_ROOT', os.path.join(settings.BASE_DIR, 'jobs'))
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'JOBS_MAX_WORKERS', 2),
+                thread_name_prefix='characters-job',
+            )
+            threading.Thread(target=_beat, name='characters-job-heartbeat', daemon=True).start()
+        return _executor
+
+
+def _beat():
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL)
+        save_heartbeats()
+
+
+def save_heartbeats():
+    """Saves the progress of this process's running jobs and stamps their heartbeat (and the queued ones')."""
+    active = dict(_active)
+    if not active:
+        return
+    now = timezone.now()
+    try:
+        queued = [pk for pk, percent in active.items() if percent is None]
+        if queued:
+            Job.objects.filter(pk__in=queued, status=Job.PENDING).update(heartbeat_at=now)
+        for pk, percent in active.items():
+            if percent is not None:
+                Job.objects.filter(pk=pk, status=Job.RUNNING).update(progress=percent, heartbeat_at=now)
+    except DatabaseError:
+        # SQLite: an import's transaction can hold the write lock past busy_timeout; retried on the next beat
+        pass
+
+
+def _set_progress(job_id, percent):
+    # Only jobs of the executor are tracked; inline jobs hold their request until they finish
+    if job_id in _active:
+        _active[job_id] = percent
+
+
+def _stale_limit(now):
+    return now - timedelta(seconds=getattr(settings, 'JOBS_STALE_AFTER', 15 * 60))
+
+
+def is_stale(job):
+    """True if ``job`` is pending or running without a heartbeat in ``JOBS_STALE_AFTER`` seconds."""
+    return (job.status in (Job.PENDING, Job.RUNNING)
+            and (job.heartbeat_at or job.created_at) < _stale_limit(timezone.now()))
+
+
+def fail_stale_jobs(queryset=None):
+    """
+    Marks as failed the pending and running jobs (of ``queryset``, or all)
+    without a heartbeat in ``JOBS_STALE_AFTER`` seconds: their process is
+    gone. Returns how many.
+    """
+    now = timezone.now()
+    limit = _stale_limit(now)
+    queryset = Job.objects.all() if queryset is None else queryset
+    return queryset.filter(
+        Q(heartbeat_at__lt=limit) | Q(heartbeat_at__isnull=True, created_at__lt=limit),
+        status__in=[Job.PENDING, Job.RUNNING],
+    ).update(status=Job.FAILED, finished_at=now, message=STALE_MESSAGE)
+
+
+def clean_up_files(ttl=None):
+    """
+    Deletes the files in JOBS_ROOT of jobs finished more than ``ttl`` seconds
+    ago (``JOBS_RESULT_TTL`` by default), of finished jobs that still have
+    their upload, and of jobs that no longer exist. The exports deleted are
+    cleared from their jobs. Returns the number of files deleted.
+    """
+    ttl = getattr(settings, 'JOBS_RESULT_TTL', 7 * 24 * 3600) if ttl is None else ttl
+    limit = timezone.now() - timedelta(seconds=ttl)
+    root = get_jobs_root()
+    files = {}  # job id -> file names
+    for name in os.listdir(root):
+        match = JOB_FILE_RE.match(name)
+        if match:
+            files.setdefault(int(match.group(1)), []).append(name)
+    found = {
+        job.pk: job
+        for job in Job.objects.filter(pk__in=files).only('status', 'finished_at', 'source_file', 'result_file')
+    }
+    deleted, expired = 0, []
+    for pk, names in files.items():
+        job = found.get(pk)
+        if job is not None and job.status in (Job.PENDING, Job.RUNNING):
+            continue
+        for name in names:
+            path = os.path.join(root, name)
+            if job is not None and path == job.result_file:
+                if job.finished_at and job.finished_at >= limit:
+                    continue
+                expired.append(pk)
+            os.remove(path)
+            deleted += 1
+    Job.objects.filter(pk__in=expired).update(result_file='')
+    return deleted
+
+
+def _view_path(view):
+    return f'{type(view).__module__}.{type(view).__qualname__}'
+
+
+def _enqueue(job):
+    if getattr(settings, 'JOBS_MAX_WORKERS', 2) == 0:
+        transaction.on_commit(lambda: run_job(job.pk))
+    else:
+        # on_commit: the worker must be able to read the Job row
+        transaction.on_commit(lambda: _submit(job.pk))
+
+
+def _submit(job_id):
+    executor = get_executor()
+    _active[job_id] = None
+    executor.submit(_run_in_thread, job_id)
+
+
+def submit_import(view, user, uploaded_file, all_or_nothing=False):
+    """Copies the upload to JOBS_ROOT and queues its import."""
+    job = Job.objects.create(kind=Job.KIND_IMPORT, view=_view_path(view), owner=user,
+                             filename=uploaded_file.name, all_or_nothing=all_or_nothing)
+    path = os.path.join(get_jobs_root(), f'job-{job.pk}-upload.json')
+    with open(path, 'wb') as destination:
+        for chunk in uploaded_file.chunks(READ_CHUNK_SIZE):
+            destination.write(chunk)
+    job.source_file = path
+    job.save(update_fields=['source_file'])
+    _enqueue(job)
+    return job
+
+
+def submit_export(view, user, format_name):
+    export_format = EXPORT_FORMATS[format_name]
+    job = Job.objects.create(kind=Job.KIND_EXPORT, view=_view_path(view), owner=user,
+                             export_format=format_name, filename=export_format.filename(view.filename))
+    _enqueue(job)
+    return job
+
+
+def status_payload(job):
+    """JSON-serializable state of a job, as returned by the status endpoint."""
+    payload = {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': 100 if job.status == Job.DONE else job.progress,
+        'created': job.created_count,
+        'updated': job.updated_count,
+        'errors': job.errors,
+        'message': job.message,
+        'status_url': reverse('characters:job_status', args=[job.pk]),
+        'download_url': None,
+    }
+    if job.status == Job.DONE and job.result_file:
+        payload['download_url'] = reverse('characters:job_download', args=[job.pk])
+    return payload
+
+
+def _run_in_thread(job_id):
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        _active.pop(job_id, None)
+        connection.close()
+
+
+def run_job(job_id):
+    # Jobs failed by fail_stale_jobs while queued are not run
+    if not Job.objects.filter(pk=job_id, status=Job.PENDING).update(
+        status=Job.RUNNING, heartbeat_at=timezone.now()
+    ):
+        return
+    job = Job.objects.get(pk=job_id)
+    _set_progress(job_id, 0)
+    try:
+        view = import_string(job.view)()
+        if job.kind == Job.KIND_IMPORT:
+            _run_import(job, view)
+        else:
+            _run_export(job, view)
+        job.status = Job.DONE
+        job.progress = 100
+    except Exception as e:
+        job.status = Job.FAILED
+        job.message = describe_import_error(e) if job.kind == Job.KIND_IMPORT else str(e)
+    job.finished_at = timezone.now()
+    job.save()
+
+
+def _run_import(job, view):
+    total = os.path.getsize(job.source_file) or 1
+
+    def chunks(source):
+        read = 0
+        for chunk in iter(lambda: source.read(READ_CHUNK_SIZE), b''):
+            read += len(chunk)
+            _set_progress(job.pk, min(99, read * 100 // total))
+            yield chunk
+
+    try:
+        with open(job.source_file, 'rb') as source:
+            file_hash = file_digest(iter(lambda: source.read(READ_CHUNK_SIZE), b''))
+            source.seek(0)
+            result = view.run_import(job.owner, lambda: chunks(source), job.all_or_nothing, file_hash)
+    finally:
+        os.remove(job.source_file)
+    job.created_count = result.created
+    job.updated_count = result.updated
+    job.errors = result.errors
+    job.message = result.message
+
+
+def _run_export(job, view):
+    export_format = EXPORT_FORMATS[job.export_format]
+    queryset = view.get_export_queryset()
+    total = queryset.count() or 1
+
+    def rows():
+        for written, row in enumerate(iter_rows(queryset, view.fields_to_export, view.export_chunk_size), 1):
+            if written % PROGRESS_EVERY == 0:
+                _set_progress(job.pk, min(99, written * 100 // total))
+            yield row
+
+    path = os.path.join(get_jobs_root(), f'job-{job.pk}-{job.filename}')
+    try:
+        with open(path, 'wb') as destination:
+            for chunk in view.iter_export(export_format, rows()):
+                destination.write(to_bytes(chunk))
+    except BaseException:
+        os.remove(path)
+        raise
+    job.result_file = path
+    job.message = 'Export completed.'
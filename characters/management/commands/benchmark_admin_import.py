@@ -0,0 +1,92 @@
+# characters/management/commands/benchmark_admin_import.py
+import time
+
+import tablib
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from import_export.resources import modelresource_factory
+
+from characters.benchmarks import QueryCounter, alpha_name
+from characters.models import Warrior
+from characters.resources import WarriorResource
+
+PREFIX = 'Bench Admin'
+OWNER_PREFIX = 'bench-admin-owner-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la importación del admin (django-import-export) de un CSV de guerreros: el recurso "
+        "por defecto de la librería (fila a fila, un owner por consulta) frente a WarriorResource "
+        "(modo bulk, filas existentes y owners cargados una vez por importación), y la vista previa "
+        "(dry run) de WarriorResource. Los datos de prueba se confirman antes de cada medición, como "
+        "los de una importación real (sembrados en la misma transacción, SQLite ralentiza cada lote), "
+        "y se borran al final: úsalo con DB_NAME=/tmp/bench.sqlite3 tras un migrate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--owners', type=int, default=100)
+        parser.add_argument('--update-ratio', type=float, default=0.5,
+                            help="Fracción de filas que actualizan guerreros existentes.")
+        parser.add_argument('--unchanged-ratio', type=float, default=0.2,
+                            help="Fracción de las actualizaciones que no cambian nada (se omiten).")
+        parser.add_argument('--skip-default', action='store_true',
+                            help="No mide el recurso por defecto (lento con muchas filas).")
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError("Hace falta una base de datos en archivo (DB_NAME=...), no en memoria.")
+        fields = WarriorResource._meta.fields
+        resources = [('bulk', WarriorResource, False), ('bulk dry run', WarriorResource, True)]
+        if not options['skip_default']:
+            default = modelresource_factory(Warrior, meta_options={'fields': fields})
+            resources.insert(0, ('por defecto', default, False))
+
+        for label, resource_class, dry_run in resources:
+            try:
+                with transaction.atomic():
+                    dataset = self.build_dataset(fields, options)
+                queries = QueryCounter()
+                with connection.execute_wrapper(queries):
+                    start = time.perf_counter()
+                    result = resource_class().import_data(dataset, dry_run=dry_run, use_transactions=True)
+                    elapsed = time.perf_counter() - start
+            finally:
+                self.clean_up()
+
+            totals = result.totals
+            self.stdout.write(
+                f"{label:>12}: {len(dataset)} filas en {elapsed:.2f}s ({len(dataset) / elapsed:,.0f} filas/s, "
+                f"{queries.count} consultas) - nuevas={totals['new']} actualizadas={totals['update']} "
+                f"omitidas={totals['skip']} errores={totals['error'] + totals['invalid']}"
+            )
+
+    def clean_up(self):
+        # Sin pasar por delete(): una lápida por guerrero de prueba no aporta nada
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(Warrior._meta.db_table)} WHERE name LIKE %s',
+                [f'{PREFIX} %'],
+            )
+            get_user_model().objects.filter(username__startswith=OWNER_PREFIX).delete()
+
+    def build_dataset(self, fields, options):
+        rows = options['rows']
+        existing = int(rows * options['update_ratio'])
+        unchanged = int(existing * options['unchanged_ratio'])
+        owners = get_user_model().objects.bulk_create(
+            [get_user_model()(username=f'{OWNER_PREFIX}{i}') for i in range(options['owners'])]
+        )
+        seeded = Warrior.objects.bulk_create(
+            [Warrior(name=alpha_name(f'{PREFIX} Seed', i), owner=owners[i % len(owners)]) for i in range(existing)],
+            batch_size=1000,
+        )
+        data = tablib.Dataset(headers=list(fields))
+        for i, warrior in enumerate(seeded):
+            health = warrior.health if i < unchanged else warrior.health + 5
+            data.append([warrior.pk, warrior.owner_id, warrior.name, health, warrior.damage, warrior.defense])
+        for i in range(rows - existing):
+            data.append(['', owners[i % len(owners)].pk, alpha_name(f'{PREFIX} New', i), 90, 15, 8])
+        return tablib.Dataset().load(data.export('csv'), format='csv')
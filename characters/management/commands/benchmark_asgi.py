@@ -0,0 +1,192 @@
+# characters/management/commands/benchmark_asgi.py
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from characters.benchmarks import alpha_name
+from characters.models import Warrior
+from .benchmark_import import staff_session
+
+PREFIX = 'Bench Asgi'
+RESULT_MARK = 'RESULT '
+
+
+class ThreadPeak:
+    """Samples threading.active_count() in the background and keeps the maximum."""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(0.005):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara WSGI y ASGI sirviendo a muchos clientes lentos a la vez: cada cliente pide una "
+        "exportación o una lista y tarda --delay segundos en leer cada trozo de la respuesta. "
+        "WSGI atiende con un número fijo de hilos (como gunicorn --threads) y cada cliente ocupa "
+        "uno mientras lee; ASGI usa las vistas async (ASYNC_VIEWS=1) y un cliente lento solo "
+        "ocupa una corrutina. Cada modo se ejecuta en su propio proceso con los manejadores de "
+        "Django, sin servidor HTTP de por medio. El máximo de hilos vivos también se informa: el "
+        "manejador ASGI de Django ejecuta el middleware síncrono y las consultas del ORM async en "
+        "un hilo por petición, pero esos hilos no son un grupo fijo que limite cuántos clientes "
+        "se atienden a la vez. Escribe en la base de datos (usuario, sesión y "
+        "guerreros de prueba, borrados al final): úsalo con DB_NAME=/tmp/bench.sqlite3 tras un migrate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100, help="Clientes concurrentes.")
+        parser.add_argument('--threads', type=int, default=8, help="Hilos del servidor WSGI.")
+        parser.add_argument('--delay', type=float, default=0.5,
+                            help="Segundos que tarda un cliente en leer cada trozo de la respuesta.")
+        parser.add_argument('--rows', type=int, default=2000, help="Guerreros creados para exportar.")
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="URL a pedir (se puede repetir; los clientes se reparten entre ellas).")
+        # Uso interno: el proceso hijo que mide un modo
+        parser.add_argument('--child', choices=['wsgi', 'asgi'], help="(interno)")
+        parser.add_argument('--cookie', help="(interno)")
+
+    def handle(self, *args, **options):
+        options['paths'] = options['paths'] or [
+            '/characters/warrior/export/?format=ndjson',
+            '/characters/list/?scope=all',
+        ]
+        if options['child']:
+            return self.run_child(options)
+
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError("Hace falta una base de datos en archivo (DB_NAME=...), no en memoria.")
+
+        with staff_session('bench_asgi') as (user, cookie):
+            Warrior.objects.bulk_create(
+                [Warrior(name=alpha_name(PREFIX, i), owner=user) for i in range(options['rows'])],
+                batch_size=1000,
+            )
+            for mode in ('wsgi', 'asgi'):
+                result = self.run_mode(mode, cookie, options)
+                label = f"WSGI ({options['threads']} hilos)" if mode == 'wsgi' else 'ASGI'
+                self.stdout.write(
+                    f"{label}: "
+                    f"{result['ok']}/{result['clients']} respuestas correctas en {result['elapsed']:.2f}s "
+                    f"({result['clients'] / result['elapsed']:,.1f} peticiones/s), "
+                    f"latencia p50 {result['p50'] * 1000:.0f} ms, p95 {result['p95'] * 1000:.0f} ms, "
+                    f"máximo de hilos vivos {result['peak_threads']}"
+                )
+
+    def run_mode(self, mode, cookie, options):
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_asgi', '--child', mode,
+            '--cookie', cookie, '--clients', str(options['clients']),
+            '--threads', str(options['threads']), '--delay', str(options['delay']),
+        ]
+        for path in options['paths']:
+            command += ['--path', path]
+        # La URLconf elige las vistas async o síncronas al importarse
+        env = {**os.environ, 'ASYNC_VIEWS': '1' if mode == 'asgi' else '0'}
+        child = subprocess.run(command, env=env, capture_output=True, text=True)
+        for line in reversed(child.stdout.splitlines()):
+            if line.startswith(RESULT_MARK):
+                return json.loads(line[len(RESULT_MARK):])
+        raise CommandError(f"El proceso {mode} falló:\n{child.stderr[-2000:]}")
+
+    # --- Proceso hijo ---
+
+    def run_child(self, options):
+        cookie = options['cookie']
+        with ThreadPeak() as threads:
+            start = time.perf_counter()
+            if options['child'] == 'wsgi':
+                results = self.run_wsgi(options, cookie, start)
+            else:
+                results = asyncio.run(self.run_asgi(options, cookie, start))
+            elapsed = time.perf_counter() - start
+        latencies = sorted(latency for _, latency in results)
+        self.stdout.write(RESULT_MARK + json.dumps({
+            'clients': len(results),
+            'ok': sum(status == 200 for status, _ in results),
+            'elapsed': elapsed,
+            'p50': latencies[len(latencies) // 2],
+            'p95': latencies[int(len(latencies) * 0.95)],
+            'peak_threads': threads.peak,
+        }))
+
+    def run_wsgi(self, options, cookie, start):
+        handler = WSGIHandler()
+        paths = options['paths']
+
+        def client(number):
+            path, _, query = paths[number % len(paths)].partition('?')
+            environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+                       'HTTP_HOST': 'localhost', 'HTTP_COOKIE': cookie}
+            setup_testing_defaults(environ)
+            status = []
+            body = handler(environ, lambda line, headers, exc_info=None: status.append(int(line.split()[0])))
+            try:
+                for chunk in body:
+                    time.sleep(options['delay'])  # El hilo espera con el cliente
+            finally:
+                body.close()
+            return status[0], time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            return list(pool.map(client, range(options['clients'])))
+
+    async def run_asgi(self, options, cookie, start):
+        handler = ASGIHandler()
+        paths = options['paths']
+
+        async def client(number):
+            path, _, query = paths[number % len(paths)].partition('?')
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+                'root_path': '', 'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+                'client': ('127.0.0.1', 10000 + number), 'server': ('localhost', 80),
+            }
+            done = asyncio.Event()
+            requested = False
+            status = []
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif message['type'] == 'http.response.body' and message.get('body'):
+                    await asyncio.sleep(options['delay'])  # Solo espera esta corrutina
+
+            await handler(scope, receive, send)
+            done.set()
+            return status[0], time.perf_counter() - start
+
+        return await asyncio.gather(*(client(number) for number in range(options['clients'])))
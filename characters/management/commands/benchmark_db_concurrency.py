@@ -0,0 +1,143 @@
+# characters/management/commands/benchmark_db_concurrency.py
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test.utils import override_settings
+
+from characters.benchmarks import alpha_name
+from characters.importers import BulkImporter
+from characters.models import Enemy
+from characters.views import EnemyImportView
+
+PREFIX = 'Bench Conc'
+
+
+class Command(BaseCommand):
+    help = (
+        "Lanza importaciones y ediciones en paralelo (hilos con su propia conexión) contra la "
+        "base de datos configurada y mide filas escritas por segundo, latencia por transacción "
+        "y errores \"database is locked\". Escribe de verdad (hace commit): úsalo sobre una base "
+        "de datos de pruebas, p. ej. DB_NAME=/tmp/bench.sqlite3 tras un migrate. Las filas "
+        "creadas se borran al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Hilos importando a la vez.")
+        parser.add_argument('--imports', type=int, default=20, help="Importaciones por hilo.")
+        parser.add_argument('--rows', type=int, default=200, help="Filas por importación.")
+        parser.add_argument('--editors', type=int, default=2, help="Hilos editando enemigos uno a uno.")
+        parser.add_argument('--edits', type=int, default=200, help="Ediciones por hilo editor.")
+        parser.add_argument('--compare', action='store_true',
+                            help="SQLite: mide primero con los valores por defecto y después con el perfil ajustado.")
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError("Hace falta una base de datos en archivo (DB_NAME=...), no en memoria.")
+
+        if options['compare'] and connection.vendor == 'sqlite':
+            profiles = [
+                ('SQLite por defecto', {'journal_mode': 'DELETE'}, None),
+                ('perfil ajustado', settings.SQLITE_TUNED_PRAGMAS, 'IMMEDIATE'),
+            ]
+        else:
+            profiles = [('perfil actual', None, None)]
+
+        for label, pragmas, transaction_mode in profiles:
+            if pragmas is None:
+                self.run_profile(label, options)
+                continue
+            db_options = connections.settings['default']['OPTIONS']
+            saved_options = dict(db_options)
+            db_options.pop('transaction_mode', None)
+            if transaction_mode:
+                db_options['transaction_mode'] = transaction_mode
+            try:
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    connection.close()  # Las conexiones nuevas toman el perfil
+                    self.run_profile(label, options)
+            finally:
+                db_options.clear()
+                db_options.update(saved_options)
+                connection.close()
+
+    def run_profile(self, label, options):
+        Enemy.objects.filter(name__startswith=PREFIX).delete()
+        edited = Enemy.objects.bulk_create(
+            [Enemy(name=alpha_name(f'{PREFIX} Edit', i)) for i in range(max(options['editors'], 1) * 10)]
+        )
+        stats = {'rows': 0, 'transactions': 0, 'locked': 0, 'other_errors': 0, 'latencies': []}
+        lock = threading.Lock()
+
+        def record(rows, elapsed, locked=0, failed=False):
+            with lock:
+                stats['latencies'].append(elapsed)
+                stats['locked'] += locked
+                if failed and not locked:
+                    stats['other_errors'] += 1
+                if not failed:
+                    stats['rows'] += rows
+                    stats['transactions'] += 1
+
+        def importer(worker):
+            bulk = BulkImporter(Enemy, EnemyImportView.fields_mapping)
+            try:
+                for run in range(options['imports']):
+                    first = (worker * options['imports'] + run) * options['rows']
+                    data = [
+                        {'name': alpha_name(f'{PREFIX} Imp', first + i), 'health': 40, 'attack': 10, 'defense': 3}
+                        for i in range(options['rows'])
+                    ]
+                    start = time.perf_counter()
+                    try:
+                        result = bulk.run(data)
+                    except OperationalError as e:
+                        record(0, time.perf_counter() - start, locked='locked' in str(e), failed=True)
+                        continue
+                    # Un bloqueo dentro del lote acaba como errores por fila (reintento fila a fila)
+                    locked = sum('locked' in error for error in result.errors)
+                    record(result.created + result.updated, time.perf_counter() - start,
+                           locked=locked, failed=bool(result.errors))
+            finally:
+                connection.close()
+
+        def editor(worker):
+            mine = edited[worker::max(options['editors'], 1)]
+            try:
+                for edit in range(options['edits']):
+                    start = time.perf_counter()
+                    try:
+                        enemy = Enemy.objects.get(pk=mine[edit % len(mine)].pk)
+                        enemy.health += 1
+                        enemy.save()
+                    except OperationalError as e:
+                        record(0, time.perf_counter() - start, locked='locked' in str(e), failed=True)
+                        continue
+                    record(1, time.perf_counter() - start)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=importer, args=(w,)) for w in range(options['workers'])]
+        threads += [threading.Thread(target=editor, args=(w,)) for w in range(options['editors'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(stats['latencies']) or [0]
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode' if connection.vendor == 'sqlite' else 'SELECT 1')
+            mode = cursor.fetchone()[0]
+        self.stdout.write(
+            f"{label}{f' (journal_mode={mode})' if connection.vendor == 'sqlite' else ''}: "
+            f"{stats['rows']} filas en {elapsed:.2f}s ({stats['rows'] / elapsed:,.0f} filas/s), "
+            f"{stats['transactions']} transacciones correctas, "
+            f"{stats['locked']} errores \"database is locked\", {stats['other_errors']} otros errores; "
+            f"latencia p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms"
+        )
+        Enemy.objects.filter(name__startswith=PREFIX).delete()
@@ -0,0 +1,87 @@
+# characters/management/commands/benchmark_export.py
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from characters.benchmarks import alpha_name
+from characters.exporters import EXPORT_FORMATS, iter_rows, to_bytes
+from characters.models import Enemy, Item, Warrior
+from characters.views import EnemyExportView, ItemExportView, WarriorExportView
+
+PREFIX = 'Bench Export'
+
+
+def build_warrior(number, owner):
+    return Warrior(name=alpha_name(PREFIX, number), owner=owner, health=100 + number % 50, damage=number % 40)
+
+
+def build_enemy(number, owner):
+    return Enemy(name=alpha_name(PREFIX, number), health=50 + number % 50, attack=number % 30)
+
+
+def build_item(number, owner):
+    item_type = Item.ITEM_TYPES[number % len(Item.ITEM_TYPES)][0]
+    return Item(
+        name=alpha_name(PREFIX, number), item_type=item_type, value=number % 500,
+        description=f"Objeto de prueba número {number}" if number % 3 else None,
+        extra_attributes={'nivel': number % 10, 'rareza': 'común'}, damage_buff=number % 7,
+    )
+
+
+MODELS = {
+    'warrior': (WarriorExportView, build_warrior),
+    'enemy': (EnemyExportView, build_enemy),
+    'item': (ItemExportView, build_item),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara los formatos de exportación (json, compact, ndjson, ndjson.gz y, con pyarrow, "
+        "arrow y parquet): tamaño del archivo y tiempo de serialización de --rows filas ya leídas "
+        "de la base de datos, con el mismo escritor por lotes que usan las vistas. Todo se ejecuta "
+        "dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--model', choices=MODELS, default='warrior')
+        parser.add_argument('--repeat', type=int, default=3, help="Repeticiones por formato (se da la mejor).")
+        parser.add_argument('--format', action='append', dest='formats', choices=EXPORT_FORMATS,
+                            help="Formatos a medir (por defecto, todos los disponibles).")
+
+    def handle(self, *args, **options):
+        view_class, build = MODELS[options['model']]
+        view = view_class()
+        view.cursor = None
+        formats = options['formats'] or list(EXPORT_FORMATS)
+        with transaction.atomic():
+            owner = get_user_model().objects.create_user(username='bench_export', password=None)
+            view.model.objects.bulk_create(
+                [build(number, owner) for number in range(options['rows'])], batch_size=5000,
+            )
+            start = time.perf_counter()
+            rows = list(iter_rows(view.get_export_queryset(), view.fields_to_export, view.export_chunk_size))
+            self.stdout.write(
+                f"{len(rows)} filas de {view.model.__name__} leídas en {time.perf_counter() - start:.2f}s"
+            )
+            transaction.set_rollback(True)
+
+        columns = view.get_export_columns()
+        baseline = None
+        self.stdout.write(f"{'formato':<10} {'tamaño':>12} {'vs ' + formats[0]:>8} {'tiempo':>9} {'filas/s':>12}")
+        for format_name in formats:
+            writer = EXPORT_FORMATS[format_name].writer
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                size = sum(len(to_bytes(chunk)) for chunk in writer(rows, view.export_chunk_size, columns))
+                timings.append(time.perf_counter() - start)
+            elapsed = min(timings)
+            baseline = baseline or size
+            self.stdout.write(
+                f"{format_name:<10} {size / 1024 / 1024:>9.2f} MB {size / baseline:>7.0%} "
+                f"{elapsed * 1000:>6.0f} ms {len(rows) / elapsed:>12,.0f}"
+            )
@@ -0,0 +1,85 @@
+# characters/management/commands/benchmark_import.py
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from characters.benchmarks import QueryCounter, alpha_name
+from characters.importers import BulkImporter, RowImporter
+from characters.models import Enemy
+from characters.views import EnemyImportView
+
+
+@contextmanager
+def staff_session(username):
+    """
+    Crea un usuario staff y una sesión iniciada para él; devuelve la cookie de
+    sesión. Al salir se borran la sesión, el usuario y todo lo que posee.
+    """
+    User = get_user_model()
+    User.objects.filter(username=username).delete()
+    user = User.objects.create_user(username=username, password=None, is_staff=True)
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    try:
+        yield user, f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+    finally:
+        session.delete()
+        user.delete()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el importador fila a fila con el importador por lotes sobre Enemy. "
+        "Todo se ejecuta dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--update-ratio', type=float, default=0.5,
+                            help="Fracción de filas que actualizan enemigos existentes.")
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        existing = int(rows * options['update_ratio'])
+        fields_mapping = EnemyImportView.fields_mapping
+
+        importers = [
+            ('row', RowImporter(Enemy, fields_mapping)),
+            ('bulk', BulkImporter(Enemy, fields_mapping, batch_size=options['batch_size'])),
+        ]
+        for label, importer in importers:
+            with transaction.atomic():
+                seeded = Enemy.objects.bulk_create(
+                    [Enemy(name=alpha_name('Bench Seed', i)) for i in range(existing)],
+                    batch_size=options['batch_size'],
+                )
+                data = [
+                    {'id': enemy.pk, 'name': enemy.name, 'health': 60, 'attack': 10, 'defense': 3}
+                    for enemy in seeded
+                ]
+                data += [
+                    {'name': alpha_name('Bench New', i), 'health': 40, 'attack': 12, 'defense': 4}
+                    for i in range(rows - existing)
+                ]
+
+                queries = QueryCounter()
+                with connection.execute_wrapper(queries):
+                    start = time.perf_counter()
+                    result = importer.run(data)
+                    elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{label:>4}: {rows} filas en {elapsed:.3f}s "
+                f"({rows / elapsed:,.0f} filas/s, {queries.count} consultas) - "
+                f"creados={result.created} actualizados={result.updated} errores={len(result.errors)}"
+            )
@@ -0,0 +1,97 @@
+# characters/management/commands/benchmark_owner_list.py
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from characters.benchmarks import QueryCounter, alpha_name
+from characters.models import Warrior
+from characters.pagination import keyset_paginate
+
+INDEX_NAME = 'warrior_owner_name_idx'
+# Señales de que la base de datos ordena en memoria o recorre la tabla entera
+SORT_MARKERS = ('TEMP B-TREE', 'Sort')
+SCAN_MARKERS = ('SCAN characters_warrior', 'Seq Scan')
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la lista \"mis personajes\" (filtro por owner + orden por name, paginada por cursor) "
+        "sobre una tabla Warrior grande, con y sin el índice (owner, name): consultas, latencia por "
+        "página y plan de ejecución. Todo se ejecuta dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--owners', type=int, default=1000)
+        parser.add_argument('--page-size', type=int, default=25)
+        parser.add_argument('--pages', type=int, default=20, help="Páginas recorridas por medición.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        with transaction.atomic():
+            start = time.perf_counter()
+            owners = User.objects.bulk_create(
+                [User(username=f'bench-owner-{i}') for i in range(options['owners'])]
+            )
+            batch = []
+            for i in range(options['rows']):
+                batch.append(Warrior(name=alpha_name('Bench', i), owner_id=owners[i % len(owners)].pk))
+                if len(batch) >= options['batch_size']:
+                    Warrior.objects.bulk_create(batch)
+                    batch = []
+            Warrior.objects.bulk_create(batch)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(
+                f"{options['rows']} guerreros de {len(owners)} propietarios creados en "
+                f"{time.perf_counter() - start:.1f}s"
+            )
+
+            owner = owners[len(owners) // 2]
+            self.measure('con índice (owner, name)', owner, options)
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(INDEX_NAME)}')
+            self.measure('sin índice compuesto', owner, options)
+            transaction.set_rollback(True)
+
+    def measure(self, label, owner, options):
+        queryset = Warrior.objects.filter(owner=owner)
+        plan = self.explain(queryset.order_by('name', 'pk')[:options['page_size'] + 1], label)
+        sorts = any(marker in plan for marker in SORT_MARKERS)
+        scans = any(marker in plan for marker in SCAN_MARKERS)
+
+        queries = QueryCounter()
+        timings = []
+        after = None
+        with connection.execute_wrapper(queries):
+            for _ in range(options['pages']):
+                start = time.perf_counter()
+                page = keyset_paginate([('warrior', queryset)], options['page_size'], after=after)
+                timings.append(time.perf_counter() - start)
+                if not page.has_next:
+                    break
+                after = page.next_cursor
+        timings.sort()
+
+        self.stdout.write(f"{label}:")
+        self.stdout.write(
+            f"  {len(timings)} páginas, {queries.count / len(timings):.0f} consulta(s) por página, "
+            f"mediana {timings[len(timings) // 2] * 1000:.2f} ms, máx {timings[-1] * 1000:.2f} ms"
+        )
+        self.stdout.write(
+            f"  índice usado: {'sí' if INDEX_NAME in plan else 'no'}; "
+            f"ordenación en memoria: {'sí' if sorts else 'no'}; recorrido completo: {'sí' if scans else 'no'}"
+        )
+        for line in plan.splitlines():
+            self.stdout.write(f"    {line}")
+
+    def explain(self, queryset, label):
+        # Como QuerySet.explain(), pero con un comentario distinto por medición: el caché de
+        # sentencias de sqlite3 devolvería el plan anterior al DROP INDEX para el mismo SQL.
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql} /* {label} */', params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
@@ -0,0 +1,133 @@
+# characters/management/commands/benchmark_startup.py
+import json
+import os
+import secrets
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from .benchmark_import import staff_session
+
+# Lo que hace un worker nuevo: importar la aplicación WSGI y servir peticiones.
+# Se ejecuta con "python -c" para no medir también la maquinaria de manage.py.
+PROBE = r'''
+import io, json, sys, time
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+paths, requests, cookie = json.loads(sys.argv[1])
+
+def serve(path):
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'HTTP_COOKIE': cookie, 'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+    }
+    status = []
+    body = application(environ, lambda line, headers, exc_info=None: status.append(int(line.split()[0])))
+    for _ in body:
+        pass
+    body.close()
+    return status[0]
+
+statuses = [serve(paths[0])]
+ready_at = time.time()
+rss_first = rss_mb()
+statuses += [serve(paths[number % len(paths)]) for number in range(1, requests)]
+print(json.dumps({
+    'ready_at': ready_at, 'rss_first': rss_first, 'rss_steady': rss_mb(),
+    'errors': sum(status >= 400 for status in statuses), 'modules': len(sys.modules),
+    'import_export': 'import_export.admin' in sys.modules,
+}))
+'''
+
+PROFILES = ['DjangoProject.settings', 'DjangoProject.settings_production']
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el arranque en frío de un worker (desde lanzar el proceso hasta servir la primera "
+        "petición) y su memoria residente (RSS) tras la primera petición y tras --requests "
+        "peticiones, para el perfil de desarrollo y el de producción. Comprueba los objetivos "
+        "(--target-cold-start, --target-rss) sobre el perfil de producción y falla si no se "
+        "cumplen. Crea un usuario staff y una sesión de prueba, borrados al final: úsalo con "
+        "DB_NAME=/tmp/bench.sqlite3 tras un migrate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Arranques medidos por perfil (se da la mediana).")
+        parser.add_argument('--requests', type=int, default=2000,
+                            help="Peticiones servidas antes de medir la memoria estable.")
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="URL a pedir (se puede repetir); la primera es la del arranque en frío.")
+        parser.add_argument('--settings-module', action='append', dest='profiles',
+                            help=f"Perfiles a medir (por defecto {', '.join(PROFILES)}).")
+        parser.add_argument('--target-cold-start', type=float, default=0.6,
+                            help="Objetivo de arranque en frío en segundos (perfil de producción).")
+        parser.add_argument('--target-rss', type=float, default=55,
+                            help="Objetivo de RSS estable en MB (perfil de producción).")
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError("Hace falta una base de datos en archivo (DB_NAME=...), no en memoria.")
+        paths = options['paths'] or ['/accounts/login/', '/characters/enemies/', '/characters/list/?scope=all']
+        profiles = options['profiles'] or PROFILES
+
+        missed = []
+        with staff_session('bench_startup') as (_, cookie):
+            for profile in profiles:
+                runs = [self.run_probe(profile, paths, options['requests'], cookie) for _ in range(options['runs'])]
+                cold_start = statistics.median(run['cold_start'] for run in runs)
+                rss_first = statistics.median(run['rss_first'] for run in runs)
+                rss_steady = statistics.median(run['rss_steady'] for run in runs)
+                self.stdout.write(
+                    f"{profile}: arranque en frío {cold_start * 1000:.0f} ms, RSS {rss_first:.1f} MB tras la "
+                    f"primera petición y {rss_steady:.1f} MB tras {options['requests']}, "
+                    f"{runs[0]['modules']} módulos cargados, import_export "
+                    f"{'cargado' if runs[0]['import_export'] else 'sin cargar'}, "
+                    f"{runs[0]['errors']} respuestas con error"
+                )
+                if profile == 'DjangoProject.settings_production':
+                    if cold_start > options['target_cold_start']:
+                        missed.append(f"arranque {cold_start:.2f}s > {options['target_cold_start']}s")
+                    if rss_steady > options['target_rss']:
+                        missed.append(f"RSS {rss_steady:.1f} MB > {options['target_rss']} MB")
+
+        if missed:
+            raise CommandError(f"Objetivos no cumplidos: {'; '.join(missed)}")
+        self.stdout.write(self.style.SUCCESS("Objetivos cumplidos."))
+
+    def run_probe(self, profile, paths, requests, cookie):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+        if profile == 'DjangoProject.settings_production':
+            # Valores solo para la medición si el entorno no trae los de verdad
+            env.setdefault('DJANGO_SECRET_KEY', secrets.token_urlsafe(50))
+            env.setdefault('DJANGO_ALLOWED_HOSTS', 'localhost')
+        started_at = time.time()
+        child = subprocess.run(
+            [sys.executable, '-c', PROBE, json.dumps([paths, requests, cookie])],
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if child.returncode:
+            raise CommandError(f"El worker con {profile} falló:\n{child.stderr[-2000:]}")
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        result['cold_start'] = result['ready_at'] - started_at
+        return result
@@ -0,0 +1,87 @@
+# characters/management/commands/benchmark_suite.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from characters.benchmarks import (
+    SIZES, BenchmarkSuite, baseline_path, compare, load_results, load_scenarios, save_results, seed_dataset,
+)
+from characters.models import Enemy, Item, Mage, Warrior
+
+
+class Command(BaseCommand):
+    help = (
+        "Pruebas de rendimiento de regresión: genera un conjunto de datos sintético (--size: 1k, 100k "
+        "o 1m guerreros, magos, enemigos e ítems), mide rendimiento y número de consultas de las listas, "
+        "exportaciones, importaciones y batallas (characters.benchmarks), guarda los resultados en JSON "
+        "y falla si alguna métrica empeora más de la tolerancia respecto a la línea base "
+        "(characters/benchmark_baselines/<size>.json). Todo se ejecuta dentro de una transacción que "
+        "se revierte al final; las tablas de personajes deben estar vacías: úsalo con "
+        "DB_NAME=/tmp/bench.sqlite3 tras un migrate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=SIZES, default='1k')
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help="Escenarios a ejecutar (por defecto, todos).")
+        parser.add_argument('--repeat', type=int, default=3, help="Repeticiones por medida (se da la mejor).")
+        parser.add_argument('--output', help="Archivo JSON donde guardar los resultados.")
+        parser.add_argument('--baseline', help="Línea base con la que comparar (por defecto, la de --size).")
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help="Caída de rendimiento admitida respecto a la línea base (fracción).")
+        parser.add_argument('--query-tolerance', type=float, default=0.0,
+                            help="Aumento del número de consultas admitido (fracción).")
+        parser.add_argument('--queries-only', action='store_true',
+                            help="Compara solo el número de consultas (línea base tomada en otra máquina).")
+        parser.add_argument('--update-baseline', action='store_true',
+                            help="Guarda los resultados como nueva línea base en vez de comparar.")
+
+    def handle(self, *args, **options):
+        scenarios = load_scenarios()
+        names = options['scenarios'] or list(scenarios)
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(unknown))}. "
+                               f"Disponibles: {', '.join(scenarios)}.")
+        if any(model.objects.exists() for model in (Warrior, Mage, Enemy, Item)):
+            raise CommandError("Las tablas de personajes no están vacías: usa una base de datos aparte "
+                               "(DB_NAME=/tmp/bench.sqlite3 tras un migrate).")
+
+        size = options['size']
+        # El cliente de pruebas pide a 'testserver'
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), transaction.atomic():
+            self.stdout.write(f"Generando {SIZES[size]:,} filas de cada modelo...")
+            data = seed_dataset(SIZES[size])
+            suite = BenchmarkSuite(data, repeat=options['repeat'])
+            for name in names:
+                self.stdout.write(f"Escenario {name}...")
+                suite.run([name])
+            transaction.set_rollback(True)
+
+        results = suite.as_dict(size)
+        for name, value in results['metrics'].items():
+            self.stdout.write(f"  {name:<45} {value:>14,}")
+        if options['output']:
+            save_results(results, options['output'])
+
+        path = options['baseline'] or baseline_path(size)
+        if options['update_baseline']:
+            save_results(results, path)
+            self.stdout.write(self.style.SUCCESS(f"Línea base guardada en {path}."))
+            return
+        try:
+            baseline = load_results(path)
+        except FileNotFoundError:
+            self.stdout.write(self.style.WARNING(f"No hay línea base en {path}; nada con que comparar."))
+            return
+        if baseline.get('database') != connection.vendor:
+            self.stdout.write(self.style.WARNING(
+                f"La línea base se tomó con {baseline.get('database')}, no con {connection.vendor}."
+            ))
+        regressions = compare(
+            results['metrics'], baseline, options['tolerance'], options['query_tolerance'], options['queries_only'],
+        )
+        if regressions:
+            raise CommandError("Regresiones respecto a la línea base:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"Sin regresiones respecto a {path}."))
@@ -0,0 +1,25 @@
+# characters/management/commands/cleanup_jobs.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from characters import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantenimiento de los trabajos en segundo plano (characters/jobs.py): da por fallidos los "
+        "pendientes o en curso cuyo proceso no da señales desde hace JOBS_STALE_AFTER segundos y borra "
+        "de JOBS_ROOT las exportaciones terminadas hace más de --ttl segundos y los archivos que ya no "
+        "pertenecen a ningún trabajo en marcha. Pensado para ejecutarse periódicamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl', type=int, default=getattr(settings, 'JOBS_RESULT_TTL', 7 * 24 * 3600),
+                            help="Segundos que se conserva una exportación terminada (por defecto, JOBS_RESULT_TTL).")
+
+    def handle(self, *args, **options):
+        failed = jobs.fail_stale_jobs()
+        deleted = jobs.clean_up_files(options['ttl'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{failed} trabajos abandonados marcados como fallidos; {deleted} archivos borrados."
+        ))
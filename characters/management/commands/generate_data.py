@@ -0,0 +1,81 @@
+# characters/management/commands/generate_data.py
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from characters import synthetic
+from characters.models import Enemy, Item, Mage, Warrior
+
+MODELS = {'warrior': Warrior, 'mage': Mage, 'enemy': Enemy, 'item': Item}
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos para pruebas de carga: usuarios, guerreros, magos, enemigos e ítems "
+        "válidos (nombres únicos que pasan alphabetic_validator, extra_attributes variados), con "
+        "bulk_create en lotes grandes repartidos entre varios procesos. Con la misma --seed los datos "
+        "son los mismos con cualquier --workers (salvo los ids). Los nombres llevan --prefix, que no "
+        "debe estar ya en uso."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000,
+                            help="Filas de cada modelo (guerreros, magos, enemigos e ítems).")
+        parser.add_argument('--users', type=int, help="Usuarios (por defecto, uno por cada 100 filas).")
+        for kind in MODELS:
+            parser.add_argument(f'--{kind}s', type=int, dest=kind, help=f"Filas de {kind} (por defecto, --rows).")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='Gen', help="Primera palabra de los nombres generados (solo letras).")
+        parser.add_argument('--password', help="Contraseña de todos los usuarios (por defecto, inutilizable).")
+        parser.add_argument('--workers', type=int, default=synthetic.default_workers(),
+                            help="Procesos; 1 genera en este proceso.")
+        parser.add_argument('--batch-size', type=int, default=synthetic.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        counts = {kind: options[kind] if options[kind] is not None else rows for kind in MODELS}
+        users = options['users'] if options['users'] is not None else max(1, rows // 100)
+        counts['user'] = users
+        if any(count < 0 for count in counts.values()) or options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError("Las cantidades no pueden ser negativas; --workers y --batch-size, al menos 1.")
+        if (counts['warrior'] or counts['mage']) and not users:
+            raise CommandError("Los guerreros y magos necesitan usuarios (--users).")
+        prefix = options['prefix']
+        if not prefix.isalpha() or not prefix.isascii():
+            raise CommandError("--prefix solo puede tener letras sin tilde (también forma los nombres de usuario).")
+        self.check_prefix_unused(prefix, users, options['database'])
+
+        workers = options['workers']
+        connection = connections[options['database']]
+        if workers > 1 and connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.stdout.write(self.style.WARNING("Base de datos en memoria: se genera en un solo proceso."))
+            workers = 1
+
+        start = time.perf_counter()
+        synthetic.generate(
+            counts, seed=options['seed'], prefix=prefix, password=options['password'], workers=workers,
+            batch_size=options['batch_size'], database=options['database'], progress=self.report,
+        )
+        elapsed = time.perf_counter() - start
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{total:,} filas con {workers} procesos en {elapsed:.1f}s ({total / elapsed:,.0f} filas/s)"
+        ))
+
+    def report(self, kind, rows, seconds):
+        self.stdout.write(f"  {kind:<8} {rows:>10,} filas en {seconds:6.1f}s ({rows / seconds:>9,.0f} filas/s)")
+
+    def check_prefix_unused(self, prefix, users, database):
+        taken = [
+            model.__name__ for model in MODELS.values()
+            if model.objects.using(database).filter(name__startswith=f'{prefix} ').exists()
+        ]
+        if users and get_user_model().objects.using(database).filter(
+            username__regex=synthetic.username_pattern(prefix, users)
+        ).exists():
+            taken.append('usuarios')
+        if taken:
+            raise CommandError(f"Ya hay datos con el prefijo {prefix!r} ({', '.join(taken)}): usa otro --prefix.")
@@ -0,0 +1,29 @@
+# characters/management/commands/prune_tombstones.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from characters import versions
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las Tombstone (filas borradas que devuelven las exportaciones incrementales con ?since=) "
+        "de hace más de --days días y guarda por tabla la versión hasta la que se borraron: una "
+        "exportación con un since anterior recibe un 410 y el cliente debe hacer una exportación "
+        "completa. Pensado para ejecutarse periódicamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'TOMBSTONE_RETENTION_DAYS', 30),
+                            help="Días que se conserva un borrado (por defecto, TOMBSTONE_RETENTION_DAYS).")
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError("--days no puede ser negativo.")
+        pruned = versions.prune_tombstones(timezone.now() - timedelta(days=options['days']))
+        for table, count in sorted(pruned.items()):
+            self.stdout.write(f"  {table:<30} {count:>10,}")
+        self.stdout.write(self.style.SUCCESS(f"{sum(pruned.values())} borrados antiguos eliminados."))
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:55
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0002_item_description_item_extra_attributes_item_value'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='enemy',
+            name='name',
+            field=models.CharField(max_length=100, unique=True, validators=[django.core.validators.RegexValidator("^[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ\\s\\'-]+$", 'El nombre solo puede contener letras, espacios, guiones y apóstrofes.')]),
+        ),
+        migrations.AlterField(
+            model_name='mage',
+            name='name',
+            field=models.CharField(max_length=100, unique=True, validators=[django.core.validators.RegexValidator("^[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ\\s\\'-]+$", 'El nombre solo puede contener letras, espacios, guiones y apóstrofes.')]),
+        ),
+        migrations.AlterField(
+            model_name='warrior',
+            name='name',
+            field=models.CharField(max_length=100, unique=True, validators=[django.core.validators.RegexValidator("^[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ\\s\\'-]+$", 'El nombre solo puede contener letras, espacios, guiones y apóstrofes.')]),
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('IMPORT', 'Importación'), ('EXPORT', 'Exportación')], max_length=10)),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('RUNNING', 'En curso'), ('DONE', 'Terminado'), ('FAILED', 'Fallido')], default='PENDING', max_length=10)),
+                ('view', models.CharField(help_text='Ruta de la vista de importación/exportación.', max_length=200)),
+                ('export_format', models.CharField(blank=True, max_length=20)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='Porcentaje completado (0-100).')),
+                ('created_count', models.IntegerField(default=0)),
+                ('updated_count', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('message', models.TextField(blank=True)),
+                ('source_file', models.CharField(blank=True, max_length=500)),
+                ('result_file', models.CharField(blank=True, max_length=500)),
+                ('filename', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
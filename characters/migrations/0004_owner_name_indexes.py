@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0003_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mage',
+            index=models.Index(fields=['owner', 'name'], name='mage_owner_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warrior',
+            index=models.Index(fields=['owner', 'name'], name='warrior_owner_name_idx'),
+        ),
+    ]
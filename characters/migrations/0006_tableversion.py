@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0005_catalogversion'),
+    ]
+
+    operations = [
+        migrations.RenameModel(
+            old_name='CatalogVersion',
+            new_name='TableVersion',
+        ),
+        migrations.AddField(
+            model_name='tableversion',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
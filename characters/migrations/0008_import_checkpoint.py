@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0007_change_versions_and_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='all_or_nothing',
+            field=models.BooleanField(default=False, help_text='Importación en una sola transacción.'),
+        ),
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='app_label.model de los datos importados.', max_length=100)),
+                ('file_hash', models.CharField(max_length=64)),
+                ('rows_done', models.PositiveBigIntegerField(default=0)),
+                ('created_count', models.IntegerField(default=0)),
+                ('updated_count', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('model', 'file_hash'), name='import_checkpoint_file_unique')],
+            },
+        ),
+    ]
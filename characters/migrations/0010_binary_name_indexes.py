@@ -0,0 +1,42 @@
+# characters/migrations/0010_binary_name_indexes.py
+"""
+Índices de nombre con COLLATE "C" para la paginación por cursor
+(characters/pagination.py), que ordena y filtra por el nombre en la
+intercalación binaria. Solo en PostgreSQL: en SQLite la intercalación por
+defecto ya es binaria y los índices existentes sirven.
+"""
+from django.db import migrations
+
+INDEXES = [
+    ('warrior_name_c_idx', 'characters_warrior', '"name" COLLATE "C", "id"'),
+    ('warrior_owner_name_c_idx', 'characters_warrior', '"owner_id", "name" COLLATE "C", "id"'),
+    ('mage_name_c_idx', 'characters_mage', '"name" COLLATE "C", "id"'),
+    ('mage_owner_name_c_idx', 'characters_mage', '"owner_id", "name" COLLATE "C", "id"'),
+    ('enemy_name_c_idx', 'characters_enemy', '"name" COLLATE "C", "id"'),
+    ('item_name_c_idx', 'characters_item', '"name" COLLATE "C", "id"'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, columns in INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({columns})')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0009_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0010_binary_name_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tableversion',
+            name='pruned_version',
+            field=models.PositiveBigIntegerField(default=0, help_text='Versión hasta la que se borraron las Tombstone (prune_tombstones).'),
+        ),
+    ]
@@ -1,7 +1,7 @@
 # characters/models.py
 from django.core.validators import RegexValidator, MinValueValidator
 from django.conf import settings # Para acceder al modelo de usuario personalizado
-from django.db import models
+from django.db import models, transaction
 from django.db.models import JSONField
 
 # Validador para nombres (solo letras y espacios)
@@ -10,7 +10,54 @@ alphabetic_validator = RegexValidator(
     r'^[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ\s\'-]+$',
     'El nombre solo puede contener letras, espacios, guiones y apóstrofes.'
 )
-class Character(models.Model):
+class ChangeTrackedQuerySet(models.QuerySet):
+    """
+    Las escrituras en bloque del ORM también incrementan la versión de la tabla:
+    update() (y con él bulk_update()) guarda la nueva en change_version y
+    bulk_create() sella los objetos antes de insertarlos.
+    """
+
+    def update(self, **kwargs):
+        from . import versions
+        with transaction.atomic(using=self.db):
+            if 'change_version' not in kwargs:  # Si no, quien llama ya selló las filas
+                kwargs['change_version'] = versions.bump(self.model)
+            return super().update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import versions
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            if objs:
+                versions.stamp(self.model, objs)
+            return super().bulk_create(objs, *args, **kwargs)
+
+class ChangeTrackedModel(models.Model):
+    """
+    Clase base abstracta con seguimiento de cambios por fila para las exportaciones
+    incrementales (?since=). Cada save() guarda en change_version la versión nueva
+    de la tabla (characters/versions.py) en la misma transacción que la fila, así
+    que las escrituras se confirman en orden de versión; una transacción incrementa
+    cada tabla una sola vez. Los borrados dejan una Tombstone (characters/signals.py);
+    update() y bulk_create() pasan por ChangeTrackedQuerySet y las importaciones en
+    bloque sellan sus filas. El SQL a mano debe llamar a versions.stamp().
+    """
+    change_version = models.PositiveBigIntegerField(default=0, db_index=True, editable=False)
+
+    objects = ChangeTrackedQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        from . import versions  # versions importa este módulo
+        with transaction.atomic(using=kwargs.get('using')):
+            self.change_version = versions.bump(type(self))
+            if kwargs.get('update_fields'):
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'change_version'}
+            super().save(*args, **kwargs)
+
+class Character(ChangeTrackedModel):
     """Clase base abstracta para personajes."""
     # Eliminamos el campo owner de aquí, ya que lo definiremos en las subclases.
     name = models.CharField(max_length=100, unique=True, validators=[alphabetic_validator])
@@ -29,6 +76,10 @@ class Warrior(Character):
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='warriors')
     damage = models.IntegerField(default=20, validators=[MinValueValidator(0)])
 
+    class Meta(Character.Meta):
+        # Lista "mis personajes": filtra por owner y ordena por name desde el índice
+        indexes = [models.Index(fields=['owner', 'name'], name='warrior_owner_name_idx')]
+
     def __str__(self):
         return f"Guerrero: {self.name}"
 
@@ -38,10 +89,13 @@ class Mage(Character):
     magic_damage = models.IntegerField(default=25, validators=[MinValueValidator(0)])
     mana = models.IntegerField(default=50, validators=[MinValueValidator(0)])
 
+    class Meta(Character.Meta):
+        indexes = [models.Index(fields=['owner', 'name'], name='mage_owner_name_idx')]
+
     def __str__(self):
         return f"Mago: {self.name}"
 
-class Enemy(models.Model):
+class Enemy(ChangeTrackedModel):
     """Personaje tipo Enemigo."""
     name = models.CharField(max_length=100, unique=True, validators=[alphabetic_validator])
     health = models.IntegerField(default=50, validators=[MinValueValidator(0)])
@@ -54,7 +108,7 @@ class Enemy(models.Model):
     def __str__(self):
         return f"Enemigo: {self.name}"
 
-class Item(models.Model):
+class Item(ChangeTrackedModel):
     """Modelo para los ítems."""
     ITEM_TYPES = (
         ('SWORD', 'Espada (Guerrero)'),
@@ -80,4 +134,108 @@ class Item(models.Model):
         ordering = ['name']
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class Job(models.Model):
+    """Importación o exportación ejecutada en segundo plano (ver characters/jobs.py)."""
+    KIND_IMPORT = 'IMPORT'
+    KIND_EXPORT = 'EXPORT'
+    KINDS = (
+        (KIND_IMPORT, 'Importación'),
+        (KIND_EXPORT, 'Exportación'),
+    )
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATUSES = (
+        (PENDING, 'Pendiente'),
+        (RUNNING, 'En curso'),
+        (DONE, 'Terminado'),
+        (FAILED, 'Fallido'),
+    )
+    kind = models.CharField(max_length=10, choices=KINDS)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    view = models.CharField(max_length=200, help_text="Ruta de la vista de importación/exportación.")
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='jobs')
+    export_format = models.CharField(max_length=20, blank=True)
+    all_or_nothing = models.BooleanField(default=False, help_text="Importación en una sola transacción.")
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Porcentaje completado (0-100).")
+    heartbeat_at = models.DateTimeField(
+        null=True, blank=True, help_text="Última señal del proceso que ejecuta el trabajo."
+    )
+    created_count = models.IntegerField(default=0)
+    updated_count = models.IntegerField(default=0)
+    errors = JSONField(default=list, blank=True)
+    message = models.TextField(blank=True)
+    source_file = models.CharField(max_length=500, blank=True)
+    result_file = models.CharField(max_length=500, blank=True)
+    filename = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+class TableVersion(models.Model):
+    """
+    Contador de cambios de una tabla (Warrior, Mage, Enemy, Item). Se incrementa en
+    la misma transacción que el cambio (characters/signals.py); lo usan las claves de
+    la caché de catálogos y los ETag/Last-Modified de listas y exportaciones.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(null=True, blank=True)
+    pruned_version = models.PositiveBigIntegerField(
+        default=0, help_text="Versión hasta la que se borraron las Tombstone (prune_tombstones)."
+    )
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+class Tombstone(models.Model):
+    """
+    Fila borrada de una tabla con seguimiento de cambios. Las exportaciones
+    incrementales la devuelven como {"id": ..., "_deleted": true}. Se conservan
+    TOMBSTONE_RETENTION_DAYS días (manage.py prune_tombstones).
+    """
+    table = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    change_version = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['table', 'change_version'], name='tombstone_table_version_idx')]
+
+    def __str__(self):
+        return f"{self.table} #{self.object_id} (v{self.change_version})"
+
+class ImportCheckpoint(models.Model):
+    """
+    Progreso confirmado de una importación JSON por tramos (characters/importers.py):
+    cuántos objetos del archivo, identificado por su SHA-256, están ya en la base de
+    datos. Se guarda en la misma transacción que cada tramo, así que volver a subir el
+    mismo archivo continúa tras el último tramo confirmado. Se borra al terminar.
+    """
+    model = models.CharField(max_length=100, help_text="app_label.model de los datos importados.")
+    file_hash = models.CharField(max_length=64)
+    rows_done = models.PositiveBigIntegerField(default=0)
+    created_count = models.IntegerField(default=0)
+    updated_count = models.IntegerField(default=0)
+    errors = JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'file_hash'], name='import_checkpoint_file_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.file_hash[:12]}: {self.rows_done} objetos"
@@ -0,0 +1,206 @@
+# characters/pagination.py
+"""
+Keyset ("cursor") pagination for the list views.
+
+Instead of OFFSET, each page asks for the rows strictly after (or before) the
+last row already shown, ordered by ``(name, pk)``. With the index on ``name``
+every page is a short index range scan, so page latency does not depend on
+how many rows the table holds or how deep the user has paged.
+
+A list can merge several tables (warriors and mages): each one is read with
+the same cursor and the results are merged in Python. Rows of different
+tables may share a name, so the sort key is ``(name, kind, pk)`` and the
+cursor carries all three.
+
+The merge and the cursor filter only agree with the database if both order
+names the same way, and a locale collation (the PostgreSQL default) does not
+order them like Python's ``str``. So the queries order and filter by the name
+under the database's binary collation (``BINARY_COLLATIONS``), which compares
+code points, as Python does. On SQLite that is already the default; on
+PostgreSQL migration 0010 adds the ``COLLATE "C"`` indexes these queries need.
+"""
+import base64
+import heapq
+import json
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Collate
+from django.http import Http404
+
+# Collation that orders text by code point, like Python, on each backend
+BINARY_COLLATIONS = {
+    'postgresql': 'C',
+    'sqlite': 'BINARY',
+    'mysql': 'utf8mb4_bin',
+    'oracle': 'BINARY',
+}
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        name, kind, pk = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return str(name), str(kind), int(pk)
+    except (ValueError, TypeError):
+        raise Http404("Invalid page cursor.")
+
+
+class KeysetPage:
+    """One page of rows plus the cursors of its neighbours (None at either end)."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+
+def _boundary(kind, cursor, backward):
+    """Rows of the table ``kind`` that sort after ``cursor`` (before it if ``backward``)."""
+    name, cursor_kind, pk = cursor
+    after = 'lt' if backward else 'gt'
+    if kind == cursor_kind:
+        return Q(**{f'sort_name__{after}': name}) | Q(sort_name=name, **{f'pk__{after}': pk})
+    # Same name in another table: it sorts on the side its kind puts it
+    same_name_included = (kind < cursor_kind) if backward else (kind > cursor_kind)
+    lookup = f'sort_name__{after}e' if same_name_included else f'sort_name__{after}'
+    return Q(**{lookup: name})
+
+
+def with_sort_name(queryset):
+    """Annotates ``sort_name``: the name under the binary collation of the queryset's database."""
+    collation = BINARY_COLLATIONS[connections[queryset.db].vendor]
+    return queryset.annotate(sort_name=Collate('name', collation))
+
+
+def _page_querysets(sources, page_size, cursor, backward):
+    """The query of each source: at most ``page_size + 1`` rows past the cursor."""
+    order = ('-sort_name', '-pk') if backward else ('sort_name', 'pk')
+    for kind, queryset in sources:
+        queryset = with_sort_name(queryset)
+        if cursor is not None:
+            queryset = queryset.filter(_boundary(kind, cursor, backward))
+        yield kind, queryset.order_by(*order)[:page_size + 1]
+
+
+def _parse_cursor(after, before):
+    cursor = decode_cursor(before or after) if (before or after) else None
+    return cursor, before is not None and cursor is not None
+
+
+def page_key(after=None, before=None):
+    """
+    The page ``after``/``before`` select, as a short normalized string: two
+    requests get the same key exactly when they get the same page.
+    """
+    cursor, backward = _parse_cursor(after, before)
+    if cursor is None:
+        return 'first'
+    return f"{'before' if backward else 'after'}:{encode_cursor(cursor)}"
+
+
+def _build_page(fetched, page_size, cursor, backward):
+    streams = []
+    for kind, rows in fetched:
+        for row in rows:
+            row.kind = kind
+        streams.append(rows)
+
+    def key(row):
+        return row.name, row.kind, row.pk
+
+    # Every stream is already sorted by the database, only the interleaving is left
+    rows = list(heapq.merge(*streams, key=key, reverse=backward))[:page_size + 1]
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backward:
+        rows.reverse()
+
+    first = encode_cursor(key(rows[0])) if rows else None
+    last = encode_cursor(key(rows[-1])) if rows else None
+    if backward:
+        return KeysetPage(rows, next_cursor=last, previous_cursor=first if has_more else None)
+    return KeysetPage(rows, next_cursor=last if has_more else None,
+                      previous_cursor=first if cursor is not None else None)
+
+
+def keyset_paginate(sources, page_size, after=None, before=None):
+    """
+    Returns a ``KeysetPage`` with the ``page_size`` rows following ``after``
+    (or preceding ``before``) across ``sources``, a list of ``(kind, queryset)``.
+    Each row gets a ``kind`` attribute naming its source.
+    """
+    cursor, backward = _parse_cursor(after, before)
+    fetched = [(kind, list(queryset)) for kind, queryset in _page_querysets(sources, page_size, cursor, backward)]
+    return _build_page(fetched, page_size, cursor, backward)
+
+
+async def akeyset_paginate(sources, page_size, after=None, before=None):
+    """``keyset_paginate`` for async views, reading each source with the async ORM."""
+    cursor, backward = _parse_cursor(after, before)
+    fetched = []
+    for kind, queryset in _page_querysets(sources, page_size, cursor, backward):
+        fetched.append((kind, [row async for row in queryset]))
+    return _build_page(fetched, page_size, cursor, backward)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin: ``object_list`` becomes one keyset page. Pages are chosen
+    with ?after=<cursor> or ?before=<cursor>; the template gets ``page``.
+    Override ``get_keyset_sources`` to list more than one table.
+    """
+    page_size = 25
+
+    def get_keyset_sources(self):
+        return [('', self.model._default_manager.all())]
+
+    def get_queryset(self):
+        self.page = keyset_paginate(
+            self.get_keyset_sources(), self.page_size,
+            after=self.request.GET.get('after'), before=self.request.GET.get('before'),
+        )
+        return self.page.object_list
+
+    async def aget_queryset(self):
+        # Used by the async views (characters.async_views)
+        self.page = await akeyset_paginate(
+            self.get_keyset_sources(), self.page_size,
+            after=self.request.GET.get('after'), before=self.request.GET.get('before'),
+        )
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page'] = self.page
+        context['is_paginated'] = self.page.has_other_pages
+        context['page_query'] = self.get_page_query()
+        return context
+
+    def get_page_query(self):
+        # Other query parameters (filters) carried over to the page links
+        params = self.request.GET.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        return params.urlencode()
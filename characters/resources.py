@@ -1,26 +1,223 @@
 # C:\DjangoProject\characters\resources.py
+"""
+django-import-export resources used by the admin (characters/admin.py).
 
-from import_export import resources
+They run in bulk mode: rows are written ``batch_size`` at a time with
+``bulk_create`` and the executemany UPDATE of ``characters.importers``, and
+rows whose values did not change are skipped (the row diffs are only built
+for the dry-run preview, which displays them). The per-row queries of the
+library defaults are replaced by lookups done once per import:
+
+* ``BulkInstanceLoader`` loads every existing row named in the file with
+  ``in_bulk``; the skip-unchanged comparison and the updates use those.
+* ``CachedForeignKeyWidget`` resolves the ``owner`` column from a cache
+  filled with one ``in_bulk`` before the first row.
+* Rows are validated by ``characters.validation.BatchValidator`` instead of
+  ``full_clean()``: the field validators run once per distinct value and the
+  holders of the file's names are loaded with one query, so names stay
+  unique across the file and against the database.
+
+Bulk writes skip ``save()``, so each batch is stamped with a new table
+version (``characters.versions``) like the JSON imports. The dry-run
+preview is unchanged: the bulk writes happen in its transaction and are
+rolled back with it.
+"""
+import functools
+
+from django.core.exceptions import ValidationError
+from import_export import resources, widgets
+from import_export.instance_loaders import ModelInstanceLoader
+
+from . import versions
+from .importers import bulk_update
 from .models import Warrior, Mage, Enemy, Item
+from .validation import BatchValidator
+
+
+class BulkInstanceLoader(ModelInstanceLoader):
+    """Loads the existing rows of the whole dataset up front, keyed by the import id."""
+
+    def __init__(self, resource, dataset=None):
+        super().__init__(resource, dataset)
+        self.id_field = resource.fields[resource.get_import_id_fields()[0]]
+        self.instances = {}
+        if dataset is not None and self.id_field.column_name in dataset.headers:
+            ids = {
+                self.id_field.clean({self.id_field.column_name: value})
+                for value in dataset[self.id_field.column_name]
+            }
+            ids.discard(None)
+            # in_bulk splits the ids to stay under the database's parameter limit
+            self.instances = self.get_queryset().in_bulk(ids, field_name=self.id_field.attribute)
+        if resource.validator is not None:
+            resource.validator.remember(self.instances.values())
+
+    def get_instance(self, row):
+        if self.id_field.column_name not in row:
+            return None
+        return self.instances.get(self.id_field.clean(row))
+
+
+class CachedForeignKeyWidget(widgets.ForeignKeyWidget):
+    """ForeignKeyWidget that resolves values from a cache filled by ``prime``."""
+
+    def __init__(self, model, field='pk', **kwargs):
+        super().__init__(model, field=field, **kwargs)
+        self.cache = {}
+
+    def cache_key(self, value):
+        opts = self.model._meta
+        try:
+            return (opts.pk if self.field == 'pk' else opts.get_field(self.field)).to_python(value)
+        except Exception:
+            return None
+
+    def prime(self, values):
+        """Loads the related objects for every value of the column with one ``in_bulk``."""
+        self.cache = {}
+        keys = {self.cache_key(value) for value in values if value not in (None, '')}
+        keys.discard(None)
+        if keys:
+            self.cache = self.get_queryset(None, None).in_bulk(keys, field_name=self.field)
+
+    def clean(self, value, row=None, **kwargs):
+        obj = self.cache.get(self.cache_key(value)) if self.cache and value not in (None, '') else None
+        if obj is None:
+            # Not primed or unknown value: the library lookup (and its error message)
+            return super().clean(value, row, **kwargs)
+        return obj.pk if self.key_is_id else obj
+
+
+class NoDiff:
+    """Diff stand-in for the confirmed import: the admin only shows the diffs of the dry-run preview."""
+
+    def __init__(self, resource, instance, new):
+        pass
+
+    def compare_with(self, resource, instance):
+        pass
+
+    def as_html(self):
+        return []
+
+
+class BulkModelResource(resources.ModelResource):
+    """Base resource for the character models; see the module docstring."""
+
+    class Meta:
+        use_bulk = True
+        batch_size = 1000
+        skip_unchanged = True
+        report_skipped = True
+        instance_loader_class = BulkInstanceLoader
+
+    preview = True  # Whether the current import is the dry-run preview
+    validator = None
+    validated = {}  # Column name -> model attname checked by the validator
+
+    @classmethod
+    def get_fk_widget(cls, field):
+        widget = super().get_fk_widget(field)
+        return functools.partial(CachedForeignKeyWidget, *widget.args, **widget.keywords)
+
+    def import_data(self, dataset, dry_run=False, *args, **kwargs):
+        self.preview = dry_run
+        return super().import_data(dataset, dry_run, *args, **kwargs)
+
+    def get_diff_class(self):
+        # Rendering each row twice for its diff costs as much as the rest of the import
+        return super().get_diff_class() if self.preview else NoDiff
+
+    def related_fields(self):
+        return [field for field in self.get_import_fields() if isinstance(field.widget, CachedForeignKeyWidget)]
+
+    def validated_fields(self):
+        """Model attnames of the imported columns, except ForeignKeys (checked by their widget)."""
+        opts = self._meta.model._meta
+        attnames = {field.attname for field in opts.concrete_fields if not field.is_relation}
+        return {
+            field.column_name: field.attribute
+            for field in self.get_import_fields() if field.attribute in attnames
+        }
+
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        for field in self.related_fields():
+            if field.column_name in dataset.headers:
+                field.widget.prime(dataset[field.column_name])
+        self.validator = BatchValidator(self._meta.model)
+        self.validated = self.validated_fields()
+        columns = [
+            (column, attname) for column, attname in self.validated.items()
+            if attname in self.validator.unique_fields and column in dataset.headers
+        ]
+        if columns:
+            # Who holds the file's names, with one query
+            attnames = [attname for _, attname in columns]
+            self.validator.prefetch(
+                dict(zip(attnames, values)) for values in zip(*(dataset[column] for column, _ in columns))
+            )
+
+    def validate_instance(self, instance, import_validation_errors=None, validate_unique=True):
+        if self.validator is None:
+            return super().validate_instance(instance, import_validation_errors, validate_unique)
+        errors = dict(import_validation_errors or {})
+        data = {
+            attname: getattr(instance, attname) for attname in self.validated.values()
+            if attname not in errors and attname != self._meta.model._meta.pk.attname
+        }
+        errors.update(self.validator.clean(data)[1])
+        if validate_unique and not errors:
+            key = instance.pk if instance.pk is not None else object()
+            errors.update(self.validator.check_unique(key, data))
+        if errors:
+            raise ValidationError(errors)
+
+    def get_bulk_update_fields(self):
+        fields = super().get_bulk_update_fields()
+        if versions.is_tracked(self._meta.model):
+            fields.append('change_version')
+        return fields
+
+    def stamp(self, instances):
+        if versions.is_tracked(self._meta.model):
+            versions.stamp(self._meta.model, instances)
+
+    def bulk_create(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        if self.create_instances and (using_transactions or not dry_run):
+            self.stamp(self.create_instances)
+        super().bulk_create(using_transactions, dry_run, raise_errors, batch_size=batch_size, result=result)
+
+    def bulk_update(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        # As in import_export, with one executemany UPDATE instead of QuerySet.bulk_update's CASE WHEN
+        if self.update_instances and (using_transactions or not dry_run):
+            try:
+                self.stamp(self.update_instances)
+                bulk_update(self._meta.model, self.update_instances, self.get_bulk_update_fields())
+            except Exception as e:
+                self.handle_import_error(result, e, raise_errors)
+            finally:
+                self.update_instances.clear()
+
 
-class WarriorResource(resources.ModelResource):
+class WarriorResource(BulkModelResource):
     class Meta:
         model = Warrior
         fields = ('id', 'owner', 'name', 'health', 'damage', 'defense')
 
-class MageResource(resources.ModelResource):
+class MageResource(BulkModelResource):
     class Meta:
         model = Mage
         fields = ('id', 'owner', 'name', 'health', 'magic_damage', 'mana', 'defense')
 
-class EnemyResource(resources.ModelResource):
+class EnemyResource(BulkModelResource):
     class Meta:
         model = Enemy
         fields = ('id', 'name', 'health', 'attack', 'defense')
 
-class ItemResource(resources.ModelResource):
+class ItemResource(BulkModelResource):
     class Meta:
         model = Item
         # Asegúrate de que estos campos existan en tu modelo Item
         fields = ('id', 'name', 'item_type', 'description', 'value',
-                  'damage_buff', 'health_restore', 'mana_restore', 'extra_attributes')
\ No newline at end of file
+                  'damage_buff', 'health_restore', 'mana_restore', 'extra_attributes')
@@ -0,0 +1,24 @@
+# characters/signals.py
+"""
+Incrementa la versión de la tabla (characters/versions.py) con cada borrado en
+Warrior, Mage, Enemy o Item y deja una Tombstone para las exportaciones
+incrementales. Las escrituras incrementan la versión ellas mismas: save() en
+ChangeTrackedModel, update() y bulk_create() en ChangeTrackedQuerySet y las
+importaciones en bloque al sellar sus filas. De esa
+versión dependen la caché de catálogos y los ETag de listas y exportaciones.
+"""
+from django.db.models.signals import post_delete
+
+from . import versions
+from .models import Enemy, Item, Mage, Warrior
+
+TRACKED_MODELS = (Warrior, Mage, Enemy, Item)
+
+
+def record_deletion(sender, instance, **kwargs):
+    # Dentro de la transacción del borrado (Collector.delete)
+    versions.record_deletion(sender, instance.pk)
+
+
+for model in TRACKED_MODELS:
+    post_delete.connect(record_deletion, sender=model, dispatch_uid=f'table-version-{model._meta.label_lower}')
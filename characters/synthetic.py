@@ -0,0 +1,288 @@
+# characters/synthetic.py
+"""
+Synthetic data for load tests (``manage.py generate_data``).
+
+Generates users, warriors, mages, enemies and items in batches of
+``batch_size`` rows, each written with one ``executemany`` INSERT
+(``bulk_insert``) in its own transaction. Batches are spread over
+``workers`` processes (``ProcessPoolExecutor``), each writing with its own
+database connection.
+
+* Names are unique without asking the database: each row's name ends with
+  its index encoded in letters (``alpha_name``), after the run's ``prefix``
+  and a few words drawn at random, so every name passes
+  ``alphabetic_validator``. Usernames are the prefix plus the zero-padded
+  index.
+* Runs are reproducible: each batch draws its values from its own
+  ``random.Random``, seeded from the run's seed and the batch's identity, so
+  the rows are the same with any number of workers (only the pks differ).
+* Characters are dealt to the generated users in turn.
+
+Batches skip ``save()``, so the rows are stamped with one table version
+bumped per model before its first batch, and the version is bumped again
+after the last one so cached catalogs and exports see the new rows. A delta
+export taken while the generator runs may miss rows (the batches commit in
+any order); this is meant for load-test databases.
+
+The models are looked up after ``django.setup()``, which the workers call
+when they are started with the "spawn" method (Windows, macOS).
+"""
+import hashlib
+import os
+import random
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+import django
+from django.apps import apps
+from django.db import connections, transaction
+
+KINDS = ('user', 'warrior', 'mage', 'enemy', 'item')
+DEFAULT_BATCH_SIZE = 10_000
+
+GIVEN_NAMES = (
+    'Aldric', 'Brenna', 'Cedric', 'Dagna', 'Elric', 'Freya', 'Gunnar', 'Hilda', 'Ingrid', 'Joren',
+    'Kara', 'Leif', 'Maren', 'Nils', 'Orla', 'Piers', 'Ragna', 'Sven', 'Tova', 'Ulric',
+    'Álvaro', 'Begoña', 'Íñigo', 'Nuño', 'Sofía', 'Ramón', 'Lucía', 'Martín', 'Jimena', 'Tomás',
+)
+EPITHETS = (
+    'el Bravo', 'la Sabia', 'Martillo', 'Tormenta', 'de Hierro', 'Sombra', 'del Norte', "O'Brien",
+    'Rompe-Escudos', 'Corazón de León', 'el Rojo', 'la Silenciosa', 'Llama', 'Escarcha', 'el Viejo',
+)
+CREATURES = (
+    'Orco', 'Trasgo', 'Troll', 'Lobo', 'Esqueleto', 'Araña', 'Dragón', 'Gólem', 'Espectro', 'Ogro',
+    'Basilisco', 'Grifo', 'Kobold', 'Liche', 'Minotauro', 'Wyvern', 'Necrófago', 'Hidra',
+)
+CREATURE_TRAITS = ('Salvaje', 'Anciano', 'Sombrío', 'de Fuego', 'de Hielo', 'Acorazado', 'Rabioso', 'Gigante')
+ITEM_NOUNS = {
+    'SWORD': ('Espada', 'Mandoble', 'Sable', 'Estoque', 'Cimitarra'),
+    'STAFF': ('Bastón', 'Vara', 'Cetro', 'Báculo'),
+    'HEALTH_POTION': ('Poción de Vida', 'Elixir', 'Tónico', 'Bálsamo'),
+    'MANA_POTION': ('Poción de Maná', 'Esencia Arcana', 'Filtro', 'Destilado'),
+}
+ITEM_QUALITIES = ('Rúnica', 'Oxidada', 'Élfica', 'Enana', 'Bendita', 'Maldita', 'Antigua', 'Menor', 'Mayor')
+RARITIES = ('común', 'poco común', 'rara', 'épica', 'legendaria')
+ELEMENTS = ('fuego', 'hielo', 'rayo', 'veneno', 'sagrado')
+TAGS = ('comerciable', 'ligado', 'de misión', 'apilable', 'único', 'reparable')
+
+
+def alpha_name(prefix, number):
+    """Encodes ``number`` with letters only so the name passes alphabetic_validator."""
+    letters = []
+    while True:
+        number, remainder = divmod(number, 26)
+        letters.append(string.ascii_lowercase[remainder])
+        if number == 0:
+            break
+    return f"{prefix} {''.join(reversed(letters))}"
+
+
+def batch_seed(seed, *key):
+    """Stable seed (independent of PYTHONHASHSEED and of the process) for one batch."""
+    digest = hashlib.sha256(repr((seed,) + key).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def username(prefix, number, width):
+    return f'{prefix.lower()}{number:0{width}d}'
+
+
+def username_pattern(prefix, users):
+    """Regex matching the usernames of a run that generates ``users`` users."""
+    return rf'^{prefix.lower()}[0-9]{{{len(str(max(users - 1, 0)))}}}$'
+
+
+# Row builders: (random.Random, row index, run context) -> {attname: value}
+
+def build_user(rng, number, context):
+    name = username(context['prefix'], number, context['username_width'])
+    return {
+        'username': name, 'password': context['password'], 'email': f'{name}@example.com',
+        'first_name': rng.choice(GIVEN_NAMES), 'is_active': rng.random() > 0.02,
+    }
+
+
+def _owner(number, context):
+    owners = context['owners']
+    return owners[number % len(owners)]
+
+
+def build_warrior(rng, number, context):
+    return {
+        'name': alpha_name(f"{context['prefix']} {rng.choice(GIVEN_NAMES)} {rng.choice(EPITHETS)}", number),
+        'owner_id': _owner(number, context), 'health': rng.randint(80, 200), 'damage': rng.randint(10, 45),
+        'defense': rng.randint(0, 20), 'change_version': context['version'],
+    }
+
+
+def build_mage(rng, number, context):
+    return {
+        'name': alpha_name(f"{context['prefix']} {rng.choice(GIVEN_NAMES)} {rng.choice(EPITHETS)}", number),
+        'owner_id': _owner(number, context), 'health': rng.randint(50, 130), 'magic_damage': rng.randint(15, 55),
+        'mana': rng.randint(30, 150), 'defense': rng.randint(0, 12), 'change_version': context['version'],
+    }
+
+
+def build_enemy(rng, number, context):
+    return {
+        'name': alpha_name(f"{context['prefix']} {rng.choice(CREATURES)} {rng.choice(CREATURE_TRAITS)}", number),
+        'health': rng.randint(30, 400), 'attack': rng.randint(5, 50), 'defense': rng.randint(0, 25),
+        'change_version': context['version'],
+    }
+
+
+def extra_attributes(rng):
+    """A JSON object whose keys and nesting vary from item to item."""
+    attributes = {'nivel': rng.randint(1, 60), 'rareza': rng.choice(RARITIES)}
+    if rng.random() < 0.5:
+        attributes['peso'] = round(rng.uniform(0.1, 25), 1)
+    if rng.random() < 0.3:
+        attributes['encantamiento'] = {'elemento': rng.choice(ELEMENTS), 'poder': rng.randint(1, 10)}
+    if rng.random() < 0.4:
+        attributes['etiquetas'] = rng.sample(TAGS, rng.randint(1, 3))
+    if rng.random() < 0.1:
+        attributes['durabilidad'] = None
+    return attributes
+
+
+def build_item(rng, number, context):
+    item_type = rng.choice(tuple(ITEM_NOUNS))
+    is_weapon = item_type in ('SWORD', 'STAFF')
+    return {
+        'name': alpha_name(f"{context['prefix']} {rng.choice(ITEM_NOUNS[item_type])} {rng.choice(ITEM_QUALITIES)}",
+                           number),
+        'item_type': item_type, 'value': rng.randint(1, 5000),
+        'description': f"Generado para pruebas de carga (lote {number // 1000})" if rng.random() < 0.7 else None,
+        'damage_buff': rng.randint(1, 25) if is_weapon else 0,
+        'health_restore': rng.randint(10, 120) if item_type == 'HEALTH_POTION' else 0,
+        'mana_restore': rng.randint(10, 80) if item_type == 'MANA_POTION' else 0,
+        'extra_attributes': extra_attributes(rng), 'change_version': context['version'],
+    }
+
+
+BUILDERS = {
+    'user': build_user, 'warrior': build_warrior, 'mage': build_mage, 'enemy': build_enemy, 'item': build_item,
+}
+
+
+def get_models():
+    from django.contrib.auth import get_user_model
+    from .models import Enemy, Item, Mage, Warrior
+    return {'user': get_user_model(), 'warrior': Warrior, 'mage': Mage, 'enemy': Enemy, 'item': Item}
+
+
+def bulk_insert(model, rows, using='default'):
+    """
+    ``INSERT`` of ``rows`` (``{attname: value}`` dicts) sent once through
+    ``executemany``; columns missing from a row take the field's default.
+
+    Values are sent as they are, except for JSON fields, so rows must hold
+    plain str, int, bool or None values. ``bulk_create`` prepares every value
+    of every instance and, on SQLite, splits the rows into statements of 999
+    parameters (about 150 rows): several times slower for generated rows.
+    """
+    opts = model._meta
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    defaults = {field.attname: field.get_db_prep_save(field.get_default(), connection) for field in fields}
+    json_fields = [field for field in fields if field.get_internal_type() == 'JSONField']
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(opts.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    params = []
+    for row in rows:
+        for field in json_fields:
+            if field.attname in row:
+                row[field.attname] = field.get_db_prep_save(row[field.attname], connection)
+        params.append([row.get(field.attname, defaults[field.attname]) for field in fields])
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+# Workers
+
+_context = {}
+
+
+def _init_worker(context):
+    if not apps.ready:  # Started with "spawn": a fresh interpreter
+        django.setup()
+    _context.clear()
+    _context.update(context, models=get_models())
+
+
+def _write_batch(task):
+    """Builds and inserts the rows ``start``..``start + count`` of ``kind``; returns how many."""
+    kind, start, count = task
+    rng = random.Random(batch_seed(_context['seed'], kind, start))
+    build = BUILDERS[kind]
+    rows = [build(rng, number, _context) for number in range(start, start + count)]
+    if kind != 'user':
+        # In name order the unique index is filled left to right: a quarter faster on SQLite
+        rows.sort(key=itemgetter('name'))
+    with transaction.atomic(using=_context['database']):
+        bulk_insert(_context['models'][kind], rows, using=_context['database'])
+    return count
+
+
+def write_batches(kind, total, context, workers=1, batch_size=DEFAULT_BATCH_SIZE):
+    """Writes ``total`` rows of ``kind`` in batches, in this process or in ``workers`` processes."""
+    tasks = [(kind, start, min(batch_size, total - start)) for start in range(0, total, batch_size)]
+    if workers <= 1 or len(tasks) <= 1:
+        _init_worker(context)
+        return sum(map(_write_batch, tasks))
+    # The workers open their own connections; a forked copy of this one must not be used
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(context,)) as executor:
+        return sum(executor.map(_write_batch, tasks))
+
+
+def generate(counts, seed=0, prefix='Gen', password=None, workers=1, batch_size=DEFAULT_BATCH_SIZE,
+             database='default', progress=None):
+    """
+    Generates ``counts[kind]`` rows of each kind in ``KINDS`` (missing kinds:
+    none). Warriors and mages are dealt to the users generated in this run.
+    ``progress(kind, rows, seconds)`` is called after each kind.
+    """
+    from django.contrib.auth.hashers import make_password
+    from . import versions
+
+    models = get_models()
+    users = counts.get('user', 0)
+    context = {
+        'seed': seed, 'prefix': prefix, 'database': database,
+        # One hash for every user: hashing each password would take longer than the rest
+        'password': make_password(password),
+        'username_width': len(str(max(users - 1, 0))),
+        'owners': [], 'version': 0,
+    }
+    for kind in KINDS:
+        total = counts.get(kind, 0)
+        if not total:
+            continue
+        if kind in ('warrior', 'mage') and not context['owners']:
+            context['owners'] = list(
+                models['user'].objects.using(database).filter(username__regex=username_pattern(prefix, users))
+                .order_by('username').values_list('pk', flat=True)
+            )
+            if not context['owners']:
+                raise ValueError("Warriors and mages need users to own them.")
+        tracked = versions.is_tracked(models[kind])
+        if tracked:
+            context['version'] = versions.bump(models[kind])
+        start = time.perf_counter()
+        written = write_batches(kind, total, context, workers, batch_size)
+        if tracked:
+            versions.bump(models[kind])
+        if progress:
+            progress(kind, written, time.perf_counter() - start)
+    return context
+
+
+def default_workers():
+    return os.cpu_count() or 1
@@ -1,3 +1,1246 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from importlib import import_module
+from importlib.util import find_spec, module_from_spec, spec_from_file_location
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import tablib
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser, Permission
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.db.models import Count
+from django.conf import settings
+from django.test import (
+    AsyncClient, AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from DjangoProject import instrumentation
+
+from . import async_views, benchmarks, jobs, versions, views
+from .exporters import JSONArrayWriter
+from .forms import BatchValidatedModelForm, EnemyForm
+from .importers import BulkImporter, NotAJSONArray, RowImporter, iter_json_array
+from .models import Enemy, ImportCheckpoint, Item, Job, Mage, Tombstone, Warrior
+from .pagination import BINARY_COLLATIONS, encode_cursor, keyset_paginate
+from .resources import WarriorResource
+from .synthetic import alpha_name
+from .validation import BatchValidator
+
+
+class OwnerRequiredMixinTests(TestCase):
+    """Edit/delete views fetch the object once and check owner_id without loading the owner."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.owner = User.objects.create_user(username='owner', password='pass')
+        cls.other = User.objects.create_user(username='other', password='pass')
+        cls.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        cls.warrior = Warrior.objects.create(name='Conan', owner=cls.owner)
+        cls.mage = Mage.objects.create(name='Merlin', owner=cls.owner)
+
+    def selects_from(self, queries, table):
+        return [q['sql'] for q in queries if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql']]
+
+    def test_update_get_fetches_object_once(self):
+        self.client.force_login(self.owner)
+        url = reverse('characters:warrior_update', args=[self.warrior.pk])
+        # Session, user and the warrior itself
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_post_fetches_object_once(self):
+        self.client.force_login(self.owner)
+        url = reverse('characters:mage_update', args=[self.mage.pk])
+        data = {'name': 'Merlina', 'health': 90, 'defense': 5, 'magic_damage': 30, 'mana': 60}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data)
+        self.assertRedirects(response, reverse('characters:character_list'), fetch_redirect_response=False)
+        self.assertEqual(len(self.selects_from(queries, 'characters_mage')), 2)  # get_object + unique name check
+        self.assertEqual(Mage.objects.get(pk=self.mage.pk).name, 'Merlina')
+
+    def test_delete_fetches_object_once(self):
+        self.client.force_login(self.owner)
+        url = reverse('characters:warrior_delete', args=[self.warrior.pk])
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(self.selects_from(queries, 'characters_warrior')), 1)
+        self.assertFalse(Warrior.objects.filter(pk=self.warrior.pk).exists())
+
+    def test_owner_is_not_loaded(self):
+        self.client.force_login(self.other)
+        url = reverse('characters:mage_delete', args=[self.mage.pk])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        # The only user lookup is the session's own user
+        self.assertEqual(len(self.selects_from(queries, 'users_customuser')), 1)
+
+    def test_permissions_unchanged(self):
+        cases = [
+            (self.owner, 200),
+            (self.admin, 200),
+            (self.other, 403),
+        ]
+        for user, status in cases:
+            self.client.force_login(user)
+            for name, obj in (('warrior_update', self.warrior), ('warrior_delete', self.warrior),
+                              ('mage_update', self.mage), ('mage_delete', self.mage)):
+                with self.subTest(user=user.username, view=name):
+                    response = self.client.get(reverse(f'characters:{name}', args=[obj.pk]))
+                    self.assertEqual(response.status_code, status)
+
+    def test_missing_object_is_404(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('characters:warrior_update', args=[self.warrior.pk + 1000]))
+        self.assertEqual(response.status_code, 404)
+
+
+class CatalogCacheTests(TestCase):
+    """Catalog pages are served from the cache until the catalog changes, never after."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='viewer', password='pass', is_staff=True)
+        cls.enemy = Enemy.objects.create(name='Orco', health=50)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('characters:enemy_list')
+
+    def test_hit_skips_catalog_query(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertFalse([q for q in queries if 'FROM "characters_enemy"' in q['sql']])
+
+    def test_edit_and_import_are_visible_at_once(self):
+        self.client.get(self.url)
+        self.enemy.health = 777
+        self.enemy.save()
+        self.assertContains(self.client.get(self.url), '777')
+
+        BulkImporter(Enemy, {'name': 'name', 'health': 'health', 'attack': 'attack', 'defense': 'defense'}).run(
+            [{'name': 'Troll', 'health': 10, 'attack': 1, 'defense': 1}]
+        )
+        self.assertContains(self.client.get(self.url), 'Troll')
+
+        Enemy.objects.filter(name='Troll').get().delete()
+        self.assertNotContains(self.client.get(self.url), 'Troll')
+
+        Enemy.objects.filter(pk=self.enemy.pk).update(health=555)
+        self.assertContains(self.client.get(self.url), '555')
+
+    def test_key_holds_only_the_page(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            for junk in range(5):
+                self.client.get(self.url, {'utm': junk, 'page': junk})
+        self.assertFalse([q for q in queries if 'FROM "characters_enemy"' in q['sql']])
+        self.assertNotContains(self.client.get(self.url, {'utm': 'x'}), 'utm=')
+
+        # The same cursor with or without base64 padding is the same page
+        cursor = encode_cursor(['Orco', '', self.enemy.pk])
+        padded = cursor + '=' * (-len(cursor) % 4)
+        self.assertEqual(views.EnemyListView(request=RequestFactory().get('/', {'before': cursor})).get_fragment_key(),
+                         views.EnemyListView(request=RequestFactory().get('/', {'before': padded})).get_fragment_key())
+        self.assertNotEqual(views.EnemyListView(request=RequestFactory().get('/', {'after': cursor})).get_fragment_key(),
+                            views.EnemyListView(request=RequestFactory().get('/', {'before': cursor})).get_fragment_key())
+
+
+class KeysetPaginationTests(TestCase):
+    """Pages merged from several tables, walked in both directions, match one sort of all the rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = get_user_model().objects.create_user(username='owner')
+        # Shared names across tables, and names whose order differs between code points and a locale
+        names = ['Eco', 'Zorro', 'ana', 'Ángel', 'Ñu', 'eco', 'Bruma']
+        for name in names:
+            Warrior.objects.create(name=name, owner=owner)
+        for name in names[:4] + ['Alba']:
+            Mage.objects.create(name=name, owner=owner)
+
+    def sources(self):
+        return [('mage', Mage.objects.all()), ('warrior', Warrior.objects.all())]
+
+    def expected(self):
+        rows = [(name, 'mage', pk) for pk, name in Mage.objects.values_list('pk', 'name')]
+        rows += [(name, 'warrior', pk) for pk, name in Warrior.objects.values_list('pk', 'name')]
+        return sorted(rows)  # Python's str order: by code point
+
+    def keys(self, page):
+        return [(row.name, row.kind, row.pk) for row in page]
+
+    def test_forward_and_backward(self):
+        expected = self.expected()
+        for size in (1, 2, 5):
+            with self.subTest(size=size):
+                pages = [keyset_paginate(self.sources(), size)]
+                while pages[-1].has_next:
+                    pages.append(keyset_paginate(self.sources(), size, after=pages[-1].next_cursor))
+                self.assertEqual([key for page in pages for key in self.keys(page)], expected)
+                self.assertFalse(pages[0].has_previous)
+                self.assertTrue(0 < len(pages[-1]) <= size)
+
+                # Back from the last page, through the same pages
+                back = [pages[-1]]
+                while back[-1].has_previous:
+                    back.append(keyset_paginate(self.sources(), size, before=back[-1].previous_cursor))
+                self.assertEqual([self.keys(page) for page in reversed(back)], [self.keys(page) for page in pages])
+
+    def test_last_page(self):
+        expected = self.expected()
+        page = keyset_paginate(self.sources(), 3)
+        while page.has_next:
+            page = keyset_paginate(self.sources(), 3, after=page.next_cursor)
+        self.assertEqual(self.keys(page), expected[-len(page):])
+        self.assertIsNone(page.next_cursor)
+        self.assertEqual(self.keys(keyset_paginate(self.sources(), 3, before=page.previous_cursor)),
+                         expected[-len(page) - 3:-len(page)])
+
+    def test_queries_use_binary_collation(self):
+        with CaptureQueriesContext(connection) as queries:
+            keyset_paginate(self.sources(), 2)
+        self.assertEqual(len(queries), 2)
+        for query in queries:
+            self.assertIn(f'COLLATE "{BINARY_COLLATIONS[connection.vendor]}"', query['sql'])
+
+
+class CharacterListScopeTests(TestCase):
+    """?scope=mine lists the user's characters through the (owner, name) indexes; ?scope=all everyone's."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.player = User.objects.create_user(username='player')
+        other = User.objects.create_user(username='other')
+        Warrior.objects.create(name='Conan', owner=cls.player)
+        Mage.objects.create(name='Merlin', owner=cls.player)
+        Warrior.objects.create(name='Xena', owner=other)
+        Mage.objects.create(name='Morgana', owner=other)
+
+    def setUp(self):
+        self.client.force_login(self.player)
+        self.url = reverse('characters:character_list')
+
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [character.name for character in response.context['characters']]
+
+    def test_scopes(self):
+        self.assertEqual(self.names(), ['Conan', 'Merlin'])
+        self.assertEqual(self.names(scope='mine'), ['Conan', 'Merlin'])
+        self.assertEqual(self.names(scope='everything'), ['Conan', 'Merlin'])  # Unknown scopes fall back to mine
+        self.assertEqual(self.names(scope='all'), ['Conan', 'Merlin', 'Morgana', 'Xena'])
+        self.assertEqual(self.client.get(self.url, {'scope': 'all'}).context['scope'], 'all')
+
+    @skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN is SQLite's")
+    def test_owner_filter_uses_owner_name_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        plans = {}
+        for query in queries:
+            for table in ('warrior', 'mage'):
+                if f'FROM "characters_{table}"' in query['sql']:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                        plans[table] = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('USING INDEX warrior_owner_name_idx (owner_id=?)', plans['warrior'])
+        self.assertIn('USING INDEX mage_owner_name_idx (owner_id=?)', plans['mage'])
+        # The index also gives the order: no sort of the owner's rows
+        for plan in plans.values():
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.client.get(self.url, {'scope': 'all'})
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url, {'scope': 'all'})
+        Warrior.objects.bulk_create(Warrior(name=alpha_name('Guerrero', n), owner=self.player) for n in range(60))
+        with self.assertNumQueries(len(few)):
+            self.assertEqual(len(self.names(scope='all')), views.CharacterListView.page_size)
+
+
+class ConditionalGetTests(TestCase):
+    """Exports and lists answer a matching If-None-Match with 304 without reading the table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='staff', password='pass', is_staff=True)
+        Warrior.objects.create(name='Conan', owner=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_not_modified_until_the_table_changes(self):
+        for name in ('warrior_export', 'character_list'):
+            with self.subTest(view=name):
+                url = reverse(f'characters:{name}')
+                response = self.client.get(url)
+                etag = response['ETag']
+                self.assertIn('Last-Modified', response)
+
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse([q for q in queries if 'FROM "characters_warrior"' in q['sql']])
+
+                Warrior.objects.create(name=f'Otro {name.split("_")[1]}', owner=self.user)
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class TableVersionTests(TestCase):
+    """A transaction bumps each table once; every ORM write path bumps it."""
+
+    def version_updates(self, queries):
+        return [q for q in queries if q['sql'].startswith('UPDATE "characters_tableversion"')]
+
+    def test_one_bump_per_transaction(self):
+        versions.bump(Enemy)
+        versions.get_version(Enemy)  # Handed out: the next write bumps again
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            enemies = [Enemy.objects.create(name=name) for name in ('Orco', 'Troll', 'Goblin')]
+            enemies[0].delete()
+        self.assertEqual(len(self.version_updates(queries)), 1)
+        self.assertEqual({enemy.change_version for enemy in enemies}, {versions.get_version(Enemy)})
+
+    def test_rolled_back_savepoint_forgets_its_bump(self):
+        with transaction.atomic():
+            first = versions.bump(Enemy)
+            with transaction.atomic():
+                self.assertEqual(versions.bump(Item), 1)
+                transaction.set_rollback(True)
+            self.assertEqual(versions.bump(Item), 1)  # Bumped again: the first one was rolled back
+            self.assertEqual(versions.bump(Enemy), first)
+
+    def test_django_on_commit_internals(self):
+        # versions._pending_versions reads these Django internals; if a release changes
+        # them, coalescing silently stops (one bump per write) and this test fails
+        with transaction.atomic():
+            with transaction.atomic():
+                versions.bump(Enemy)
+                self.assertIsInstance(connection.savepoint_ids, list)
+                entries = [entry for entry in connection.run_on_commit
+                           if isinstance(entry[1], versions._TransactionVersions)]
+                self.assertEqual(len(entries), 1)
+                sids, func, robust = entries[0]
+                self.assertEqual(set(sids), set(connection.savepoint_ids))
+                self.assertIs(robust, False)
+                self.assertEqual(versions._pending_versions(connection), [(set(sids), func)])
+
+    def test_read_version_is_not_reused(self):
+        # Writes after a version was handed out (an ETag, an export cursor) get a newer one
+        with transaction.atomic():
+            orc = Enemy.objects.create(name='Orco')
+            cursor = versions.get_version(Enemy)
+            troll = Enemy.objects.create(name='Troll')
+        self.assertEqual(orc.change_version, cursor)
+        self.assertGreater(troll.change_version, cursor)
+
+    def test_queryset_writes_bump(self):
+        orc = Enemy.objects.create(name='Orco')
+        cursor = versions.get_version(Enemy)
+        Enemy.objects.filter(pk=orc.pk).update(health=1)
+        self.assertEqual(Enemy.objects.get(pk=orc.pk).change_version, versions.get_version(Enemy))
+        self.assertGreater(versions.get_version(Enemy), cursor)
+
+        cursor = versions.get_version(Enemy)
+        troll, = Enemy.objects.bulk_create([Enemy(name='Troll')])
+        self.assertGreater(troll.change_version, cursor)
+        cursor = versions.get_version(Enemy)
+        troll.health = 5
+        Enemy.objects.bulk_update([troll], ['health'])
+        self.assertEqual(list(versions.changed_since(Enemy.objects.all(), cursor, versions.get_version(Enemy))),
+                         [troll])
+
+
+class DeltaExportTests(TestCase):
+    """?since= exports only the rows written or deleted after the cursor of an earlier export."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='staff', password='pass', is_staff=True)
+        cls.conan = Warrior.objects.create(name='Conan', owner=cls.user)
+        cls.xena = Warrior.objects.create(name='Xena', owner=cls.user)
+        Warrior.objects.create(name='Sonja', owner=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('characters:warrior_export')
+
+    def export(self, **params):
+        response = self.client.get(self.url, {'format': 'ndjson', **params})
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        return rows, response['X-Export-Cursor']
+
+    def test_changes_and_tombstones_after_cursor(self):
+        rows, cursor = self.export()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(self.export(since=cursor), ([], cursor))
+
+        self.conan.health = 150
+        self.conan.save(update_fields=['health'])
+        BulkImporter(Warrior, {'name': 'name', 'owner_id': 'owner_id'}).run(
+            [{'name': 'Red', 'owner_id': self.user.pk}]
+        )
+        xena_pk = self.xena.pk
+        self.xena.delete()
+
+        rows, new_cursor = self.export(since=cursor)
+        self.assertGreater(int(new_cursor), int(cursor))
+        self.assertEqual([row.get('name') for row in rows], ['Conan', 'Red', None])
+        self.assertEqual(rows[0]['health'], 150)
+        self.assertEqual(rows[2], {'id': xena_pk, '_deleted': True})
+        self.assertEqual(self.export(since=new_cursor), ([], new_cursor))
+
+    def test_bad_since(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'since': '1', 'background': '1'}).status_code, 400)
+
+    def test_prune_tombstones(self):
+        _, cursor = self.export()
+        xena_pk = self.xena.pk
+        self.xena.delete()
+        rows, new_cursor = self.export(since=cursor)
+        self.assertEqual(rows, [{'id': xena_pk, '_deleted': True}])
+
+        # Kept while younger than the retention
+        call_command('prune_tombstones', stdout=StringIO())
+        self.assertEqual(self.export(since=cursor)[0], rows)
+
+        out = StringIO()
+        call_command('prune_tombstones', days=0, stdout=out)
+        self.assertIn('1 borrados', out.getvalue())
+        self.assertFalse(Tombstone.objects.exists())
+        self.assertTrue(versions.since_expired(Warrior, int(cursor)))
+        response = self.client.get(self.url, {'format': 'ndjson', 'since': cursor})
+        self.assertEqual(response.status_code, 410)
+        # A cursor taken after the pruned deletion still works, and so does a full export
+        self.assertEqual(self.export(since=new_cursor), ([], new_cursor))
+        self.assertEqual(len(self.export()[0]), 2)
+
+
+class JSONExportTests(TestCase):
+    """The streamed JSON export is byte for byte what json.dumps gives for the whole list."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='staff', password='pass', is_staff=True)
+        for name in ('Ñandú', 'Ángel Caído', 'Zoë', "O'Brien", 'Conan'):
+            Warrior.objects.create(name=name, owner=cls.user)
+
+    def test_body_matches_json_dumps(self):
+        self.client.force_login(self.user)
+        fields = views.WarriorExportView.fields_to_export
+        data = [dict(zip(fields, values)) for values in Warrior.objects.values_list(*fields)]
+        expected = json.dumps(data, indent=4, ensure_ascii=False).encode()
+        # Batches of one, a split batch and a single batch
+        for chunk_size in (1, 2, 2000):
+            with self.subTest(chunk_size=chunk_size), \
+                    mock.patch.object(views.WarriorExportView, 'export_chunk_size', chunk_size):
+                response = self.client.get(reverse('characters:warrior_export'), {'format': 'json'})
+                self.assertEqual(b''.join(response.streaming_content), expected)
+
+    def test_writer(self):
+        rows = [{'name': 'Ñu', 'extra': {'nivel': [1, 2], 'vacío': {}}}, {'name': 'Zoë', 'extra': None}]
+        for indent in (None, 4):
+            writer = JSONArrayWriter(indent=indent)
+            for count in (0, 1, 2):
+                with self.subTest(indent=indent, count=count):
+                    body = ''.join(writer(rows[:count], batch_size=1))
+                    self.assertEqual(body, json.dumps(rows[:count], indent=indent, ensure_ascii=False))
+
+
+class ExportFormatTests(TestCase):
+    """The binary formats carry the same rows as the NDJSON export."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='staff', password='pass', is_staff=True)
+        Item.objects.create(name='Espada', item_type='SWORD', damage_buff=5, extra_attributes={'rareza': 'épica'})
+        Item.objects.create(name='Poción', item_type='HEALTH_POTION', description=None, health_restore=None)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('characters:item_export')
+
+    def export(self, format_name, **params):
+        response = self.client.get(self.url, {'format': format_name, **params})
+        self.assertEqual(response.status_code, 200)
+        return response, response.getvalue()
+
+    def ndjson_rows(self, **params):
+        return [json.loads(line) for line in self.export('ndjson', **params)[1].splitlines()]
+
+    def test_gzip_ndjson(self):
+        response, body = self.export('ndjson.gz')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('items.ndjson.gz', response['Content-Disposition'])
+        self.assertEqual(gzip.decompress(body), self.export('ndjson')[1])
+
+    @skipUnless(find_spec('pyarrow'), "pyarrow is not installed")
+    def test_columnar_formats(self):
+        import pyarrow
+        import pyarrow.parquet
+
+        expected = self.ndjson_rows()
+        for row in expected:
+            row['extra_attributes'] = json.dumps(row['extra_attributes'], ensure_ascii=False)
+        for format_name in ('arrow', 'parquet'):
+            with self.subTest(format=format_name):
+                body = pyarrow.BufferReader(self.export(format_name)[1])
+                if format_name == 'arrow':
+                    table = pyarrow.ipc.open_stream(body).read_all()
+                else:
+                    table = pyarrow.parquet.read_table(body)
+                self.assertEqual(table.schema.field('damage_buff').type, pyarrow.int64())
+                self.assertEqual(table.to_pylist(), expected)
+
+        cursor = self.export('parquet')[0]['X-Export-Cursor']
+        Item.objects.get(name='Espada').delete()
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(self.export('parquet', since=cursor)[1]))
+        self.assertEqual(table.select(['_deleted']).to_pylist(), [{'_deleted': True}])
+
+
+class BatchValidationTests(TestCase):
+    """Imports, the admin and the forms share one validator: set-based queries, same rules as full_clean()."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.orc = Enemy.objects.create(name='Orco')
+        cls.troll = Enemy.objects.create(name='Troll')
+
+    def test_unique_names_in_file_order(self):
+        validator = BatchValidator(Enemy)
+        rows = [
+            (self.troll.pk, {'name': 'Ogro'}),   # Renames Troll...
+            ('new 1', {'name': 'Troll'}),        # ...so a new row can take its name
+            ('new 2', {'name': 'Ogro'}),         # Taken by the rename
+            ('new 3', {'name': 'Orco'}),         # Held in the database
+            ('new 4', {'name': 'Goblin'}),
+        ]
+        with self.assertNumQueries(1):
+            validator.prefetch(data for _, data in rows)
+            errors = [validator.check_unique(key, data) for key, data in rows]
+        self.assertEqual([bool(e) for e in errors], [False, False, True, True, False])
+        self.assertEqual(errors[3], {'name': ['Enemy with this Name already exists.']})
+
+    def test_field_validators(self):
+        validator = BatchValidator(Enemy)
+        cleaned, errors = validator.clean({'name': 'Orco 2', 'health': '-1', 'attack': '7'})
+        self.assertEqual(set(errors), {'name', 'health'})
+        self.assertEqual(cleaned['attack'], 7)
+        self.assertEqual(validator.clean({'attack': '7'}), ({'attack': 7}, {}))
+
+    def test_json_import(self):
+        result = BulkImporter(Enemy, {'id': 'id', 'name': 'name', 'health': 'health'}).run([
+            {'id': self.orc.pk, 'name': 'Trasgo'},
+            {'name': 'Orco'},
+            {'name': 'Trasgo'},
+            {'name': 'Lobo 1'},
+            {'name': 'Lobo', 'health': -5},
+        ])
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertEqual([message.split(':')[0] for message in result.errors], ['Object 3', 'Object 4', 'Object 5'])
+        self.assertIn('already exists', result.errors[0])
+        self.assertFalse(Enemy.objects.filter(name__in=['Lobo 1', 'Lobo']).exists())
+
+    def test_admin_import(self):
+        user = get_user_model().objects.create_user(username='owner')
+        Warrior.objects.create(name='Conan', owner=user)
+        data = tablib.Dataset(headers=['id', 'owner', 'name', 'health', 'damage', 'defense'])
+        for name, health in [('Conan', 90), ('Xena', 90), ('Xena', 80), ('R2 D2', 90), ('Sonja', -1)]:
+            data.append(['', user.pk, name, health, 15, 8])
+        result = WarriorResource().import_data(data, use_transactions=True)
+        self.assertEqual([row.number for row in result.invalid_rows], [1, 3, 4, 5])
+        self.assertEqual(list(Warrior.objects.values_list('name', flat=True)), ['Conan', 'Xena'])
+
+    def test_form(self):
+        form = EnemyForm(data={'name': 'Orco', 'health': 10, 'attack': 1, 'defense': 1})
+        self.assertEqual(form.errors['name'], ['Enemy with this Name already exists.'])
+        form = EnemyForm(instance=self.orc, data={'name': 'Orco', 'health': 10, 'attack': 1, 'defense': 1})
+        self.assertTrue(form.is_valid())
+        # Only name is unique: one query checks it and Django's own checks are not run again
+        with self.assertNumQueries(1):
+            self.assertTrue(EnemyForm(data={'name': 'Duende', 'health': 10, 'attack': 1, 'defense': 1}).is_valid())
+
+    def test_form_keeps_other_unique_checks(self):
+        # unique_together (content_type, codename) is still checked by Django
+        class PermissionForm(BatchValidatedModelForm):
+            class Meta:
+                model = Permission
+                fields = ['name', 'content_type', 'codename']
+
+        permission = Permission.objects.first()
+        data = {'name': 'Otro', 'content_type': permission.content_type_id, 'codename': permission.codename}
+        form = PermissionForm(data=data)
+        self.assertEqual(form.errors['__all__'],
+                         ['Permission with this Content type and Codename already exists.'])
+        self.assertTrue(PermissionForm(data={**data, 'codename': 'nuevo_permiso'}).is_valid())
+
+
+class ImporterParityTests(TestCase):
+    """BulkImporter reports what RowImporter reports, and leaves the same rows, on a mixed payload."""
+    mapping = views.EnemyImportView.fields_mapping
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.orc = Enemy.objects.create(name='Orco', health=50)
+        cls.troll = Enemy.objects.create(name='Troll', health=90)
+
+    def payload(self):
+        return [
+            {'name': 'Goblin', 'health': 30},                       # New
+            {'id': self.orc.pk, 'name': 'Orco', 'health': 55},      # Update
+            'not an object',                                        # Not a JSON object
+            {'name': 'Troll', 'health': 10},                        # Name taken by an existing row
+            {'name': 'Kobold', 'health': 'lots'},                   # Not a number
+            {'name': 'Goblin', 'attack': 3},                        # Name taken earlier in the file
+            {'id': self.troll.pk, 'name': 'Trol', 'defense': 8},    # Rename
+            {'name': 'Troll', 'health': 20},                        # Name freed by the rename
+            {'id': 999999, 'name': 'Dragon'},                       # Unknown id: created with it
+        ]
+
+    def run_importer(self, importer):
+        # Each run is rolled back, so both start from the same rows
+        with transaction.atomic():
+            result = importer.run(self.payload())
+            rows = sorted(Enemy.objects.values_list('name', 'health', 'attack', 'defense'))
+            transaction.set_rollback(True)
+        return (result.created, result.updated, [message.split(':', 1)[0] for message in result.errors]), rows
+
+    def test_same_counts_errors_and_rows(self):
+        row = self.run_importer(RowImporter(Enemy, self.mapping))
+        self.assertEqual(row[0], (3, 2, ['Object 3', 'Object 4', 'Object 5', 'Object 6']))
+        for batch_size in (1, 2, 500):
+            with self.subTest(batch_size=batch_size):
+                self.assertEqual(self.run_importer(BulkImporter(Enemy, self.mapping, batch_size=batch_size)), row)
+
+    def test_database_error_replays_the_batch_row_by_row(self):
+        # A conflict the batch validation misses: the database rejects the batch
+        with mock.patch.object(BatchValidator, 'check_unique', return_value={}), \
+                CaptureQueriesContext(connection) as queries:
+            bulk = self.run_importer(BulkImporter(Enemy, self.mapping))
+        self.assertEqual(bulk, self.run_importer(RowImporter(Enemy, self.mapping)))
+        self.assertTrue([q for q in queries if q['sql'].startswith('ROLLBACK TO SAVEPOINT')])
+
+
+class OwnerResolutionTests(TestCase):
+    """owner_id is checked against one in_bulk per batch; missing owners fall back to the importing user."""
+    mapping = views.WarriorImportView.fields_mapping
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.players = [User.objects.create_user(username=f'player{n}') for n in range(3)]
+        versions.bump(Warrior)  # The first bump of a table also creates its row
+
+    def importer(self, **kwargs):
+        return BulkImporter(Warrior, self.mapping, owner=self.staff, owner_field='owner', **kwargs)
+
+    def rows(self, count):
+        # Someone else's warriors, spread over three owners
+        return [{'name': alpha_name('Warrior', n), 'owner_id': self.players[n % 3].pk} for n in range(count)]
+
+    def test_foreign_missing_and_absent_owners(self):
+        result = self.importer().run([
+            {'name': 'Conan', 'owner_id': self.players[1].pk},
+            {'name': 'Xena', 'owner_id': 999999},
+            {'name': 'Red Sonja'},
+            {'name': 'Kull', 'owner_id': 'abc'},
+        ])
+        self.assertEqual((result.created, result.updated), (3, 0))
+        self.assertEqual(result.errors[0], 'Object 2: Owner with ID 999999 not found. Assigning to current admin.')
+        self.assertTrue(result.errors[1].startswith('Object 4: '))
+        owners = dict(Warrior.objects.values_list('name', 'owner'))
+        self.assertEqual(owners, {'Conan': self.players[1].pk, 'Xena': self.staff.pk, 'Red Sonja': self.staff.pk})
+
+    def test_one_owner_query_per_batch(self):
+        # Owners (one in_bulk), taken names, the table version (bump and read), the INSERT and
+        # four savepoint statements, whatever the number of rows (up to one INSERT's worth)
+        for count in (3, 150):
+            with self.subTest(count=count), self.assertNumQueries(9):
+                self.importer().run(self.rows(count))
+            Warrior.objects.all().delete()
+        # Owners are cached for the whole import: later batches do not look them up again
+        with CaptureQueriesContext(connection) as queries:
+            result = self.importer(batch_size=50).run(self.rows(300))
+        self.assertEqual(result.created, 300)
+        self.assertEqual(len([q for q in queries if 'FROM "users_customuser"' in q['sql']]), 1)
+
+    def test_row_importer_looks_up_each_owner_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            RowImporter(Warrior, self.mapping, owner=self.staff, owner_field='owner').run(self.rows(30))
+        self.assertEqual(len([q for q in queries if 'FROM "users_customuser"' in q['sql']]), 3)
+
+
+class IterJsonArrayTests(SimpleTestCase):
+    """The streaming parser gives what json.loads gives, wherever the chunks are split."""
+    documents = [
+        '[]',
+        ' [ ] ',
+        '[1, -0, 12.5, 1e-5, -3.25E+2, true, false, null]',
+        '[{"name": "Ñandú", "tags": ["fuego", "hielo"], "stats": {"hp": 10, "mp": [1, [2, {}]]}}]',
+        '[" \\"quoted\\" ", "tab\\t, newline\\n, slash \\/ and backslash \\\\", "\\u00f1 \\ud83d\\ude00"]',
+        '["ñ, €, 😀 in UTF-8", {"clave": "válida"}]',
+        '\n[\n  {"a": 1},\n  {"b": [1e3, 12345678901234567890]}\n]\n',
+        '[[], {}, [[[]]], ""]',
+    ]
+    chunk_sizes = (1, 2, 3, 5, 7, 64)
+
+    def parse(self, data, size):
+        return list(iter_json_array(data[start:start + size] for start in range(0, len(data), size)))
+
+    def test_matches_json_loads(self):
+        for document in self.documents:
+            data = document.encode()
+            for size in self.chunk_sizes:
+                with self.subTest(document=document, size=size):
+                    self.assertEqual(self.parse(data, size), json.loads(document))
+
+    def test_bom(self):
+        data = b'\xef\xbb\xbf[{"name": "Orco"}, 2]'
+        for size in self.chunk_sizes:
+            with self.subTest(size=size):
+                self.assertEqual(self.parse(data, size), json.loads(data.decode('utf-8-sig')))
+
+    def test_not_an_array(self):
+        for document in ('{"name": "Orco"}', '"text"', '12', 'null'):
+            for size in (1, 64):
+                with self.subTest(document=document, size=size), self.assertRaises(NotAJSONArray):
+                    self.parse(document.encode(), size)
+
+    def test_malformed(self):
+        for document in ('', '   ', '[', '[1, 2', '[{"a": 1}', '[1 2]', '[1,]', '[1] x', '["open]', '[{"a" 1}]', '[tru]'):
+            with self.assertRaises(json.JSONDecodeError):
+                json.loads(document)
+            for size in (1, 3, 64):
+                with self.subTest(document=document, size=size), self.assertRaises(json.JSONDecodeError):
+                    self.parse(document.encode(), size)
+
+
+class ResumableImportTests(TestCase):
+    """Chunked imports commit with a checkpoint, so a failed file resumes where it stopped."""
+    mapping = {'name': 'name', 'health': 'health'}
+
+    def rows(self, fail_at=None):
+        for number in range(5):
+            if number == fail_at:
+                raise RuntimeError('worker died')
+            yield {'name': f'Enemigo {"abcde"[number]}'}
+
+    def test_resume_after_failure(self):
+        with self.assertRaises(RuntimeError):
+            BulkImporter(Enemy, self.mapping, batch_size=2).run_resumable(self.rows(fail_at=3), 'abc', chunk_size=2)
+        self.assertEqual(Enemy.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get().rows_done, 2)
+
+        result = BulkImporter(Enemy, self.mapping, batch_size=2).run_resumable(self.rows(), 'abc', chunk_size=2)
+        self.assertEqual((result.created, result.updated, result.resumed_from), (5, 0, 2))
+        self.assertIn('Resumed after object 2.', result.message)
+        self.assertEqual(Enemy.objects.count(), 5)
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_all_or_nothing(self):
+        with self.assertRaises(RuntimeError):
+            BulkImporter(Enemy, self.mapping).run(self.rows(fail_at=3))
+        self.assertFalse(Enemy.objects.exists())
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_view(self):
+        self.client.force_login(get_user_model().objects.create_user(username='staff', is_staff=True))
+        broken = b'[{"name": "Orco"}, {"name": "Troll"}, {"name": '
+        url = reverse('characters:enemy_import')
+        with mock.patch.object(views.EnemyImportView, 'import_commit_size', 1):
+            response = self.client.post(url, {'json_file': SimpleUploadedFile('e.json', broken), 'all_or_nothing': '1'})
+            self.assertContains(response, 'Error reading JSON file')
+            self.assertFalse(Enemy.objects.exists())
+
+            response = self.client.post(url, {'json_file': SimpleUploadedFile('e.json', broken)})
+            self.assertContains(response, 'submit the same file to resume')
+            self.assertEqual(sorted(Enemy.objects.values_list('name', flat=True)), ['Orco', 'Troll'])
+            self.assertEqual(ImportCheckpoint.objects.get().rows_done, 2)
+
+
+class JobTests(TestCase):
+    """Background imports/exports, run inline (JOBS_MAX_WORKERS=0) once the request commits."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.player = User.objects.create_user(username='player')
+        Enemy.objects.create(name='Orco', health=50)
+        Enemy.objects.create(name='Ñu Salvaje', health=70)
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+        self.enterContext(override_settings(JOBS_ROOT=self.root, JOBS_MAX_WORKERS=0))
+        self.client.force_login(self.staff)
+
+    def status(self, job):
+        return self.client.get(reverse('characters:job_status', args=[job.pk])).json()
+
+    def test_import(self):
+        orc = Enemy.objects.get(name='Orco')
+        body = json.dumps([{'name': 'Troll', 'health': 90}, {'id': orc.pk, 'name': 'Orco', 'health': 55}])
+        upload = SimpleUploadedFile('e.json', body.encode())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('characters:enemy_import'), {'json_file': upload, 'background': '1'})
+        job = response.context['job']
+        payload = self.status(job)
+        self.assertEqual((payload['status'], payload['progress']), (Job.DONE, 100))
+        self.assertEqual((payload['created'], payload['updated']), (1, 1))
+        self.assertEqual(Enemy.objects.get(name='Orco').health, 55)
+        self.assertEqual(os.listdir(self.root), [])  # The upload is removed
+
+    def test_export_and_download(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse('characters:enemy_export') + '?format=json&background=1')
+        self.assertEqual(response.status_code, 202)
+        payload = self.status(Job.objects.get(pk=response.json()['id']))
+        self.assertEqual(payload['status'], Job.DONE)
+
+        response = self.client.get(payload['download_url'])
+        self.assertEqual(response.status_code, 200)
+        names = [row['name'] for row in json.loads(b''.join(response.streaming_content))]
+        self.assertEqual(sorted(names), ['Orco', 'Ñu Salvaje'])
+        response.close()
+
+    def test_download_not_ready(self):
+        job = Job.objects.create(kind=Job.KIND_EXPORT, view='', owner=self.staff)
+        self.assertEqual(self.client.get(reverse('characters:job_download', args=[job.pk])).status_code, 404)
+
+    def test_staff_only(self):
+        job = Job.objects.create(kind=Job.KIND_EXPORT, view='', owner=self.staff)
+        self.client.force_login(self.player)
+        self.assertEqual(self.client.get(reverse('characters:job_status', args=[job.pk])).status_code, 403)
+
+    def test_progress_is_read_from_the_database(self):
+        # As saved by the heartbeat of the process running the job, whichever process answers
+        job = Job.objects.create(kind=Job.KIND_IMPORT, view='', owner=self.staff, status=Job.RUNNING)
+        with mock.patch.dict(jobs._active, {job.pk: 42}):
+            jobs.save_heartbeats()
+        job.refresh_from_db()
+        self.assertIsNotNone(job.heartbeat_at)
+        self.assertEqual(self.status(job)['progress'], 42)
+
+    def test_stale_jobs_fail(self):
+        old = timezone.now() - timedelta(hours=1)
+        running = Job.objects.create(kind=Job.KIND_IMPORT, view='', owner=self.staff, status=Job.RUNNING,
+                                     heartbeat_at=old)
+        alive = Job.objects.create(kind=Job.KIND_IMPORT, view='', owner=self.staff, status=Job.RUNNING,
+                                   heartbeat_at=timezone.now())
+        queued = Job.objects.create(kind=Job.KIND_EXPORT, view='', owner=self.staff)
+        Job.objects.filter(pk=queued.pk).update(created_at=old)
+
+        self.assertEqual(self.status(running)['status'], Job.FAILED)
+        # Polling a live job reads its row and writes nothing
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.status(alive)['status'], Job.RUNNING)
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE "characters_job"')])
+        self.assertEqual(jobs.fail_stale_jobs(), 1)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.message), (Job.FAILED, jobs.STALE_MESSAGE))
+        # A queued job failed meanwhile is not run when its turn comes
+        jobs.run_job(queued.pk)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.FAILED)
+
+    def test_cleanup(self):
+        def job_file(job, name):
+            path = os.path.join(self.root, f'job-{job.pk}-{name}')
+            open(path, 'wb').close()
+            return path
+
+        old = timezone.now() - timedelta(days=30)
+        expired = Job.objects.create(kind=Job.KIND_EXPORT, view='', owner=self.staff, status=Job.DONE, finished_at=old)
+        Job.objects.filter(pk=expired.pk).update(result_file=job_file(expired, 'old.json'))
+        recent = Job.objects.create(kind=Job.KIND_EXPORT, view='', owner=self.staff, status=Job.DONE,
+                                    finished_at=timezone.now())
+        kept = job_file(recent, 'new.json')
+        Job.objects.filter(pk=recent.pk).update(result_file=kept)
+        running = Job.objects.create(kind=Job.KIND_IMPORT, view='', owner=self.staff, status=Job.RUNNING,
+                                     heartbeat_at=timezone.now())
+        upload = job_file(running, 'upload.json')
+        job_file(Job(pk=10**6), 'orphan.json')
+
+        call_command('cleanup_jobs', stdout=StringIO())
+        self.assertEqual(sorted(os.listdir(self.root)), sorted(os.path.basename(p) for p in (kept, upload)))
+        expired.refresh_from_db()
+        self.assertEqual(expired.result_file, '')
+        self.assertEqual(self.client.get(reverse('characters:job_download', args=[expired.pk])).status_code, 404)
+
+
+class AdminResourceTests(TestCase):
+    """Admin imports run in bulk: a fixed number of queries, whatever the number of rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.owners = [User.objects.create_user(username=f'owner{i}') for i in range(3)]
+        cls.warriors = [Warrior.objects.create(name=f'Guerrero {letter}', owner=cls.owners[0]) for letter in 'abc']
+
+    def dataset(self, new_rows):
+        data = tablib.Dataset(headers=['id', 'owner', 'name', 'health', 'damage', 'defense'])
+        unchanged, renamed, moved = self.warriors
+        data.append([unchanged.pk, unchanged.owner_id, unchanged.name, unchanged.health, unchanged.damage, unchanged.defense])
+        data.append([renamed.pk, renamed.owner_id, 'Renombrado', renamed.health, renamed.damage, renamed.defense])
+        data.append([moved.pk, self.owners[2].pk, moved.name, moved.health, moved.damage, moved.defense])
+        for i in range(new_rows):
+            data.append(['', self.owners[i % 3].pk, f'Nuevo {"abcdefghij"[i % 10]}{"abcdefghij"[i // 10]}', 90, 15, 8])
+        return tablib.Dataset().load(data.export('csv'), format='csv')
+
+    def test_bulk_import(self):
+        before = versions.get_version(Warrior)  # As an export cursor handed out before the import
+        with CaptureQueriesContext(connection) as few:
+            result = WarriorResource().import_data(self.dataset(5), use_transactions=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual((result.totals['new'], result.totals['update'], result.totals['skip']), (5, 2, 1))
+        self.assertEqual(Warrior.objects.get(pk=self.warriors[2].pk).owner, self.owners[2])
+        self.assertGreater(Warrior.objects.get(name='Renombrado').change_version, before)
+        self.assertTrue(Warrior.objects.filter(name='Nuevo aa', change_version__gt=0).exists())
+
+        Warrior.objects.filter(name__startswith='Nuevo').delete()
+        with CaptureQueriesContext(connection) as many:
+            WarriorResource().import_data(self.dataset(50), use_transactions=True)
+        self.assertLessEqual(len(many), len(few))
+
+    def test_dry_run_preview(self):
+        result = WarriorResource().import_data(self.dataset(2), dry_run=True, use_transactions=True)
+        self.assertFalse(result.has_errors())
+        self.assertTrue(all(row.diff for row in result.rows))
+        self.assertFalse(Warrior.objects.filter(name__startswith='Nuevo').exists())
+        self.assertFalse(Warrior.objects.filter(name='Renombrado').exists())
+
+    def test_unknown_owner(self):
+        data = tablib.Dataset(headers=['id', 'owner', 'name', 'health', 'damage', 'defense'])
+        data.append(['', 999999, 'Huerfano', 90, 15, 8])
+        result = WarriorResource().import_data(data, use_transactions=True)
+        # Same error row as the library widget: the cache only answers the owners it found
+        self.assertIn('does not exist', str(result.error_rows[0].errors[0].error))
+        self.assertFalse(Warrior.objects.filter(name='Huerfano').exists())
+
+
+@override_settings(
+    MIDDLEWARE=['DjangoProject.instrumentation.InstrumentationMiddleware', *settings.MIDDLEWARE],
+    TEMPLATES=[{**settings.TEMPLATES[0], 'BACKEND': 'DjangoProject.instrumentation.DjangoTemplates', 'NAME': 'django'}],
+)
+class InstrumentationTests(TestCase):
+    """Opt-in per-URL-name histograms of SQL count, SQL time, template time and latency."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user(username='staff', is_staff=True)
+        Enemy.objects.create(name='Orco')
+
+    def setUp(self):
+        instrumentation.reset()
+
+    def stats(self):
+        response = self.client.get(reverse('instrumentation'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['views']
+
+    def test_records_per_url_name(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('characters:enemy_list'))
+        self.client.get(reverse('characters:enemy_list'))
+        enemies = self.stats()['characters:enemy_list']
+        self.assertEqual(enemies['requests'], 2)
+        self.assertGreater(enemies['sql_count']['max'], 0)
+        self.assertGreater(enemies['template_ms']['max'], 0)
+        self.assertGreaterEqual(enemies['latency_ms']['max'], enemies['sql_ms']['max'])
+
+        self.client.post(reverse('instrumentation'))
+        self.assertEqual(list(self.stats()), ['instrumentation'])
+
+    async def test_async_requests(self):
+        client = AsyncClient()
+        await client.aforce_login(self.staff)
+        await client.get(reverse('characters:enemy_list'))
+        stats = await sync_to_async(instrumentation.snapshot)()
+        self.assertGreater(stats['characters:enemy_list']['sql_count']['max'], 0)
+
+    def test_threshold_logging(self):
+        self.client.force_login(self.staff)
+        with override_settings(INSTRUMENTATION_MAX_QUERIES=0), self.assertLogs('DjangoProject.instrumentation') as logs:
+            self.client.get(reverse('characters:enemy_list'))
+        self.assertIn('characters:enemy_list', logs.output[0])
+
+    def test_staff_only(self):
+        self.client.force_login(get_user_model().objects.create_user(username='player'))
+        self.assertEqual(self.client.get(reverse('instrumentation')).status_code, 403)
+
+
+class LazyAdminTests(SimpleTestCase):
+    """The admin, and import_export with it, loads on the first admin URL (DjangoProject/urls.py)."""
+
+    def run_probe(self, code):
+        # A fresh process: this one has already imported the admin
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'DjangoProject.settings'}
+        probe = 'import sys, django; django.setup()\nfrom django.urls import resolve, reverse\n' + code
+        result = subprocess.run([sys.executable, '-c', probe], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout)
+
+    def test_admin_deferred_until_first_admin_url(self):
+        loaded = "'import_export.admin' in sys.modules"
+        before, after, urls = self.run_probe(
+            "reverse('home'); reverse('characters:warrior_export'); resolve('/characters/list/')\n"
+            f"before = {loaded}\n"
+            "urls = [reverse('admin:index'), reverse('admin:characters_warrior_changelist')]\n"
+            f"print(__import__('json').dumps([before, {loaded}, urls]))"
+        )
+        self.assertFalse(before)
+        self.assertTrue(after)
+        self.assertEqual(urls, ['/admin/', '/admin/characters/warrior/'])
+
+        # Resolving an admin URL first works as well
+        self.assertEqual(self.run_probe(
+            "match = resolve('/admin/characters/warrior/')\n"
+            "print(__import__('json').dumps([match.view_name, reverse('home')]))"
+        ), ['admin:characters_warrior_changelist', '/home/'])
+
+    def test_admin_urls_in_process(self):
+        self.assertEqual(reverse('admin:characters_warrior_changelist'), '/admin/characters/warrior/')
+        self.assertEqual(resolve('/admin/').view_name, 'admin:index')
+
+
+class ProductionSettingsTests(SimpleTestCase):
+    """DjangoProject/settings_production.py refuses to load without its required variables."""
+
+    def load(self, **env):
+        env = {'DJANGO_SECRET_KEY': 'secret', 'DJANGO_ALLOWED_HOSTS': 'juego.example.com', **env}
+        with mock.patch.dict(os.environ, env):
+            sys.modules.pop('DjangoProject.settings_production', None)
+            try:
+                return import_module('DjangoProject.settings_production')
+            finally:
+                sys.modules.pop('DjangoProject.settings_production', None)
+
+    def test_required_variables(self):
+        for missing, value in [('DJANGO_SECRET_KEY', ''), ('DJANGO_ALLOWED_HOSTS', ''),
+                               ('DJANGO_ALLOWED_HOSTS', ' , ')]:
+            with self.subTest(missing=missing, value=value), self.assertRaisesMessage(ImproperlyConfigured, missing):
+                self.load(**{missing: value})
+
+    def test_loads_with_required_variables(self):
+        production = self.load(DJANGO_ALLOWED_HOSTS='juego.example.com, www.juego.example.com')
+        self.assertFalse(production.DEBUG)
+        self.assertEqual(production.SECRET_KEY, 'secret')
+        self.assertEqual(production.ALLOWED_HOSTS, ['juego.example.com', 'www.juego.example.com'])
+        self.assertTrue(production.SESSION_COOKIE_SECURE)
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    """DB_ENGINE picks the database profile; every new SQLite connection gets SQLITE_PRAGMAS (DjangoProject/db.py)."""
+
+    def load_settings(self, **env):
+        # A private copy of settings.py, so the running settings are untouched
+        spec = spec_from_file_location('settings_under_test', settings.BASE_DIR / 'DjangoProject' / 'settings.py')
+        module = module_from_spec(spec)
+        with mock.patch.dict(os.environ, env):
+            for name in ('DB_ENGINE', 'DB_POOL', 'SQLITE_TUNING', 'DB_NAME'):
+                if name not in env:
+                    os.environ.pop(name, None)
+            spec.loader.exec_module(module)
+        return module
+
+    def test_profiles(self):
+        sqlite = self.load_settings()
+        self.assertEqual(sqlite.DATABASES['default']['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(sqlite.DATABASES['default']['OPTIONS'], {'transaction_mode': 'IMMEDIATE'})
+        self.assertEqual(sqlite.SQLITE_PRAGMAS['journal_mode'], 'WAL')
+
+        untuned = self.load_settings(SQLITE_TUNING='0')
+        self.assertEqual(untuned.DATABASES['default']['OPTIONS'], {})
+        self.assertEqual(untuned.SQLITE_PRAGMAS, {'journal_mode': 'DELETE'})
+
+        postgres = self.load_settings(DB_ENGINE='postgres', DB_NAME='juego')
+        self.assertEqual(postgres.DATABASES['default']['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(postgres.DATABASES['default']['NAME'], 'juego')
+        self.assertEqual(postgres.DATABASES['default']['CONN_MAX_AGE'], 60)
+        self.assertEqual(postgres.DATABASES['default']['OPTIONS'], {})
+
+        pooled = self.load_settings(DB_ENGINE='postgres', DB_POOL='1')
+        self.assertEqual(pooled.DATABASES['default']['CONN_MAX_AGE'], 0)
+        self.assertEqual(pooled.DATABASES['default']['OPTIONS']['pool']['max_size'], 10)
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite PRAGMAs")
+    def test_pragmas_on_new_connection(self):
+        pragmas = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 1234,
+                   'cache_size': -2048, 'temp_store': 'MEMORY'}
+        with tempfile.TemporaryDirectory() as directory, override_settings(SQLITE_PRAGMAS=pragmas):
+            new = SQLiteDatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(directory, 'db.sqlite3')},
+                                        alias='pragmas')
+            try:
+                with new.cursor() as cursor:
+                    values = {name: cursor.execute(f'PRAGMA {name}').fetchone()[0] for name in pragmas}
+            finally:
+                new.close()
+        # synchronous NORMAL is 1, temp_store MEMORY is 2
+        self.assertEqual(values, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 1234,
+                                  'cache_size': -2048, 'temp_store': 2})
+
+
+class GenerateDataTests(TestCase):
+    """generate_data writes valid, unique, reproducible rows in batches."""
+
+    def generate(self, prefix='Gen', **options):
+        options = {'rows': 60, 'users': 3, 'batch_size': 25, 'workers': 1, 'seed': 5, **options}
+        call_command('generate_data', prefix=prefix, stdout=StringIO(), **options)
+
+    def names(self, model, prefix):
+        return sorted(name[len(prefix):] for name in model.objects.filter(name__startswith=f'{prefix} ')
+                      .values_list('name', flat=True))
+
+    def test_rows_are_valid(self):
+        version = versions.get_version(Item)
+        self.generate()
+        for model in (Warrior, Mage, Enemy, Item):
+            self.assertEqual(model.objects.count(), 60)
+            for obj in model.objects.all()[:20]:
+                obj.full_clean()
+        shapes = {tuple(sorted(attributes)) for attributes in Item.objects.values_list('extra_attributes', flat=True)}
+        self.assertGreater(len(shapes), 1)
+        owners = Warrior.objects.values('owner__username').annotate(count=Count('pk'))
+        self.assertEqual({row['owner__username']: row['count'] for row in owners}, {'gen0': 20, 'gen1': 20, 'gen2': 20})
+        self.assertGreater(versions.get_version(Item), version)
+
+    def test_same_seed_same_rows(self):
+        self.generate('Gen')
+        self.generate('Otro')
+        self.generate('Mas', seed=6)
+        for model in (Warrior, Enemy, Item):
+            self.assertEqual(self.names(model, 'Gen'), self.names(model, 'Otro'))
+            self.assertNotEqual(self.names(model, 'Gen'), self.names(model, 'Mas'))
+
+    def test_prefix_in_use(self):
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+
+
+class BenchmarkSuiteTests(TestCase):
+    """Query counts of the 1k benchmark dataset stay within the checked-in baseline (benchmark_baselines/1k.json)."""
+    scenarios = ['lists', 'exports', 'imports']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = benchmarks.seed_dataset(benchmarks.SIZES['1k'])
+
+    def test_query_counts_match_baseline(self):
+        suite = benchmarks.BenchmarkSuite(self.data, repeat=1)
+        metrics = suite.run(self.scenarios)
+        baseline = benchmarks.load_results(benchmarks.baseline_path('1k'))
+        self.assertEqual(benchmarks.compare(metrics, baseline, queries_only=True), [])
+        # Every metric of these scenarios is in the baseline
+        self.assertLessEqual(set(metrics), set(baseline['metrics']))
+
+    def test_compare(self):
+        baseline = {'metrics': {'list.a.queries': 4, 'list.a.requests_per_s': 100, 'list.b.queries': 2}}
+        self.assertEqual(benchmarks.compare({'list.a.queries': 4, 'list.a.requests_per_s': 51}, baseline), [])
+        regressions = benchmarks.compare({'list.a.queries': 5, 'list.a.requests_per_s': 49}, baseline)
+        self.assertEqual([message.split(':')[0] for message in regressions], ['list.a.queries', 'list.a.requests_per_s'])
+        self.assertEqual(benchmarks.compare({'list.a.queries': 5}, baseline, query_tolerance=0.25), [])
+        self.assertEqual(benchmarks.compare({'list.a.requests_per_s': 1}, baseline, queries_only=True), [])
+
+
+class AsyncViewTests(TestCase):
+    """The async views (served under ASGI) answer like their sync counterparts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user(username='staff', password='pass', is_staff=True)
+        cls.player = User.objects.create_user(username='player', password='pass')
+        Warrior.objects.create(name='Conan', owner=cls.player)
+        Warrior.objects.create(name='Xena', owner=cls.staff)
+        Enemy.objects.create(name='Orco', health=50)
+
+    def async_get(self, path, user, **extra):
+        request = AsyncRequestFactory().get(path, **extra)
+
+        async def auser():
+            return user
+        request.auser = auser
+        return request
+
+    async def read(self, response):
+        if not response.streaming:
+            return response.content
+        return b''.join([chunk async for chunk in response])
+
+    async def test_export_matches_sync_export(self):
+        for format_name in ('json', 'ndjson', 'ndjson.gz'):
+            for async_view, sync_view in ((async_views.WarriorExportView, views.WarriorExportView),
+                                          (async_views.EnemyExportView, views.EnemyExportView)):
+                with self.subTest(view=sync_view.__name__, format=format_name):
+                    path = f'/export/?format={format_name}'
+                    response = await async_view.as_view()(self.async_get(path, self.staff))
+                    self.assertEqual(response.status_code, 200)
+                    if response.streaming:
+                        self.assertTrue(response.is_async)
+
+                    sync_request = RequestFactory().get(path)
+                    sync_request.user = self.staff
+                    expected = await sync_to_async(lambda: b''.join(sync_view.as_view()(sync_request)))()
+                    self.assertEqual(await self.read(response), expected)
+
+    async def test_delta_export_matches_sync_export(self):
+        cursor = (await async_views.WarriorExportView.as_view()(self.async_get('/export/', self.staff)))['X-Export-Cursor']
+        await Warrior.objects.acreate(name='Red', owner=self.staff)
+        await Warrior.objects.filter(name='Xena').adelete()
+
+        path = f'/export/?format=ndjson&since={cursor}'
+        response = await async_views.WarriorExportView.as_view()(self.async_get(path, self.staff))
+        sync_request = RequestFactory().get(path)
+        sync_request.user = self.staff
+        expected = await sync_to_async(lambda: b''.join(views.WarriorExportView.as_view()(sync_request)))()
+        self.assertEqual(await self.read(response), expected)
+        self.assertEqual(len(expected.splitlines()), 2)
+
+        await sync_to_async(call_command)('prune_tombstones', days=0, stdout=StringIO())
+        response = await async_views.WarriorExportView.as_view()(self.async_get(path, self.staff))
+        self.assertEqual(response.status_code, 410)
+
+    async def test_permissions_and_not_modified(self):
+        view = async_views.WarriorExportView.as_view()
+        self.assertEqual((await view(self.async_get('/export/', AnonymousUser()))).status_code, 302)
+        with self.assertRaises(PermissionDenied):
+            await view(self.async_get('/export/', self.player))
+
+        etag = (await view(self.async_get('/export/', self.staff)))['ETag']
+        response = await view(self.async_get('/export/', self.staff, headers={'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 304)
+
+    async def test_lists(self):
+        response = await async_views.CharacterListView.as_view()(self.async_get('/list/', self.player))
+        self.assertContains(response, 'Conan')
+        self.assertNotContains(response, 'Xena')
+        response = await async_views.EnemyListView.as_view()(self.async_get('/enemies/', self.player))
+        self.assertContains(response, 'Orco')
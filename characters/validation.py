@@ -0,0 +1,176 @@
+# characters/validation.py
+"""
+Batch validation for the models of ``characters.models``.
+
+``BatchValidator`` checks many rows of one model with the same rules as
+``Model.full_clean()`` but with set-based work:
+
+* ``clean`` converts and validates field values (``to_python``, choices,
+  blank/NULL, ``alphabetic_validator``, ``MinValueValidator``...). Results
+  are memoized per distinct value, so a column that repeats the same few
+  values runs its validators a few times per import, not once per row.
+* ``check_unique`` checks the unique fields (``name``) against the database
+  and against the rows validated before, in file order: two rows cannot
+  claim the same name and a rename frees the old one for a later row. The
+  current holders are loaded with one ``__in`` query per batch
+  (``prefetch``) or taken from rows the caller already loaded
+  (``remember``); a value that was not prefetched costs one query.
+
+Errors are returned as ``{field name: [messages]}``, the shape of
+``ValidationError.message_dict``, so callers can raise them as a
+``ValidationError``, flatten them into a report or attach them to a form.
+
+Used by the JSON importer (``characters.importers.BulkImporter``), the admin
+resources (``characters.resources``) and the model forms
+(``characters.forms``).
+"""
+from django.core.exceptions import ValidationError
+from django.db import connections, router
+from django.db.models import Q
+
+
+class BatchValidator:
+    """Validates rows of ``model``, given as ``{attname: value}`` dicts."""
+
+    # Memoized clean results kept at most; past that the memo starts over
+    memo_size = 10_000
+
+    def __init__(self, model):
+        self.model = model
+        opts = model._meta
+        self.fields = {field.attname: field for field in opts.concrete_fields}
+        self.unique_fields = [
+            field.attname for field in opts.concrete_fields if field.unique and not field.primary_key
+        ]
+        self.memo = {}
+        self.reset()
+
+    def reset(self):
+        """Forgets the unique values seen so far (e.g. once a batch is written)."""
+        self.holders = {attname: {} for attname in self.unique_fields}  # value -> row key
+        self.held = {}  # row key -> {attname: value}
+
+    # Field values
+
+    def clean(self, data):
+        """Returns ``(cleaned data, errors)`` for one row; unknown keys pass through."""
+        cleaned, errors = {}, {}
+        for attname, value in data.items():
+            field = self.fields.get(attname)
+            if field is None:
+                cleaned[attname] = value
+                continue
+            try:
+                cleaned[attname] = self.clean_value(field, value)
+            except ValidationError as e:
+                errors.setdefault(field.name, []).extend(e.messages)
+        return cleaned, errors
+
+    def clean_value(self, field, value):
+        if field.attname in self.unique_fields:
+            # Every row brings a different value: memoizing them only costs memory
+            return self._clean_value(field, value)
+        key = (field.attname, type(value), value)
+        try:
+            result = self.memo[key]
+        except TypeError:  # Unhashable (JSONField dicts and lists)
+            return self._clean_value(field, value)
+        except KeyError:
+            try:
+                result = self._clean_value(field, value)
+            except ValidationError as e:
+                result = e
+            if len(self.memo) >= self.memo_size:
+                self.memo.clear()
+            self.memo[key] = result
+        if isinstance(result, ValidationError):
+            raise result
+        return result
+
+    def _clean_value(self, field, value):
+        if field.is_relation:
+            # Existence is checked by the callers, with one query for the whole batch
+            value = field.to_python(value)
+            if value is None and not field.null:
+                raise ValidationError(field.error_messages['null'], code='null')
+            return value
+        return field.clean(value, None)
+
+    # Unique fields
+
+    def unique_values(self, data):
+        values = {}
+        for attname in self.unique_fields:
+            if data.get(attname) is None:
+                continue  # NULLs never collide
+            try:
+                values[attname] = self.fields[attname].to_python(data[attname])
+            except ValidationError:
+                continue  # Reported by clean()
+        return values
+
+    def remember(self, instances):
+        """Records the unique values held in the database by already loaded rows."""
+        for instance in instances:
+            values = {attname: getattr(instance, attname) for attname in self.unique_fields}
+            self.held[instance.pk] = values
+            for attname, value in values.items():
+                self.holders[attname][value] = instance.pk
+
+    def prefetch(self, rows):
+        """Loads the holders of the unique values of ``rows`` not known yet."""
+        missing = {attname: set() for attname in self.unique_fields}
+        for data in rows:
+            for attname, value in self.unique_values(data).items():
+                if value not in self.holders[attname]:
+                    missing[attname].add(value)
+
+        connection = connections[router.db_for_read(self.model)]
+        chunk_size = connection.features.max_query_params or 1000
+        params = [(attname, value) for attname, values in missing.items() for value in values]
+        for start in range(0, len(params), chunk_size):
+            condition = Q()
+            for attname in self.unique_fields:
+                values = [value for name, value in params[start:start + chunk_size] if name == attname]
+                if values:
+                    condition |= Q(**{f'{attname}__in': values})
+            found = self.model._default_manager.filter(condition).values_list('pk', *self.unique_fields)
+            for pk, *values in found:
+                if pk in self.held:
+                    continue  # Already known, maybe with claims made since it was loaded
+                self.held[pk] = dict(zip(self.unique_fields, values))
+                for attname, value in zip(self.unique_fields, values):
+                    self.holders[attname].setdefault(value, pk)
+
+        # Values nobody holds
+        for attname, values in missing.items():
+            for value in values:
+                self.holders[attname].setdefault(value, None)
+
+    def check_unique(self, key, data):
+        """
+        Checks the unique values of one row and, if they are free, claims
+        them for ``key`` (the row's pk, or any unique object for new rows),
+        releasing the values ``key`` held before.
+        """
+        values = self.unique_values(data)
+        if any(value not in self.holders[attname] for attname, value in values.items()):
+            self.prefetch([values])  # Not in the prefetched batch
+        errors = {}
+        for attname, value in values.items():
+            holder = self.holders[attname].get(value)
+            if holder is not None and holder != key:
+                field = self.fields[attname]
+                error = self.model().unique_error_message(self.model, (field.name,))
+                errors.setdefault(field.name, []).extend(error.messages)
+        if errors:
+            return errors
+
+        held = self.held.setdefault(key, {})
+        for attname, value in values.items():
+            old_value = held.get(attname)
+            if old_value is not None and self.holders[attname].get(old_value) == key:
+                self.holders[attname][old_value] = None
+            self.holders[attname][value] = key
+            held[attname] = value
+        return {}
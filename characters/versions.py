@@ -0,0 +1,214 @@
+# characters/versions.py
+"""
+Per-table change tracking for Warrior, Mage, Enemy and Item.
+
+``bump`` runs in the same transaction as every save (``ChangeTrackedModel``),
+delete (``characters.signals``) or bulk import, so a table's ``TableVersion``
+changes exactly when its rows do. Readers get a cheap, exact "has anything
+changed?" answer: one primary key lookup, whatever the size of the table.
+
+The new version is also stamped on the rows written (``change_version``) and
+on the tombstones of deleted rows. The version row is locked from the bump to
+the commit, so writes commit in version order: once version ``v`` is visible,
+every change up to ``v`` is too. An exporter that reads the version first can
+hand it out as a cursor and later return exactly the changes after it.
+
+A transaction bumps each table once: the first write takes the new version
+(and the lock) and the later writes of the same transaction reuse it, so a
+request or an import that saves many rows sends one UPDATE per table, not one
+per row. The versions taken are kept in an on-commit callback
+(``_TransactionVersions``), which Django discards together with the rollback
+(of the transaction or of the savepoint) that undoes the bump. Reading a
+version in the same transaction (``get_versions``) forgets it, so writes made
+after a version was handed out get a newer one.
+
+Finding those callbacks reads ``connection.run_on_commit`` and
+``connection.savepoint_ids``, which are Django internals: Django has no hook
+for rollbacks. ``_pending_versions`` only trusts entries of the shape it knows
+(pinned by ``TableVersionTests.test_django_on_commit_internals``); if a
+Django release changes them, every write bumps again, which is slower but
+never hands out a stale version.
+
+Tombstones are kept for ``TOMBSTONE_RETENTION_DAYS``: ``prune_tombstones``
+deletes the older ones and records the newest version it removed as the
+table's ``pruned_version``. A ``since`` older than that could miss deletions,
+so the export views reject it (``since_expired``) and the client starts over
+with a full export.
+
+Every write path bumps: ``Model.save()``, deletes (``characters.signals``),
+and ``QuerySet.update()``/``bulk_create()``/``bulk_update()`` through
+``ChangeTrackedQuerySet``. Raw SQL writes must call ``stamp`` or ``bump``
+themselves (``importers.bulk_update``, ``synthetic.bulk_insert``); a write
+that skips them is invisible to ETags, the catalog cache and ``?since=``.
+"""
+from asgiref.sync import sync_to_async
+from django.db import connections, router, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import TableVersion, Tombstone
+
+
+def table_name(model):
+    return model._meta.label_lower
+
+
+def _versions_query(names):
+    return TableVersion.objects.filter(name__in=names).values_list('name', 'version', 'updated_at')
+
+
+class _TransactionVersions(dict):
+    """Table name -> version bumped in the current transaction, at one savepoint level."""
+
+    def __call__(self):
+        pass  # Registered with on_commit only to share its lifetime
+
+
+def _connection():
+    return connections[router.db_for_write(TableVersion)]
+
+
+def _pending_versions(connection):
+    """
+    ``[(savepoint ids, _TransactionVersions)]`` still pending on ``connection``:
+    the versions bumped by the open transaction, in savepoints that were not
+    rolled back. Entries of any other shape are ignored.
+    """
+    return [
+        (set(entry[0]), entry[1]) for entry in getattr(connection, 'run_on_commit', ())
+        if isinstance(entry, tuple) and len(entry) == 3 and isinstance(entry[1], _TransactionVersions)
+    ]
+
+
+def _bumped_in_transaction(name):
+    connection = _connection()
+    if connection.in_atomic_block:
+        for _, bumped in _pending_versions(connection):
+            if name in bumped:
+                return bumped[name]
+    return None
+
+
+def _remember_bump(name, version):
+    connection = _connection()
+    if not connection.in_atomic_block:
+        return
+    current = set(getattr(connection, 'savepoint_ids', ()))
+    for sids, bumped in _pending_versions(connection):
+        if sids == current:
+            bumped[name] = version
+            return
+    transaction.on_commit(_TransactionVersions({name: version}), using=connection.alias)
+
+
+def _forget_bumps(names):
+    connection = _connection()
+    if connection.in_atomic_block:
+        for _, bumped in _pending_versions(connection):
+            for name in names:
+                bumped.pop(name, None)
+
+
+def get_versions(*models):
+    """``{model: (version, updated_at)}`` in one query; (0, None) for untouched tables."""
+    names = {table_name(model): model for model in models}
+    _forget_bumps(names)  # Later writes in this transaction must not reuse a version seen here
+    found = {name: (version, updated_at) for name, version, updated_at in _versions_query(names)}
+    return {model: found.get(name, (0, None)) for name, model in names.items()}
+
+
+def get_version(model):
+    return get_versions(model)[model][0]
+
+
+async def aget_versions(*models):
+    """``get_versions`` for async views."""
+    # One hop to the ORM's thread, as an async query would take, also to forget the bumps there
+    return await sync_to_async(get_versions)(*models)
+
+
+async def aget_version(model):
+    return (await aget_versions(model))[model][0]
+
+
+def bump(model):
+    """
+    Bumps the table version and returns the new one; runs inside the caller's
+    transaction, which only bumps each table once.
+    """
+    name = table_name(model)
+    version = _bumped_in_transaction(name)
+    if version is None:
+        version = _bump(name)
+        _remember_bump(name, version)
+    return version
+
+
+def _bump(name):
+    now = timezone.now()
+    if not TableVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=now):
+        _, created = TableVersion.objects.get_or_create(name=name, defaults={'version': 1, 'updated_at': now})
+        if created:
+            return 1
+        # Created concurrently by another writer
+        TableVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=now)
+    return TableVersion.objects.filter(name=name).values_list('version', flat=True).get()
+
+
+def is_tracked(model):
+    return any(field.name == 'change_version' for field in model._meta.concrete_fields)
+
+
+def stamp(model, objs):
+    """Bumps the version once for a batch of rows about to be bulk-written and stamps them with it."""
+    version = bump(model)
+    for obj in objs:
+        obj.change_version = version
+    return version
+
+
+def record_deletion(model, pk):
+    """Bumps the version and leaves a tombstone for the deleted row."""
+    Tombstone.objects.create(table=table_name(model), object_id=pk, change_version=bump(model))
+
+
+def changed_since(queryset, since, cursor):
+    """Rows of ``queryset`` written after version ``since``, up to ``cursor``."""
+    return queryset.filter(change_version__gt=since, change_version__lte=cursor)
+
+
+def deleted_since(model, since, cursor):
+    """Ids of the rows of ``model`` deleted after version ``since``, up to ``cursor``."""
+    return Tombstone.objects.filter(
+        table=table_name(model), change_version__gt=since, change_version__lte=cursor,
+    ).order_by('change_version').values_list('object_id', flat=True)
+
+
+def _pruned_version_query(model):
+    return TableVersion.objects.filter(name=table_name(model)).values_list('pruned_version', flat=True)
+
+
+def since_expired(model, since):
+    """True if tombstones newer than ``since`` were pruned: a delta from it would miss deletions."""
+    return since < (_pruned_version_query(model).first() or 0)
+
+
+async def asince_expired(model, since):
+    return since < (await _pruned_version_query(model).afirst() or 0)
+
+
+def prune_tombstones(before):
+    """
+    Deletes the tombstones of rows deleted before ``before`` (a datetime) and
+    records, per table, the newest version deleted. Returns ``{table: count}``.
+    """
+    pruned = {}
+    newest_per_table = (
+        Tombstone.objects.filter(deleted_at__lt=before).values('table')
+        .annotate(newest=Max('change_version')).values_list('table', 'newest')
+    )
+    for table, newest in newest_per_table:
+        with transaction.atomic():
+            TableVersion.objects.filter(name=table, pruned_version__lt=newest).update(pruned_version=newest)
+            pruned[table], _ = Tombstone.objects.filter(table=table, change_version__lte=newest).delete()
+    return pruned
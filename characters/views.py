@@ -1,6 +1,10 @@
 # C:\DjangoProject\characters\views.py
+import hashlib
+import os
+from calendar import timegm
 
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.views.generic import (
     ListView,
     CreateView,
@@ -10,49 +14,208 @@ from django.views.generic import (
 )
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import HttpResponse
-import json
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
 # Import your models
-from .models import Warrior, Mage, Enemy, Item
+from .models import Warrior, Mage, Enemy, Item, Job
 # Import your forms
 from .forms import WarriorForm, MageForm, EnemyForm, ItemForm
+from .exporters import EXPORT_FORMATS, export_columns, iter_rows, to_bytes
+from .importers import BulkImporter, RowImporter, describe_import_error, file_digest, iter_json_array
+from .pagination import KeysetPaginationMixin, page_key
+from . import catalog, jobs, versions
+
+# --- Conditional GET (ETag / Last-Modified) ---
+
+class ConditionalGetMixin:
+    """
+    Adds a strong ETag and Last-Modified to GET responses and answers
+    If-None-Match / If-Modified-Since with 304 before the view reads any row.
+    Both come from the table versions (characters.versions) of
+    get_tracked_models(), so checking them costs one query.
+    Put it after the permission mixins: their dispatch checks access before any 304.
+    """
+    def get_tracked_models(self):
+        return [self.model]
+
+    def get_etag_variant(self):
+        # Whatever else the response depends on: the page (query string) and the user
+        user = self.request.user
+        return f'{self.request.get_full_path()}|{user.pk}|{user.is_staff}'
+
+    def use_conditional_get(self):
+        return True
+
+    def get_validators(self):
+        return self.make_validators(versions.get_versions(*self.get_tracked_models()))
+
+    async def aget_validators(self):
+        # Used by the async views (characters.async_views)
+        return self.make_validators(await versions.aget_versions(*self.get_tracked_models()))
+
+    def make_validators(self, tracked):
+        parts = [f'{versions.table_name(model)}={version}' for model, (version, _) in tracked.items()]
+        parts.append(self.get_etag_variant())
+        etag = '"%s"' % hashlib.sha256('|'.join(parts).encode()).hexdigest()[:32]
+        # A table with no date has not changed since tracking began, so it is older
+        # than any date we have; with no dates at all there is no Last-Modified.
+        stamps = [updated_at for _, updated_at in tracked.values() if updated_at]
+        last_modified = timegm(max(stamps).utctimetuple()) if stamps else None
+        return etag, last_modified
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not self.use_conditional_get():
+            return super().dispatch(request, *args, **kwargs)
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        return self.add_validators(response, etag, last_modified)
+
+    def add_validators(self, response, etag, last_modified):
+        if response.status_code in (200, 304):
+            response.headers.setdefault('ETag', etag)
+            if last_modified is not None:
+                response.headers.setdefault('Last-Modified', http_date(last_modified))
+        return response
+
 
 # --- Reusable Mixins for JSON Export/Import ---
 
-class JSONExportMixin(LoginRequiredMixin, UserPassesTestMixin, View):
+class JSONExportMixin(LoginRequiredMixin, UserPassesTestMixin, ConditionalGetMixin, View):
+    """
+    Mixin for exporting model data as a streamed download.
+    Requires 'model' and 'fields_to_export' attributes.
+    The format is chosen with ?format=json (default, indented), compact, ndjson,
+    ndjson.gz and, when pyarrow is installed, arrow or parquet (characters.exporters).
+    Add ?background=1 to run the export as a Job and get its id back immediately.
+    With cache_export = True (small global catalogs) the serialized body is kept
+    in the catalog cache instead of being streamed from the database each time.
+    Responses carry ETag/Last-Modified and unchanged tables are answered with 304.
+    Every export carries its cursor in X-Export-Cursor; ?since=<cursor> then
+    exports only the rows written after it, followed by {"id": ..., "_deleted": true}
+    for the rows deleted after it (characters.versions), so a sync costs what changed.
+    Only accessible by staff users.
+    """
     model = None
     fields_to_export = []
     filename = "data.json"
+    export_chunk_size = 2000 # Rows fetched from the database (and serialized) at a time
+    cache_export = False
+    since = None # ?since= of the current request
+    cursor = None # Table version the export covers up to
 
     def test_func(self):
         return self.request.user.is_staff
 
-    def get(self, request, *args, **kwargs):
+    def get_export_queryset(self):
+        return self.model.objects.all()
+
+    def use_conditional_get(self):
+        # A background export always creates a new Job
+        return not self.request.GET.get('background')
+
+    def get_etag_variant(self):
+        # The file is the same for every staff user
+        return self.request.get_full_path()
+
+    def iter_export(self, export_format, rows=None):
+        # ForeignKeys are exported as their ID ('owner_id'), straight from values_list
+        if rows is None and self.since is not None:
+            rows = self.iter_changes()
+        elif rows is None:
+            rows = iter_rows(self.get_export_queryset(), self.fields_to_export, self.export_chunk_size)
+        return export_format.writer(rows, self.export_chunk_size, self.get_export_columns())
+
+    def get_export_columns(self):
+        # Column types for the typed formats (Arrow, Parquet); delta exports add '_deleted'
+        return export_columns(self.model, self.fields_to_export, deleted=self.since is not None)
+
+    def iter_changes(self):
+        queryset = versions.changed_since(self.get_export_queryset(), self.since, self.cursor)
+        yield from iter_rows(queryset, self.fields_to_export, self.export_chunk_size)
+        deleted = versions.deleted_since(self.model, self.since, self.cursor)
+        for pk in deleted.iterator(chunk_size=self.export_chunk_size):
+            yield {'id': pk, '_deleted': True}
+
+    def get_since(self):
+        # ?since=: a cursor from an earlier export (None for a full export); ValueError if malformed
+        since = self.request.GET.get('since', '')
+        if not since:
+            return None
+        if not since.isdigit():
+            raise ValueError(since)
+        return int(since)
+
+    def since_error_response(self):
+        try:
+            self.since = self.get_since()
+        except ValueError:
+            return HttpResponse("'since' must be the X-Export-Cursor of an earlier export.", status=400)
+        if self.since is not None and self.request.GET.get('background'):
+            return HttpResponse("Incremental exports (since) can't run in the background.", status=400)
+        return None
+
+    def since_expired_response(self):
+        return HttpResponse("'since' is older than the deletions kept for incremental exports: "
+                            "run a full export (without since).", status=410)
+
+    def get_export_format(self):
+        # (name, ExportFormat); the format is None when ?format= is unknown
         if not self.model or not self.fields_to_export:
             raise NotImplementedError("JSONExportMixin requires 'model' and 'fields_to_export' attributes.")
+        format_name = self.request.GET.get('format', 'json')
+        return format_name, EXPORT_FORMATS.get(format_name)
 
-        data = []
-        for obj in self.model.objects.all():
-            item_data = {}
-            for field_name in self.fields_to_export:
-                value = getattr(obj, field_name)
-                # Handle specific field types if needed during export
-                if hasattr(value, 'pk') and field_name != 'id': # Handle ForeignKeys (export only the ID)
-                    item_data[field_name] = value.pk
-                else:
-                    item_data[field_name] = value
-            data.append(item_data)
-
-        # Prepare the JSON response for download
-        response = HttpResponse(json.dumps(data, indent=4, ensure_ascii=False), content_type='application/json')
-        response['Content-Disposition'] = f'attachment; filename="{self.filename}"'
+    def unknown_format_response(self):
+        return HttpResponse(f"Unknown export format. Use one of: {', '.join(EXPORT_FORMATS)}.", status=400)
+
+    def as_attachment(self, response, export_format):
+        response['Content-Disposition'] = f'attachment; filename="{export_format.filename(self.filename)}"'
+        response['X-Export-Cursor'] = str(self.cursor)
         return response
 
+    def get(self, request, *args, **kwargs):
+        format_name, export_format = self.get_export_format()
+        if export_format is None:
+            return self.unknown_format_response()
+        error = self.since_error_response()
+        if error:
+            return error
+
+        if request.GET.get('background'):
+            # Written to a file by a worker thread; poll the status URL for the download link
+            job = jobs.submit_export(self, request.user, format_name)
+            return JsonResponse(jobs.status_payload(job), status=202)
+
+        if self.since is not None and versions.since_expired(self.model, self.since):
+            return self.since_expired_response()
+
+        # Read before any row: writes commit in version order, so the body holds
+        # at least every change up to the cursor (repeats on the next sync are harmless)
+        self.cursor = versions.get_version(self.model)
+        if self.cache_export and self.since is None:
+            body = catalog.get_or_build(
+                self.model, f'export:{format_name}',
+                lambda: b''.join(map(to_bytes, self.iter_export(export_format))),
+            )
+            response = HttpResponse(body, content_type=export_format.content_type)
+        else:
+            response = StreamingHttpResponse(
+                self.iter_export(export_format),
+                content_type=export_format.content_type,
+            )
+        return self.as_attachment(response, export_format)
+
 class JSONImportMixin(LoginRequiredMixin, UserPassesTestMixin, View):
     """
     Mixin for importing model data from a JSON file.
     Requires 'model', 'fields_mapping', and 'success_url_name' attributes.
+    ForeignKey ids (e.g. 'owner_id') are resolved once per import, in bulk.
+    Files are committed in chunks with a checkpoint, so submitting a file again
+    after a failed import resumes it; 'all or nothing' imports it in one transaction.
     Uses a generic template for the import form.
     Only accessible by staff users.
     """
@@ -60,6 +223,12 @@ class JSONImportMixin(LoginRequiredMixin, UserPassesTestMixin, View):
     template_name = 'characters/generic_import.html' # A generic template for all imports
     fields_mapping = {} # Maps JSON keys to model field names
     success_url_name = 'characters:character_list' # Default redirect after successful import
+    import_mode = 'bulk' # 'bulk' (set-based, batched) or 'row' (one query per object)
+    import_batch_size = 500
+    import_transaction = 'chunked' # 'chunked' (committed every import_commit_size objects, resumable) or 'atomic'
+    import_commit_size = 5000
+    upload_chunk_size = 64 * 1024 # Bytes read from the uploaded file at a time
+    owner_field = None # Set on owned models (e.g. 'owner'); missing owners fall back to the importing user
 
     def test_func(self):
         # Only staff users can import data
@@ -69,6 +238,32 @@ class JSONImportMixin(LoginRequiredMixin, UserPassesTestMixin, View):
         # Render the import form
         return render(request, self.template_name)
 
+    def read_upload(self, json_file):
+        # Byte chunks of the upload from the start (chunks() seeks back to 0)
+        return json_file.chunks(self.upload_chunk_size)
+
+    def get_importer(self, user):
+        # 'user' owns the rows whose owner is missing (owned models only)
+        owner_options = {}
+        if self.owner_field:
+            owner_options = {'owner': user, 'owner_field': self.owner_field}
+        if self.import_mode == 'row':
+            return RowImporter(self.model, self.fields_mapping, **owner_options)
+        return BulkImporter(self.model, self.fields_mapping, batch_size=self.import_batch_size, **owner_options)
+
+    def run_import(self, user, open_chunks, atomic=False, file_hash=None):
+        """
+        Imports a file given as ``open_chunks()``, a callable returning its byte
+        chunks from the start. Chunked imports read it twice (hash, then import)
+        unless the caller already has its ``file_hash``.
+        """
+        importer = self.get_importer(user)
+        if atomic or self.import_transaction == 'atomic':
+            return importer.run(iter_json_array(open_chunks()))
+        if file_hash is None:
+            file_hash = file_digest(open_chunks())
+        return importer.run_resumable(iter_json_array(open_chunks()), file_hash, self.import_commit_size)
+
     def post(self, request, *args, **kwargs):
         if not self.model or not self.fields_mapping:
             raise NotImplementedError("JSONImportMixin requires 'model' and 'fields_mapping' attributes.")
@@ -80,96 +275,113 @@ class JSONImportMixin(LoginRequiredMixin, UserPassesTestMixin, View):
         if not json_file.name.endswith('.json'):
             return render(request, self.template_name, {'error_message': 'The file must be a JSON file.'})
 
+        atomic = bool(request.POST.get('all_or_nothing'))
+        if request.POST.get('background'):
+            # Large files: save the upload and import it in a worker thread
+            job = jobs.submit_import(self, request.user, json_file, atomic)
+            return render(request, self.template_name, {'job': job})
+
+        # The upload is parsed lazily while importing, so a malformed file is
+        # only detected partway: the chunks committed before the error are kept
+        # (all or nothing: everything is rolled back).
         try:
-            file_data = json_file.read().decode('utf-8')
-            data_list = json.loads(file_data)
-        except json.JSONDecodeError as e:
-            return render(request, self.template_name, {'error_message': f'Error reading JSON file: {e}'})
+            result = self.run_import(request.user, lambda: self.read_upload(json_file), atomic)
         except Exception as e:
-            return render(request, self.template_name, {'error_message': f'Unexpected error processing file: {e}'})
-
-        if not isinstance(data_list, list):
-            return render(request, self.template_name, {'error_message': 'The JSON file must contain a list of objects.'})
-
-        created_count = 0
-        updated_count = 0
-        errors = []
-
-        for row_num, item_data_json in enumerate(data_list):
-            try:
-                instance_data = {}
-                for json_key, model_field in self.fields_mapping.items():
-                    if json_key in item_data_json:
-                        # Special handling for ForeignKey fields (e.g., 'owner_id')
-                        # For owned characters, 'owner' will be set by the overridden post method.
-                        # For other models, if a foreign key ID is provided, use it.
-                        if model_field.endswith('_id') and json_key == model_field: # If JSON key matches model_field_id
-                             instance_data[model_field] = item_data_json[json_key]
-                        elif not model_field.endswith('_id'): # For non-id fields, just map directly
-                            instance_data[model_field] = item_data_json[json_key]
-
-                # Special handling for JSONField (like 'extra_attributes')
-                if 'extra_attributes' in self.fields_mapping.values() and 'extra_attributes' in item_data_json:
-                    attr_value = item_data_json['extra_attributes']
-                    if isinstance(attr_value, str):
-                        # If it comes as a string, try parsing it (might be stringified JSON)
-                        try:
-                            instance_data['extra_attributes'] = json.loads(attr_value)
-                        except json.JSONDecodeError:
-                            instance_data['extra_attributes'] = {} # Default to empty dict on parse error
-                            errors.append(f"Object {row_num + 1}: Invalid JSON in 'extra_attributes'.")
-                    else: # If it's already a JSON object (dict/list)
-                        instance_data['extra_attributes'] = attr_value
-
-
-                # Use 'id' for update_or_create
-                obj_id = instance_data.pop('id', None)
-
-                if obj_id is not None: # If ID is provided, try to update
-                    obj, created = self.model.objects.update_or_create(
-                        pk=obj_id,
-                        defaults=instance_data
-                    )
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-                else: # If no ID, create a new object
-                    self.model.objects.create(**instance_data)
-                    created_count += 1
-            except Exception as e:
-                errors.append(f"Object {row_num + 1}: Error processing '{item_data_json}': {e}")
+            error_message = describe_import_error(e)
+            if not atomic and self.import_transaction != 'atomic':
+                error_message += ' Objects committed before the error were kept: submit the same file to resume.'
+            return render(request, self.template_name, {'error_message': error_message})
 
         context = {
-            'message': f'Import completed. Created: {created_count}, Updated: {updated_count}.',
-            'errors': errors
+            'message': result.message,
+            'errors': result.errors
         }
         # Optionally redirect on success, otherwise render the same page with results
-        # if not errors and created_count > 0 or updated_count > 0:
+        # if not result.errors and (result.created > 0 or result.updated > 0):
         #     return redirect(self.success_url_name)
         return render(request, self.template_name, context)
 
+# --- Cached list pages for the global catalogs (Enemy, Item) ---
+
+class CatalogCacheMixin:
+    """
+    The rendered table of each page is cached in characters.catalog, keyed by
+    the catalog version, so a hit costs one version lookup and no rendering.
+    The rest of the page (which depends on the user) is rendered per request.
+
+    The key holds only the normalized page cursor, so made-up query
+    parameters can't fill the cache with copies of the same page; for the same
+    reason the page links in the fragment don't carry other parameters.
+    """
+    fragment_template_name = None
+
+    def get_fragment_key(self):
+        return f"list:{page_key(self.request.GET.get('after'), self.request.GET.get('before'))}"
+
+    def get_page_query(self):
+        return ''
+
+    def get(self, request, *args, **kwargs):
+        self.object_list = []  # Only loaded on a cache miss, by render_fragment
+        fragment = catalog.get_or_build(self.model, self.get_fragment_key(), self.render_fragment)
+        return self.render_to_response({'view': self, 'catalog_fragment': fragment})
+
+    def render_fragment(self):
+        # Must not depend on the user: the same fragment is served to everyone
+        self.object_list = self.get_queryset()
+        return render_to_string(self.fragment_template_name, self.get_context_data())
+
+
+# --- Ownership permission for owned objects ---
+
+class OwnerRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
+    """
+    Admins can act on any object; regular users only on the ones they own.
+    The object is fetched once per request and reused by the view, and
+    ownership is checked on owner_id so the owner is never loaded.
+    """
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+    def test_func(self):
+        user = self.request.user
+        return user.is_staff or self.get_object().owner_id == user.pk
+
+
 # --- Views for User Characters (Warrior, Mage) ---
 
-class CharacterListView(LoginRequiredMixin, ListView):
+class CharacterListView(LoginRequiredMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     """
-    Displays a list of all characters (warriors and mages).
-    Admins see all characters. Regular users see all characters.
+    Displays a list of characters (warriors and mages).
+    ?scope=mine (default) shows the user's own characters, ?scope=all shows everyone's.
+    Both tables are merged into one list ordered by name and paginated by cursor;
+    the owner filter is served by the (owner, name) indexes.
     """
     template_name = 'characters/character_list.html'
-    context_object_name = 'characters' # Este context_object_name ya no es solo 'characters' sino 'warriors' y 'mages'
+    context_object_name = 'characters'
+    scopes = ('mine', 'all')
+
+    def get_scope(self):
+        scope = self.request.GET.get('scope')
+        return scope if scope in self.scopes else 'mine'
+
+    def get_tracked_models(self):
+        return [Warrior, Mage]
 
-    def get_queryset(self):
-        # We don't need a specific queryset here since we're passing
-        # warriors and mages separately in get_context_data.
-        # This can return an empty queryset or any placeholder.
-        return Warrior.objects.none() # Or Warrior.objects.all() if you want to use 'object_list'
+    def get_keyset_sources(self):
+        warriors, mages = Warrior.objects.all(), Mage.objects.all()
+        if self.get_scope() == 'mine':
+            warriors = warriors.filter(owner=self.request.user)
+            mages = mages.filter(owner=self.request.user)
+        return [('mage', mages), ('warrior', warriors)]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Add ALL warriors and ALL mages to the context
-        context['warriors'] = Warrior.objects.all() # <-- AHORA MUESTRA TODOS LOS GUERREROS
-        context['mages'] = Mage.objects.all()       # <-- AHORA MUESTRA TODOS LOS MAGOS
+        context['scope'] = self.get_scope()
         return context
 
 class WarriorCreateView(LoginRequiredMixin, CreateView):
@@ -182,27 +394,17 @@ class WarriorCreateView(LoginRequiredMixin, CreateView):
         form.instance.owner = self.request.user # Assign the logged-in user as owner
         return super().form_valid(form)
 
-class WarriorUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class WarriorUpdateView(OwnerRequiredMixin, UpdateView):
     model = Warrior
     form_class = WarriorForm
     template_name = 'characters/character_form.html'
     success_url = reverse_lazy('characters:character_list')
 
-    def test_func(self):
-        # Admins can update any warrior. Regular users can only update their own.
-        warrior = self.get_object()
-        return self.request.user.is_staff or warrior.owner == self.request.user
-
-class WarriorDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class WarriorDeleteView(OwnerRequiredMixin, DeleteView):
     model = Warrior
     template_name = 'characters/character_confirm_delete.html'
     success_url = reverse_lazy('characters:character_list')
 
-    def test_func(self):
-        # Admins can delete any warrior. Regular users can only delete their own.
-        warrior = self.get_object()
-        return self.request.user.is_staff or warrior.owner == self.request.user
-
 class MageCreateView(LoginRequiredMixin, CreateView):
     model = Mage
     form_class = MageForm
@@ -213,36 +415,25 @@ class MageCreateView(LoginRequiredMixin, CreateView):
         form.instance.owner = self.request.user # Assign the logged-in user as owner
         return super().form_valid(form)
 
-class MageUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class MageUpdateView(OwnerRequiredMixin, UpdateView):
     model = Mage
     form_class = MageForm
     template_name = 'characters/character_form.html'
     success_url = reverse_lazy('characters:character_list')
 
-    def test_func(self):
-        # Admins can update any mage. Regular users can only update their own.
-        mage = self.get_object()
-        return self.request.user.is_staff or mage.owner == self.request.user
-
-class MageDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class MageDeleteView(OwnerRequiredMixin, DeleteView):
     model = Mage
     template_name = 'characters/character_confirm_delete.html'
     success_url = reverse_lazy('characters:character_list')
 
-    def test_func(self):
-        # Admins can delete any mage. Regular users can only delete their own.
-        mage = self.get_object()
-        return self.request.user.is_staff or mage.owner == self.request.user
-
 # --- Views for Enemies (Admin Only) ---
 
-class EnemyListView(LoginRequiredMixin, ListView):
+class EnemyListView(LoginRequiredMixin, ConditionalGetMixin, CatalogCacheMixin, KeysetPaginationMixin, ListView):
     model = Enemy
     template_name = 'characters/enemy_list.html'
+    fragment_template_name = 'characters/_enemy_table.html'
     context_object_name = 'enemies'
-    def get_queryset(self):
-        # All enemies are visible to any logged-in user
-        return Enemy.objects.all()
+    # All enemies are visible to any logged-in user
 
 class EnemyCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = Enemy
@@ -275,13 +466,12 @@ class EnemyDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 # --- Views for Items (Admin Only) ---
 
-class ItemListView(LoginRequiredMixin, ListView):
+class ItemListView(LoginRequiredMixin, ConditionalGetMixin, CatalogCacheMixin, KeysetPaginationMixin, ListView):
     model = Item
     template_name = 'characters/item_list.html'
+    fragment_template_name = 'characters/_item_table.html'
     context_object_name = 'items'
-    def get_queryset(self):
-        # Assume items are global and not owned
-        return Item.objects.all()
+    # Assume items are global and not owned
 
 class ItemCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = Item
@@ -329,97 +519,9 @@ class WarriorImportView(JSONImportMixin):
         'health': 'health',
         'damage': 'damage',
         'defense': 'defense',
-        'owner_id': 'owner_id', # Se incluye para que el Mixin base lo maneje si es necesario
+        'owner_id': 'owner_id', # Se resuelve en bloque; si no existe se asigna al admin que importa
     }
-
-    # Aquí es donde cambia la lógica de importación para Warrior/Mage
-    def post(self, request, *args, **kwargs):
-        if not self.request.user.is_staff:
-            return HttpResponse("You don't have permission to import data.", status=403)
-
-        json_file = request.FILES.get('json_file')
-        if not json_file:
-            return render(request, self.template_name, {'error_message': 'No file selected.'})
-
-        if not json_file.name.endswith('.json'):
-            return render(request, self.template_name, {'error_message': 'The file must be a JSON file.'})
-
-        try:
-            file_data = json_file.read().decode('utf-8')
-            data_list = json.loads(file_data)
-        except json.JSONDecodeError as e:
-            return render(request, self.template_name, {'error_message': f'Error reading JSON file: {e}'})
-        except Exception as e:
-            return render(request, self.template_name, {'error_message': f'Unexpected error processing file: {e}'})
-
-        if not isinstance(data_list, list):
-            return render(request, self.template_name, {'error_message': 'The JSON file must contain a list of objects.'})
-
-        created_count = 0
-        updated_count = 0
-        errors = []
-
-        for row_num, item_data_json in enumerate(data_list):
-            try:
-                instance_data = {}
-                for json_key, model_field in self.fields_mapping.items():
-                    if json_key in item_data_json:
-                        if model_field.endswith('_id') and json_key == model_field:
-                             instance_data[model_field] = item_data_json[json_key]
-                        elif not model_field.endswith('_id'):
-                            instance_data[model_field] = item_data_json[json_key]
-
-                # Si el importador es un admin, puede importar con el owner_id del JSON
-                # Si no hay owner_id en el JSON o el importador no es admin, asigna el owner al usuario logueado.
-                # Esta es la lógica clave para permitir la flexibilidad.
-                if self.request.user.is_staff and 'owner_id' in item_data_json:
-                    # Intentamos obtener el usuario por owner_id
-                    try:
-                        from django.contrib.auth import get_user_model
-                        User = get_user_model()
-                        owner_obj = User.objects.get(pk=item_data_json['owner_id'])
-                        instance_data['owner'] = owner_obj
-                    except User.DoesNotExist:
-                        errors.append(f"Object {row_num + 1}: Owner with ID {item_data_json['owner_id']} not found. Assigning to current admin.")
-                        instance_data['owner'] = self.request.user # Asigna al admin si el owner original no existe
-                else:
-                    # Si no es admin, o si el JSON no tiene owner_id, asigna al usuario logueado
-                    instance_data['owner'] = self.request.user
-
-                obj_id = instance_data.pop('id', None)
-
-                if obj_id is not None:
-                    # Cuando un admin actualiza, puede actualizar cualquier personaje.
-                    # Cuando un usuario normal actualiza, solo puede actualizar el suyo.
-                    # update_or_create con `owner` en `defaults` si se asignó, o en `pk` si es el caso del admin.
-                    if self.request.user.is_staff:
-                        # Si es admin, puede actualizar por ID directamente, y defaults maneja el owner
-                        obj, created = self.model.objects.update_or_create(
-                            pk=obj_id,
-                            defaults=instance_data
-                        )
-                    else:
-                        # Si es un usuario normal, debe ser su personaje
-                        obj, created = self.model.objects.update_or_create(
-                            pk=obj_id,
-                            owner=self.request.user, # Asegura que solo actualiza el suyo
-                            defaults=instance_data
-                        )
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-                else:
-                    self.model.objects.create(**instance_data)
-                    created_count += 1
-            except Exception as e:
-                errors.append(f"Object {row_num + 1}: Error processing '{item_data_json}': {e}")
-
-        context = {
-            'message': f'Import completed. Created: {created_count}, Updated: {updated_count}.',
-            'errors': errors
-        }
-        return render(request, self.template_name, context)
+    owner_field = 'owner'
 
 class MageExportView(JSONExportMixin):
     model = Mage
@@ -439,92 +541,14 @@ class MageImportView(JSONImportMixin):
         'defense': 'defense',
         'owner_id': 'owner_id',
     }
-
-    # Aquí es donde cambia la lógica de importación para Warrior/Mage
-    def post(self, request, *args, **kwargs):
-        if not self.request.user.is_staff:
-            return HttpResponse("You don't have permission to import data.", status=403)
-
-        json_file = request.FILES.get('json_file')
-        if not json_file:
-            return render(request, self.template_name, {'error_message': 'No file selected.'})
-
-        if not json_file.name.endswith('.json'):
-            return render(request, self.template_name, {'error_message': 'The file must be a JSON file.'})
-
-        try:
-            file_data = json_file.read().decode('utf-8')
-            data_list = json.loads(file_data)
-        except json.JSONDecodeError as e:
-            return render(request, self.template_name, {'error_message': f'Error reading JSON file: {e}'})
-        except Exception as e:
-            return render(request, self.template_name, {'error_message': f'Unexpected error processing file: {e}'})
-
-        if not isinstance(data_list, list):
-            return render(request, self.template_name, {'error_message': 'The JSON file must contain a list of objects.'})
-
-        created_count = 0
-        updated_count = 0
-        errors = []
-
-        for row_num, item_data_json in enumerate(data_list):
-            try:
-                instance_data = {}
-                for json_key, model_field in self.fields_mapping.items():
-                    if json_key in item_data_json:
-                        if model_field.endswith('_id') and json_key == model_field:
-                             instance_data[model_field] = item_data_json[json_key]
-                        elif not model_field.endswith('_id'):
-                            instance_data[model_field] = item_data_json[json_key]
-
-                # Lógica para asignar el owner:
-                if self.request.user.is_staff and 'owner_id' in item_data_json:
-                    try:
-                        from django.contrib.auth import get_user_model
-                        User = get_user_model()
-                        owner_obj = User.objects.get(pk=item_data_json['owner_id'])
-                        instance_data['owner'] = owner_obj
-                    except User.DoesNotExist:
-                        errors.append(f"Object {row_num + 1}: Owner with ID {item_data_json['owner_id']} not found. Assigning to current admin.")
-                        instance_data['owner'] = self.request.user # Asigna al admin si el owner original no existe
-                else:
-                    instance_data['owner'] = self.request.user
-
-                obj_id = instance_data.pop('id', None)
-
-                if obj_id is not None:
-                    if self.request.user.is_staff:
-                        obj, created = self.model.objects.update_or_create(
-                            pk=obj_id,
-                            defaults=instance_data
-                        )
-                    else:
-                        obj, created = self.model.objects.update_or_create(
-                            pk=obj_id,
-                            owner=self.request.user,
-                            defaults=instance_data
-                        )
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-                else:
-                    self.model.objects.create(**instance_data)
-                    created_count += 1
-            except Exception as e:
-                errors.append(f"Object {row_num + 1}: Error processing '{item_data_json}': {e}")
-
-        context = {
-            'message': f'Import completed. Created: {created_count}, Updated: {updated_count}.',
-            'errors': errors
-        }
-        return render(request, self.template_name, context)
+    owner_field = 'owner'
 
 
 class EnemyExportView(JSONExportMixin):
     model = Enemy
     fields_to_export = ['id', 'name', 'health', 'attack', 'defense']
     filename = "enemies.json"
+    cache_export = True
 
 class EnemyImportView(JSONImportMixin):
     model = Enemy
@@ -543,6 +567,7 @@ class ItemExportView(JSONExportMixin):
     fields_to_export = ['id', 'name', 'item_type', 'description', 'value',
                          'damage_buff', 'health_restore', 'mana_restore', 'extra_attributes']
     filename = "items.json" # Changed to .json
+    cache_export = True
 
 class ItemImportView(JSONImportMixin):
     model = Item
@@ -558,4 +583,37 @@ class ItemImportView(JSONImportMixin):
         'health_restore': 'health_restore',
         'mana_restore': 'mana_restore',
         'extra_attributes': 'extra_attributes'
-    }
\ No newline at end of file
+    }
+
+# --- Background import/export jobs ---
+
+class JobAccessMixin(LoginRequiredMixin, UserPassesTestMixin):
+    def test_func(self):
+        # Jobs are started from the staff-only import/export views
+        return self.request.user.is_staff
+
+    def get_job(self):
+        try:
+            return Job.objects.get(pk=self.kwargs['pk'])
+        except Job.DoesNotExist:
+            raise Http404("Job not found.")
+
+class JobStatusView(JobAccessMixin, View):
+    """JSON status of a background job, polled by generic_import.html."""
+    def get(self, request, *args, **kwargs):
+        # Progress is read from the row, so any process can answer
+        job = self.get_job()
+        if jobs.is_stale(job):
+            # Only an abandoned job is written to, and only this one (conditionally, as its process may be back)
+            jobs.fail_stale_jobs(Job.objects.filter(pk=job.pk))
+            job.refresh_from_db()
+        return JsonResponse(jobs.status_payload(job))
+
+class JobDownloadView(JobAccessMixin, View):
+    def get(self, request, *args, **kwargs):
+        job = self.get_job()
+        if job.status != Job.DONE or not job.result_file:
+            raise Http404("The export is not ready.")
+        if not os.path.exists(job.result_file):
+            raise Http404("The export has expired.")
+        return FileResponse(open(job.result_file, 'rb'), as_attachment=True, filename=job.filename)
@@ -0,0 +1,14 @@
+# users/benchmarks.py
+"""
+Escenario ``pages`` de las pruebas de rendimiento (characters.benchmarks):
+la portada y el login, que no deberían depender del tamaño de los datos.
+"""
+from django.urls import reverse
+
+from characters.benchmarks import scenario
+
+
+@scenario('pages')
+def pages(suite):
+    suite.get_pages('page.home', suite.data.player, reverse('home'))
+    suite.get_pages('page.login', suite.data.player, reverse('login'))
@@ -1,3 +1,18 @@
 from django.test import TestCase
 
-# Create your tests here.
+from characters import benchmarks
+from . import benchmarks as users_benchmarks  # noqa: F401 (registers the 'pages' scenario)
+
+
+class PagesBenchmarkTests(TestCase):
+    """The home and login pages run the baseline queries, whatever the data."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = benchmarks.seed_dataset(benchmarks.SIZES['1k'])
+
+    def test_query_counts_match_baseline(self):
+        metrics = benchmarks.BenchmarkSuite(self.data, repeat=1).run(['pages'])
+        baseline = benchmarks.load_results(benchmarks.baseline_path('1k'))
+        self.assertEqual(benchmarks.compare(metrics, baseline, queries_only=True), [])
+        self.assertEqual(metrics['page.home.queries'], 2)  # Session and user